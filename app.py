@@ -1,11 +1,24 @@
-from flask import Flask, render_template, request, jsonify, send_from_directory, send_file, make_response
+from flask import Flask, render_template, request, jsonify, send_from_directory, make_response, Response, stream_with_context
 import os
+import json
+import shutil
 import main_web_processor  # Import the refactored processing logic
 from werkzeug.utils import secure_filename
+import numpy as np
 import pandas as pd # Needed for combining dataframes
 import io # Needed for sending file data from memory
-import glob # Import glob
-from main_web_processor import generate_reports, generate_comparison_plot, create_cross_comparison_plot # Import new function
+from main_web_processor import generate_comparison_plot, create_cross_comparison_plot
+import streaming_ingest # Chunked processing for very large files
+import job_queue # Background jobs for /process
+from report_index import collect_report_results, refresh_report_manifest, REPORT_MANIFEST_FILE
+from report_catalog import (list_catalog_reports, list_catalog_comparison_plots, parse_catalog_date, catalog_report,
+                            rename_catalog_report, remove_catalog_report, COMPARISON_PLOT_MARKER)
+from report_store import find_report_data, read_report_frame, read_report_frame_head, iter_export_report_frame, EXPORT_FORMATS
+from plot_pyramid import read_plot_window, window_to_traces
+from column_schemas import COLUMN_SCHEMAS, DEFAULT_SCHEMA
+from frame_compaction import COMPACTION_POLICIES, DEFAULT_COMPACTION
+from data_parsers import is_compressed
+from resampling import parse_interval
 from datetime import datetime
 
 app = Flask(__name__, template_folder='templates', static_folder='static') # Create Flask application instance
@@ -24,23 +37,123 @@ if not os.path.exists(REPORTS_FOLDER):
 # Explicitly add the path to the app config dictionary
 app.config['REPORTS_FOLDER'] = REPORTS_FOLDER 
 
+# Rows of a Parquet data file shown by /get_file_content
+FILE_PREVIEW_ROWS = 200
+
+# Report files that are never served, listed or shown: the live-run state (server paths, pickled frames)
+PRIVATE_REPORT_FILES = (streaming_ingest.INGEST_STATE_FILE, streaming_ingest.INGEST_FRAMES_FILE)
+
+# Block size for streaming mode; peak memory follows this instead of the file size
+app.config['STREAMING_CHUNK_BYTES'] = 8 * 1024 * 1024
+
 # Define allowed file extensions
 ALLOWED_EXTENSIONS = {'txt'}
+# Compressed uploads are saved as they are and decompressed as a stream while parsing
+COMPRESSED_EXTENSIONS = {'gz', 'zst', 'zip'}
 
-def allowed_file(filename):
+def allowed_file(filename, compressed=True):
+    extensions = ALLOWED_EXTENSIONS | COMPRESSED_EXTENSIONS if compressed else ALLOWED_EXTENSIONS
     return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+           filename.rsplit('.', 1)[1].lower() in extensions
+
+def to_static_paths(results):
+    """Rewrites the absolute output paths in a results dict as 'static/...' paths for web access."""
+    static_folder_name = os.path.basename(app.static_folder) # Usually 'static'
+    path_owners = [results] + results.get('step_reports', [])
+    for owner in path_owners:
+        for key in ('overall_plot_path', 'overall_data_path', 'overall_csv_path', 'stage_boundaries_path',
+                    'plot_path', 'data_path', 'csv_path', 'json_path'):
+            if owner.get(key):
+                relative_path = os.path.relpath(owner[key], app.static_folder)
+                owner[key] = os.path.join(static_folder_name, relative_path).replace('\\', '/')
+    return results
+
+def minutes_from_form(form, field):
+    """
+    (pd.Timedelta or None, error message) of an optional form field in minutes. The value must
+    be a number above 0.
+    """
+    text = form.get(field, '').strip()
+    if not text:
+        return None, None
+    try:
+        minutes = float(text)
+    except ValueError:
+        return None, f"{field} must be a number (minutes), got '{text}'."
+    if not np.isfinite(minutes) or minutes <= 0:
+        return None, f"{field} must be a number of minutes above 0, got '{text}'."
+    return pd.Timedelta(minutes=minutes), None
+
+def processing_settings_from_form(form):
+    """
+    Reads the optional processing settings shared by /process and /process_batch.
+    Returns (settings, error message); settings are keyword arguments of generate_reports.
+    """
+    # Optional stage segmentation settings, e.g. stage_rules=relative_time_reset,data_gap
+    stage_rules = [rule.strip() for rule in form.get('stage_rules', '').split(',') if rule.strip()] or None
+    stage_options = {}
+    gap_threshold, error = minutes_from_form(form, 'gap_threshold_minutes')
+    if error:
+        return None, error
+    if gap_threshold is not None:
+        stage_options['gap_threshold'] = gap_threshold
+    # setpoint_change rule: relative change (in %) a setpoint must exceed to open a stage
+    setpoint_tolerance = form.get('setpoint_tolerance_percent', '').strip()
+    if setpoint_tolerance:
+        try:
+            stage_options['setpoint_tolerance'] = float(setpoint_tolerance) / 100
+        except ValueError:
+            return None, f"setpoint_tolerance_percent must be a number, got '{setpoint_tolerance}'."
+        if not 0 <= stage_options['setpoint_tolerance'] < np.inf:
+            return None, f"setpoint_tolerance_percent must be a number of 0 or above, got '{setpoint_tolerance}'."
+    # Column schema: header variants and which columns are read (see column_schemas.py)
+    column_schema = form.get('column_schema', '').strip() or DEFAULT_SCHEMA
+    if column_schema not in COLUMN_SCHEMAS:
+        return None, f"Unknown column schema '{column_schema}'."
+    # Dtype compaction policy of the in-memory frames (see frame_compaction.py)
+    compaction = form.get('compaction', '').strip() or DEFAULT_COMPACTION
+    if compaction not in COMPACTION_POLICIES:
+        return None, f"Unknown compaction policy '{compaction}'."
+    # How LV and GC rows are combined (see main_web_processor.MERGE_MODES)
+    merge_mode = form.get('merge_mode', '').strip() or main_web_processor.DEFAULT_MERGE_MODE
+    if merge_mode not in main_web_processor.MERGE_MODES:
+        return None, f"Unknown merge mode '{merge_mode}'."
+    max_gap, error = minutes_from_form(form, 'max_gap_minutes')
+    if error:
+        return None, error
+    # Optional fixed time grid for the outputs, e.g. '1min' or '10min'
+    resample_interval = form.get('resample_interval', '').strip() or None
+    if resample_interval:
+        try:
+            parse_interval(resample_interval)
+        except ValueError as e:
+            return None, str(e)
+    return {
+        'report_prefix_text': form.get('report_prefix_text', '').strip(), # Custom report prefix text
+        'stage_rules': stage_rules,
+        'stage_options': stage_options,
+        'schema': column_schema,
+        'compaction': compaction,
+        'merge_mode': merge_mode,
+        'max_gap': max_gap,
+        'resample_interval': resample_interval,
+    }, None
 
 # --- Routes ---
 @app.route('/')
 def index():
     """ Serves the main HTML page. """
-    return render_template('index.html')
+    return render_template('index.html', column_schemas=COLUMN_SCHEMAS, default_schema=DEFAULT_SCHEMA,
+                           compaction_policies=COMPACTION_POLICIES, default_compaction=DEFAULT_COMPACTION,
+                           merge_modes=main_web_processor.MERGE_MODES,
+                           default_merge_mode=main_web_processor.DEFAULT_MERGE_MODE)
 
 @app.route('/process', methods=['POST'])
 def process_files():
     """ 
-    Handles file uploads, triggers processing, and returns results as JSON.
+    Handles file uploads and queues their processing as a background job (job_queue.py).
+    Returns 202 with the job status ({'job': {'id', 'state', ...}, 'status_url'}) at once; the results
+    are read from /jobs/<id>. Returns 503 (busy) when the job queue is full.
     """
     # --- File Upload Handling ---
     if 'lv_file' not in request.files or 'gc_file' not in request.files:
@@ -52,110 +165,333 @@ def process_files():
     if lv_file.filename == '' or gc_file.filename == '':
         return jsonify({'success': False, 'message': 'No selected file(s).'}), 400
 
-    if lv_file and allowed_file(lv_file.filename) and gc_file and allowed_file(gc_file.filename):
-        # Secure filenames and save uploaded files temporarily
-        lv_filename = secure_filename(lv_file.filename)
-        gc_filename = secure_filename(gc_file.filename)
-        lv_filepath = os.path.join(app.config['UPLOAD_FOLDER'], lv_filename)
-        gc_filepath = os.path.join(app.config['UPLOAD_FOLDER'], gc_filename)
-
+    if not (lv_file and allowed_file(lv_file.filename) and gc_file and allowed_file(gc_file.filename)):
+        return jsonify({'success': False, 'message': 'Invalid file type (allowed: .txt, .gz, .zst, .zip)'}), 400
+
+    settings, error = processing_settings_from_form(request.form)
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
+    # Optional GC 'Sample name' stream for multi-stream GC files (default: matched to the LV reactor)
+    gc_stream = request.form.get('gc_stream', '').strip() or None
+    incremental = request.form.get('incremental', '').lower() in ('1', 'true', 'on')
+    if incremental and (is_compressed(lv_file.filename) or is_compressed(gc_file.filename)):
+        # A live run is resumed from byte offsets of the growing files
+        return jsonify({'success': False, 'message': 'Live runs need uncompressed (.txt) files.'}), 400
+    streaming = incremental or request.form.get('streaming', '').lower() in ('1', 'true', 'on')
+    if streaming and settings['merge_mode'] != 'nearest':
+        return jsonify({'success': False, 'message': 'Streaming mode only supports the nearest merge mode.'}), 400
+    if streaming and settings['resample_interval']:
+        return jsonify({'success': False, 'message': 'Resampling is not available in streaming mode.'}), 400
+    # Refuse before saving the upload when no job can be accepted
+    if job_queue.pending_job_count() >= job_queue.JOB_MAX_PENDING:
+        return busy_response()
+
+    # Each job gets its own upload folder, so a later upload of the same file name cannot
+    # replace the files of a job that is still waiting
+    job_id = job_queue.new_job_id()
+    job_upload_folder = os.path.join(app.config['UPLOAD_FOLDER'], job_id)
+    lv_filepath = os.path.join(job_upload_folder, secure_filename(lv_file.filename))
+    gc_filepath = os.path.join(job_upload_folder, secure_filename(gc_file.filename))
+    try:
+        os.makedirs(job_upload_folder, exist_ok=True)
+        lv_file.save(lv_filepath)
+        gc_file.save(gc_filepath)
+        print(f"Files saved: {lv_filepath}, {gc_filepath}")
+    except Exception as e:
+        print(f"Error saving files: {e}")
+        remove_upload_folder(job_upload_folder)
+        return jsonify({'success': False, 'message': f'Error saving uploaded files: {e}'}), 500
+
+    # A live run keeps its files: a refresh reads them again
+    job = job_queue.submit_job('process', upload_job(lambda: run_processing(lv_filepath, gc_filepath, settings, gc_stream,
+                                                                            streaming, incremental, job_progress(job_id)),
+                                                     job_upload_folder, keep_on_success=incremental),
+                               job_id=job_id)
+    if job is None:
+        remove_upload_folder(job_upload_folder)
+        return busy_response()
+    return job_accepted_response(job)
+
+def job_accepted_response(job):
+    """202 answer of a route whose work was queued as a job."""
+    return jsonify({'success': True, 'message': 'Processing queued.', 'job': job_summary(job),
+                    'status_url': f"/jobs/{job['id']}", 'events_url': f"/jobs/{job['id']}/events"}), 202
+
+def remove_upload_folder(upload_folder):
+    """Deletes a job's upload folder (uploads/<job id>/) and the files in it."""
+    if os.path.dirname(os.path.abspath(upload_folder)) == os.path.abspath(app.config['UPLOAD_FOLDER']):
+        shutil.rmtree(upload_folder, ignore_errors=True)
+
+def upload_job(work, upload_folder, keep_on_success=False):
+    """
+    Job work (see job_queue.submit_job) running work() and then removing the job's upload folder,
+    unless keep_on_success and the job succeeded.
+    """
+    def run():
+        results = None
         try:
-            lv_file.save(lv_filepath)
-            gc_file.save(gc_filepath)
-            print(f"Files saved: {lv_filepath}, {gc_filepath}")
-        except Exception as e:
-            print(f"Error saving files: {e}")
-            return jsonify({'success': False, 'message': f'Error saving uploaded files: {e}'}), 500
-
-        # --- Data Processing ---
+            results, status_code = work()
+            return results, status_code
+        finally:
+            if not (keep_on_success and results and results.get('success')):
+                remove_upload_folder(upload_folder)
+    return run
+
+def busy_response():
+    """503 answer of a route whose job cannot be queued (JOB_MAX_PENDING jobs queued or running)."""
+    response = jsonify({'success': False, 'busy': True,
+                        'message': f'The server is busy ({job_queue.JOB_MAX_PENDING} jobs queued or running). Please try again in a minute.'})
+    response.status_code = 503
+    response.headers['Retry-After'] = '60'
+    return response
+
+def job_summary(job):
+    """Job status without its results, for responses."""
+    return {key: value for key, value in job.items() if key not in ('results', 'status_code')}
+
+def job_progress(job_id):
+    """
+    Progress callback of a /process job (see main_web_processor.report_progress): records each
+    event with the job, with its paths (finished stage, overall files) as 'static/...' paths.
+    """
+    def progress(phase, message, **details):
+        if details.get('step_report'):
+            details['step_report'] = to_static_paths({'step_reports': [dict(details['step_report'])]})['step_reports'][0]
+        job_queue.add_job_event(job_id, phase, message, **to_static_paths(details))
+    return progress
+
+def run_processing(lv_filepath, gc_filepath, settings, gc_stream, streaming, incremental, progress=None):
+    """
+    Processes one uploaded LV/GC pair (job of /process). Returns (results with 'static/...' paths,
+    HTTP status). progress receives the run's progress events.
+    """
+    report_prefix_text = settings['report_prefix_text']
+    # Call the main processing function from the refactored module
+    # Pass the static reports folder as the base output directory and the prefix
+    if streaming:
+        # Streaming mode: files are read in fixed-size chunks (bounded memory)
+        # Incremental (live run) mode also saves the ingest state for /refresh_report
+        results = streaming_ingest.generate_reports_streaming(
+            lv_filepath,
+            gc_filepath,
+            REPORTS_FOLDER,
+            report_prefix_text=report_prefix_text,
+            stage_rules=settings['stage_rules'],
+            stage_options=settings['stage_options'],
+            chunk_bytes=app.config['STREAMING_CHUNK_BYTES'],
+            incremental=incremental,
+            gc_stream=gc_stream,
+            schema=settings['schema'],
+            progress=progress
+        )
+    else:
+        results = main_web_processor.generate_reports(
+            lv_filepath,
+            gc_filepath,
+            REPORTS_FOLDER,
+            gc_stream=gc_stream,
+            progress=progress,
+            **settings
+        )
+
+    # Determine the actual folder name used (prefix + timestamp or just timestamp)
+    # This is a bit more complex now, need to get it from one of the paths if available
+    # or reconstruct it if no paths were generated but processing was considered successful for the folder creation part.
+    actual_report_folder_name = None
+    if results.get('overall_plot_path'):
+        # Path is like: static/reports/PREFIX_TIMESTAMP/overall_plot.json
+        actual_report_folder_name = os.path.basename(os.path.dirname(results['overall_plot_path']))
+    elif results.get('overall_csv_path'):
+        actual_report_folder_name = os.path.basename(os.path.dirname(results['overall_csv_path']))
+    elif results.get('step_reports') and results['step_reports'][0].get('plot_path'):
+         actual_report_folder_name = os.path.basename(os.path.dirname(os.path.dirname(results['step_reports'][0]['plot_path'])))
+
+    # Adjust paths in results to be relative to static folder root ('static/...' for web access)
+    to_static_paths(results)
+
+    # Add the timestamp prefix to the response
+    if results.get('success'):
+        # The timestamp_prefix in results should now be the actual folder name (prefix_timestamp or just timestamp)
+        if actual_report_folder_name and actual_report_folder_name != 'reports': 
+            results['timestamp_prefix'] = actual_report_folder_name
+        elif report_prefix_text: # if processing made the folder but no files, try to construct it
+            # This is a less ideal fallback, assumes current time if files were not made
+            current_timestamp_for_fallback = datetime.now().strftime("%Y%m%d_%H%M%S")
+            results['timestamp_prefix'] = f"{report_prefix_text}_{current_timestamp_for_fallback}"
+    return results, 200
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    State of a background job: {'success', 'job': {'id', 'state' (queued/running/done/failed),
+    'message', 'queue_position', ...}} plus, once it has finished, 'results' (the processing results).
+    """
+    job = job_queue.job_status(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': f'Unknown or expired job: {job_id}'}), 404
+    response = {'success': True, 'job': job_summary(job)}
+    if job['state'] in ('done', 'failed'):
+        response['results'] = job['results']
+    return jsonify(response)
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """
+    Server-Sent Events stream of a job's progress. Each 'progress' event carries {'id', 'phase'
+    (queued, running, parse_lv, parse_gc, merge, write, stage), 'message', 'elapsed', row counts, ...};
+    'stage' events include the finished stage's step_report, 'write' events the overall plot/data paths.
+    A final 'end' event ({'state', 'message'}) closes the stream; the results are then read from
+    /jobs/<id>. A reconnecting client continues after its Last-Event-ID.
+    """
+    if job_queue.job_status(job_id) is None:
+        return jsonify({'success': False, 'message': f'Unknown or expired job: {job_id}'}), 404
+    try:
+        after = int(request.headers.get('Last-Event-ID') or request.args.get('after') or 0)
+    except ValueError:
+        after = 0
+
+    def stream():
+        for event in job_queue.iter_job_events(job_id, after):
+            if event is None:
+                yield ": keep-alive\n\n" # Comment line; keeps proxies from closing an idle stream
+            elif event['phase'] == 'end':
+                yield f"event: end\ndata: {json.dumps(event)}\n\n"
+            else:
+                yield f"id: {event['id']}\nevent: progress\ndata: {json.dumps(event, default=str)}\n\n"
+
+    response = Response(stream_with_context(stream()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no' # Unbuffered behind nginx
+    return response
+
+# --- Route for Batch Processing (one GC file, several LV files) ---
+@app.route('/process_batch', methods=['POST'])
+def process_batch():
+    """
+    Batch mode for parallel reactors: one GC file (gc_file) and several LV files (lv_files).
+    The GC file is parsed once and each LV file gets its own report, merged with the GC stream
+    of its reactor. Accepts the same optional settings as /process (except streaming and live runs).
+    Queued as a background job like /process: answers 202 with the job, whose results are the batch results.
+    """
+    gc_file = request.files.get('gc_file')
+    lv_files = [f for f in request.files.getlist('lv_files') if f and f.filename]
+    if not gc_file or not gc_file.filename or not lv_files:
+        return jsonify({'success': False, 'message': 'A GC file and at least one LV file (lv_files) are required.'}), 400
+    if not all(allowed_file(f.filename) for f in lv_files + [gc_file]):
+        return jsonify({'success': False, 'message': 'Invalid file type (allowed: .txt, .gz, .zst, .zip)'}), 400
+
+    settings, error = processing_settings_from_form(request.form)
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
+    # Counted against the same limit as /process: a batch is one job producing several reports
+    if job_queue.pending_job_count() >= job_queue.JOB_MAX_PENDING:
+        return busy_response()
+
+    # Own upload folder, as for /process: concurrent uploads with the same file names do not collide
+    job_id = job_queue.new_job_id()
+    batch_upload_folder = os.path.join(app.config['UPLOAD_FOLDER'], job_id)
+    try:
+        os.makedirs(batch_upload_folder, exist_ok=True)
+        gc_filepath = os.path.join(batch_upload_folder, secure_filename(gc_file.filename))
+        gc_file.save(gc_filepath)
+        lv_filepaths = []
+        for lv_file in lv_files:
+            lv_filepaths.append(os.path.join(batch_upload_folder, secure_filename(lv_file.filename)))
+            lv_file.save(lv_filepaths[-1])
+        print(f"Batch files saved: {gc_filepath}, {lv_filepaths}")
+    except Exception as e:
+        print(f"Error saving files: {e}")
+        remove_upload_folder(batch_upload_folder)
+        return jsonify({'success': False, 'message': f'Error saving uploaded files: {e}'}), 500
+
+    job = job_queue.submit_job('process_batch', upload_job(lambda: run_batch_processing(lv_filepaths, gc_filepath, settings),
+                                                           batch_upload_folder),
+                               job_id=job_id)
+    if job is None:
+        remove_upload_folder(batch_upload_folder)
+        return busy_response()
+    return job_accepted_response(job)
+
+def run_batch_processing(lv_filepaths, gc_filepath, settings):
+    """Processes an uploaded batch (job of /process_batch). Returns (batch results with 'static/...' paths, HTTP status)."""
+    batch_results = main_web_processor.generate_reports_batch(lv_filepaths, gc_filepath, REPORTS_FOLDER, **settings)
+    for results in batch_results['reports']:
+        if results.get('overall_csv_path'):
+            results['timestamp_prefix'] = os.path.basename(os.path.dirname(results['overall_csv_path']))
+        to_static_paths(results)
+    return batch_results, 200
+
+# --- Route for Refreshing a Live (Incremental) Report ---
+@app.route('/refresh_report/<report_name>', methods=['POST'])
+def refresh_report(report_name):
+    """
+    Adds the rows appended to the LV/GC files of an incremental report since its last run.
+    Grown copies of the files are uploaded as lv_file/gc_file (a report started from an upload can
+    only be refreshed this way: the server's copy of an upload never grows). Without an upload, the
+    files at the paths recorded in the report are read again from their saved byte offsets.
+    Returns 409 while another refresh of the same report is running.
+    """
+    try:
+        report_name = secure_filename(report_name)
+        report_folder = os.path.join(app.config['REPORTS_FOLDER'], report_name)
+        if not os.path.isdir(report_folder):
+            return jsonify({'success': False, 'message': f'Report folder not found: {report_name}'}), 404
+
+        uploads = {field: request.files.get(field) for field in ('lv_file', 'gc_file')
+                   if request.files.get(field) and request.files.get(field).filename}
+        if not all(allowed_file(uploaded.filename, compressed=False) for uploaded in uploads.values()):
+            return jsonify({'success': False, 'message': 'Invalid file type (live runs need .txt files)'}), 400
+
+        # Held from saving the uploads until the refresh is done, so two refreshes never interleave
+        lock = streaming_ingest.refresh_lock(report_folder)
+        if not lock.acquire(blocking=False):
+            return jsonify({'success': False, 'busy': True,
+                            'message': f'Report {report_name} is already being refreshed. Try again when that refresh is done.'}), 409
         try:
-            # Get the custom report prefix text from the form
-            report_prefix_text = request.form.get('report_prefix_text', '').strip()
-
-            # Call the main processing function from the refactored module
-            # Pass the static reports folder as the base output directory and the prefix
-            results = main_web_processor.generate_reports(
-                lv_filepath,
-                gc_filepath,
-                REPORTS_FOLDER,
-                report_prefix_text=report_prefix_text
+            sources = streaming_ingest.ingest_source_files(report_folder)
+            upload_folder = os.path.abspath(app.config['UPLOAD_FOLDER'])
+            if sources and not uploads and all(path.startswith(upload_folder + os.sep) for path in sources):
+                return jsonify({'success': False, 'message': 'This live run was started from uploaded files, which do not grow '
+                                                            'on the server. Choose the grown LV and/or GC file to upload.'}), 400
+
+            uploaded_paths = {}
+            refresh_upload_folder = os.path.join(app.config['UPLOAD_FOLDER'], job_queue.new_job_id())
+            for field, uploaded in uploads.items():
+                recorded = sources[0 if field == 'lv_file' else 1] if sources else None
+                if recorded and recorded.startswith(upload_folder + os.sep):
+                    # The grown file replaces the server's copy, which the report keeps reading from
+                    uploaded.save(f"{recorded}.tmp")
+                    os.replace(f"{recorded}.tmp", recorded)
+                    uploaded_paths[field] = recorded
+                else:
+                    os.makedirs(refresh_upload_folder, exist_ok=True)
+                    uploaded_paths[field] = os.path.join(refresh_upload_folder, secure_filename(uploaded.filename))
+                    uploaded.save(uploaded_paths[field])
+
+            results = streaming_ingest.refresh_report_incremental(
+                report_folder,
+                lv_file_path=uploaded_paths.get('lv_file'),
+                gc_file_path=uploaded_paths.get('gc_file'),
+                chunk_bytes=app.config['STREAMING_CHUNK_BYTES']
             )
-            
-            # --- Cleanup Uploaded Files (Optional) ---
-            # You might want to keep these for debugging or remove them
-            # try:
-            #     os.remove(lv_filepath)
-            #     os.remove(gc_filepath)
-            #     print(f"Cleaned up uploaded files: {lv_filepath}, {gc_filepath}")
-            # except OSError as e:
-            #     print(f"Error removing uploaded files: {e}")
-            
-            # Adjust paths in results to be relative to static folder root
-            # Ensure the paths start with 'static/' for web access
-            static_folder_name = os.path.basename(app.static_folder) # Usually 'static'
-
-            # Determine the actual folder name used (prefix + timestamp or just timestamp)
-            # This is a bit more complex now, need to get it from one of the paths if available
-            # or reconstruct it if no paths were generated but processing was considered successful for the folder creation part.
-            actual_report_folder_name = None
-            if results.get('overall_plot_path'):
-                # Path is like: static/reports/PREFIX_TIMESTAMP/overall_plot.json
-                actual_report_folder_name = os.path.basename(os.path.dirname(results['overall_plot_path']))
-            elif results.get('overall_csv_path'):
-                actual_report_folder_name = os.path.basename(os.path.dirname(results['overall_csv_path']))
-            elif results.get('step_reports') and results['step_reports'][0].get('plot_path'):
-                 actual_report_folder_name = os.path.basename(os.path.dirname(os.path.dirname(results['step_reports'][0]['plot_path'])))
-            # Fallback if no files generated but folder might exist (e.g. empty data)
-            # This part relies on the fact that generate_reports would have created the folder already
-            # We need to be careful here; the results structure should ideally always give us the folder name
-            # For now, let's assume one of the above conditions will hit if a folder was made for results.
-
-            if results.get('overall_plot_path'):
-                relative_path = os.path.relpath(results['overall_plot_path'], app.static_folder)
-                results['overall_plot_path'] = os.path.join(static_folder_name, relative_path).replace('\\', '/')
-            if results.get('overall_csv_path'):
-                relative_path = os.path.relpath(results['overall_csv_path'], app.static_folder)
-                results['overall_csv_path'] = os.path.join(static_folder_name, relative_path).replace('\\', '/')
-            
-            for step_report in results.get('step_reports', []):
-                if step_report.get('plot_path'):
-                    relative_path = os.path.relpath(step_report['plot_path'], app.static_folder)
-                    step_report['plot_path'] = os.path.join(static_folder_name, relative_path).replace('\\', '/')
-                if step_report.get('csv_path'):
-                    relative_path = os.path.relpath(step_report['csv_path'], app.static_folder)
-                    step_report['csv_path'] = os.path.join(static_folder_name, relative_path).replace('\\', '/')
-                if step_report.get('json_path'):
-                    relative_path = os.path.relpath(step_report['json_path'], app.static_folder)
-                    step_report['json_path'] = os.path.join(static_folder_name, relative_path).replace('\\', '/')
-
-            # Add the timestamp prefix to the response
-            if results.get('success'):
-                # The timestamp_prefix in results should now be the actual folder name (prefix_timestamp or just timestamp)
-                if actual_report_folder_name and actual_report_folder_name != 'reports': 
-                    results['timestamp_prefix'] = actual_report_folder_name
-                elif report_prefix_text: # if processing made the folder but no files, try to construct it
-                    # This is a less ideal fallback, assumes current time if files were not made
-                    current_timestamp_for_fallback = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    results['timestamp_prefix'] = f"{report_prefix_text}_{current_timestamp_for_fallback}"
-                # else: # if no prefix and no files, the original logic for timestamp_prefix might need to be re-evaluated
-                    # For now, if actual_report_folder_name is None, timestamp_prefix might remain None or an old value
-
-            return jsonify(results)
-
-        except Exception as e:
-            print(f"Error during main processing: {e}")
-            import traceback
-            traceback.print_exc() # Print detailed error to Flask console
-            return jsonify({'success': False, 'message': f'Processing failed: {e}'}), 500
-    else:
-        return jsonify({'success': False, 'message': 'Invalid file type'}), 400
+        finally:
+            lock.release()
+        to_static_paths(results)
+        results['timestamp_prefix'] = report_name
+        return jsonify(results), (200 if results.get('success') else 409 if results.get('busy') else 400)
+
+    except Exception as e:
+        print(f"Error refreshing report {report_name}: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'success': False, 'message': f'Error refreshing report: {e}'}), 500
 
 # --- New Route for Downloading Selected Stages --- 
 @app.route('/download_selected_stages', methods=['POST'])
 def download_selected_stages():
     """ 
-    Receives a list of JSON file paths for selected stages, 
-    reads them, combines the data, and sends back a combined CSV file.
+    Receives a list of stage data paths (step_N_data.json names; the Parquet file is read when
+    there is one), combines the data, and sends back a combined CSV file.
     """
     try:
         data = request.get_json()
@@ -180,17 +516,16 @@ def download_selected_stages():
                  print(f"Warning: Access denied for path outside allowed directory: {rel_path}")
                  continue # Skip potentially malicious paths
             
-            if os.path.exists(abs_path):
+            if find_report_data(abs_path):
                 try:
-                    # Read JSON into DataFrame
-                    # orient='records' matches how we saved it in main_web_processor
-                    df_step = pd.read_json(abs_path, orient='records') 
+                    # Parquet store, or the JSON file of an older report
+                    df_step = read_report_frame(abs_path)
                     dfs_to_combine.append(df_step)
                 except Exception as e:
-                    print(f"Error reading or processing JSON file {abs_path}: {e}")
+                    print(f"Error reading stage data {abs_path}: {e}")
                     # Optionally inform the user about specific file errors
             else:
-                print(f"Warning: JSON file not found: {abs_path}")
+                print(f"Warning: Stage data not found: {abs_path}")
 
         if not dfs_to_combine:
             return jsonify({'success': False, 'message': 'No valid stage data found for selected paths.'}), 404
@@ -223,25 +558,89 @@ def download_selected_stages():
         return jsonify({'success': False, 'message': f'Error creating combined CSV: {e}'}), 500
 
 # --- Route to serve generated static files (reports) ---
-# This is handled implicitly by Flask if files are in the 'static' folder.
-# If your reports were outside 'static', you'd need a route like this:
-# @app.route('/reports/<path:filename>')
-# def serve_report(filename):
-#     return send_from_directory(REPORTS_FOLDER_ABSOLUTE, filename)
+# Report files are served like other static files. Stage and overall data are stored as Parquet;
+# their CSV/JSON download names (csv_path/json_path in the results) do not exist on disk and are
+# produced from the Parquet file here when requested, streamed one row group at a time.
+@app.route('/static/reports/<path:filename>')
+def serve_report_file(filename):
+    reports_folder = os.path.abspath(app.config['REPORTS_FOLDER'])
+    full_path = os.path.abspath(os.path.join(reports_folder, filename))
+    if not full_path.startswith(reports_folder + os.sep):
+        return jsonify({'success': False, 'message': 'Invalid file path.'}), 403
+    if os.path.basename(full_path) in PRIVATE_REPORT_FILES:
+        return jsonify({'success': False, 'message': f'File not found: {filename}'}), 404
+    if os.path.isfile(full_path):
+        return send_from_directory(reports_folder, filename)
+    # Stage plots are generated from the stored stage data the first time they are requested
+    if main_web_processor.ensure_step_plot(full_path):
+        return send_from_directory(reports_folder, filename)
+
+    export_format = os.path.splitext(filename)[1].lower().lstrip('.')
+    if export_format not in EXPORT_FORMATS or not find_report_data(full_path):
+        return jsonify({'success': False, 'message': f'File not found: {filename}'}), 404
+    response = Response(stream_with_context(iter_export_report_frame(full_path, export_format)),
+                        mimetype='text/csv' if export_format == 'csv' else 'application/json')
+    response.headers['Content-Disposition'] = f'attachment; filename={os.path.basename(filename)}'
+    return response
+
+@app.route('/plot_window', methods=['GET'])
+def plot_window():
+    """
+    Data of a zoomed time window of a plot drawn from a coarse pyramid level (plot_pyramid.py).
+    Query: plot (path of the plot JSON, as in the results), start, end (x-axis range).
+    Returns {'x': dates, 'y': [values per trace], 'level': 'full' or the pyramid level, 'rows'}.
+    """
+    plot_path = request.args.get('plot', '')
+    start = request.args.get('start')
+    end = request.args.get('end')
+    if not plot_path or not start or not end:
+        return jsonify({'success': False, 'message': 'Missing plot path or window range.'}), 400
+
+    reports_folder = os.path.abspath(app.config['REPORTS_FOLDER'])
+    relative_path = plot_path.lstrip('/').removeprefix('static/reports/')
+    full_path = os.path.abspath(os.path.join(reports_folder, relative_path))
+    if not full_path.startswith(reports_folder + os.sep):
+        return jsonify({'success': False, 'message': 'Invalid plot path.'}), 403
+    if not os.path.isfile(full_path):
+        return jsonify({'success': False, 'message': f'Plot not found: {plot_path}'}), 404
+
+    try:
+        with open(full_path, 'r') as f:
+            zoom = json.load(f).get('zoom')
+        if not zoom:
+            return jsonify({'success': False, 'message': 'This plot holds all of its data; no window data is stored.'}), 404
+        window, level = read_plot_window(os.path.dirname(full_path), zoom, pd.Timestamp(start), pd.Timestamp(end))
+        return jsonify({'success': True, 'level': level, 'rows': len(window), **window_to_traces(window, zoom)})
+    except (ValueError, TypeError) as e:
+        return jsonify({'success': False, 'message': f'Invalid window range: {e}'}), 400
+    except Exception as e:
+        print(f"Error reading plot window of {plot_path}: {e}")
+        return jsonify({'success': False, 'message': f'Error reading plot window: {str(e)}'}), 500
 
 # --- New Routes for Loading Previous Reports ---
 
 @app.route('/list_reports', methods=['GET'])
 def list_reports():
-    """Lists the available timestamped report folders."""
+    """
+    Lists the report folders, one page at a time, from the report catalog (report_catalog.py).
+    Query parameters (all optional): prefix (name starts with), from/to (creation date or time),
+    sort ('name' or 'created'), order ('desc', the default, or 'asc'), limit (reports per page) and
+    cursor (the next_cursor of the previous page; null on the last page).
+    """
     try:
-        reports_base = app.config['REPORTS_FOLDER']
-        # List only directories directly under the reports folder
-        all_items = os.listdir(reports_base)
-        report_folders = [d for d in all_items if os.path.isdir(os.path.join(reports_base, d))]
-        # Simple sorting, assumes YYYYMMDD_HHMMSS format
-        report_folders.sort(reverse=True) 
-        return jsonify({'success': True, 'reports': report_folders})
+        args = request.args
+        order = args.get('order', 'desc')
+        if order not in ('asc', 'desc'):
+            return jsonify({'success': False, 'message': f"Unknown order '{order}'. Use 'asc' or 'desc'."}), 400
+        reports, next_cursor = list_catalog_reports(
+            app.config['REPORTS_FOLDER'], prefix=args.get('prefix') or None,
+            created_from=parse_catalog_date(args['from']) if args.get('from') else None,
+            created_to=parse_catalog_date(args['to'], end=True) if args.get('to') else None,
+            sort=args.get('sort', 'name'), descending=order == 'desc', limit=args.get('limit'), cursor=args.get('cursor'))
+        return jsonify({'success': True, 'reports': [report['name'] for report in reports], 'report_details': reports,
+                        'next_cursor': next_cursor})
+    except ValueError as e:
+        return jsonify({'success': False, 'message': f'Invalid report listing request: {e}'}), 400
     except Exception as e:
         print(f"Error listing reports: {e}")
         return jsonify({'success': False, 'message': f'Error listing reports: {e}'}), 500
@@ -256,63 +655,8 @@ def load_report(timestamp):
         if not os.path.isdir(report_folder_abs):
             return jsonify({'success': False, 'message': f'Report folder not found: {timestamp}'}), 404
 
-        results = {
-            'success': True,
-            'timestamp_prefix': timestamp,
-            'overall_plot_path': None,
-            'overall_csv_path': None,
-            'step_reports': [],
-            'num_stages': 0
-        }
-
-        # Find overall files
-        # Paths should start with 'static/' for web access
-        static_folder_name = os.path.basename(app.static_folder) # Usually 'static'
-
-        overall_plot_file_rel_to_static = os.path.join(report_folder_rel, 'overall_plot.json')
-        overall_csv_file_rel_to_static = os.path.join(report_folder_rel, 'overall_merged_data.csv')
-        
-        if os.path.exists(os.path.join(app.static_folder, overall_plot_file_rel_to_static)):
-            results['overall_plot_path'] = os.path.join(static_folder_name, overall_plot_file_rel_to_static).replace('\\', '/')
-        if os.path.exists(os.path.join(app.static_folder, overall_csv_file_rel_to_static)):
-            results['overall_csv_path'] = os.path.join(static_folder_name, overall_csv_file_rel_to_static).replace('\\', '/')
-
-        # Find step folders and files
-        step_folders = sorted(
-            glob.glob(os.path.join(report_folder_abs, 'step_*')),
-            key=lambda x: int(os.path.basename(x).split('_')[1]) # Sort by step number
-        )
-        
-        for step_folder_abs in step_folders:
-            step_name = os.path.basename(step_folder_abs)
-            try:
-                step_num = int(step_name.split('_')[1])
-            except (IndexError, ValueError):
-                print(f"Warning: Could not parse step number from folder: {step_name}")
-                continue
-                
-            step_folder_rel = os.path.join(report_folder_rel, step_name)
-            step_report = {
-                'step_number': step_num,
-                'plot_path': None,
-                'csv_path': None,
-                'json_path': None
-            }
-
-            plot_file_rel_to_static = os.path.join(step_folder_rel, f'step_{step_num}_plot.json')
-            csv_file_rel_to_static = os.path.join(step_folder_rel, f'step_{step_num}_data.csv')
-            json_file_rel_to_static = os.path.join(step_folder_rel, f'step_{step_num}_data.json')
-            
-            if os.path.exists(os.path.join(app.static_folder, plot_file_rel_to_static)):
-                step_report['plot_path'] = os.path.join(static_folder_name, plot_file_rel_to_static).replace('\\', '/')
-            if os.path.exists(os.path.join(app.static_folder, csv_file_rel_to_static)):
-                step_report['csv_path'] = os.path.join(static_folder_name, csv_file_rel_to_static).replace('\\', '/')
-            if os.path.exists(os.path.join(app.static_folder, json_file_rel_to_static)):
-                step_report['json_path'] = os.path.join(static_folder_name, json_file_rel_to_static).replace('\\', '/')
-                
-            results['step_reports'].append(step_report)
-
-        results['num_stages'] = len(results['step_reports'])
+        results = to_static_paths(collect_report_results(report_folder_abs))
+        results['timestamp_prefix'] = timestamp
         results['message'] = f"Loaded report data for {timestamp}."
 
         return jsonify(results)
@@ -341,14 +685,15 @@ def compare_stages():
         if not os.path.isdir(report_folder_abs):
              return jsonify({'success': False, 'message': f'Report folder not found: {timestamp}'}), 404
 
-        # Find the JSON data files for the selected stages
+        # Find the data files (Parquet, or JSON of older reports) for the selected stages, from the report's manifest
+        stage_data = {str(report['step_number']): report['data_path']
+                      for report in collect_report_results(report_folder_abs)['step_reports']}
         stage_data_paths = []
         for stage_num in stage_numbers:
-            json_file = os.path.join(report_folder_abs, f'step_{stage_num}', f'step_{stage_num}_data.json')
-            if os.path.exists(json_file):
-                stage_data_paths.append(json_file)
+            if stage_data.get(str(stage_num)):
+                stage_data_paths.append(stage_data[str(stage_num)])
             else:
-                print(f"Warning: Data file not found for stage {stage_num} in report {timestamp}: {json_file}")
+                print(f"Warning: Data file not found for stage {stage_num} in report {timestamp}")
                 # Decide if you want to fail or just proceed with available data
                 # return jsonify({'success': False, 'message': f'Data file missing for stage {stage_num}'}), 404
         
@@ -387,8 +732,8 @@ def list_comparison_plots_in_folder(timestamp):
 
         comparison_plot_files = []
         for filename in os.listdir(report_folder_abs):
-            # Updated condition to correctly identify comparison plots with optional prefixes
-            if '_stages_comparison_plot_' in filename and filename.endswith('.json'):
+            # Comparison plots with or without a prefix
+            if COMPARISON_PLOT_MARKER in filename and filename.endswith('.json'):
                 # Store path relative to the specific timestamp's folder for easier reconstruction later
                 # e.g., comparison_plots/stages_comparison_plot_XYZ.json
                 relative_path_in_timestamp_folder = os.path.join('comparison_plots', filename)
@@ -503,37 +848,30 @@ def download_cross_comparison_csv_data():
 # --- New Endpoint to List All Comparison Plots ---
 @app.route('/list_all_comparison_plots', methods=['GET'])
 def list_all_comparison_plots():
-    """Lists all available comparison plots from all report folders for cross-comparison."""
+    """
+    Lists the comparison plots of all report folders for cross-comparison, one page at a time, from the
+    report catalog. Query parameters (optional): report_prefix, limit and cursor (see /list_reports).
+    """
     try:
         reports_folder_abs = app.config['REPORTS_FOLDER']
         if not os.path.isdir(reports_folder_abs):
             return jsonify({'success': False, 'message': 'Reports folder not found.'}), 404
 
-        all_comparison_plots = []
-        
-        # Get all report folders
-        report_folders = [d for d in os.listdir(reports_folder_abs) 
-                         if os.path.isdir(os.path.join(reports_folder_abs, d)) and d != 'cross_comparisons']
-        
-        # Check each report folder for comparison_plots
-        for report_folder in report_folders:
-            comparison_plots_dir = os.path.join(reports_folder_abs, report_folder, 'comparison_plots')
-            if os.path.isdir(comparison_plots_dir):
-                for filename in os.listdir(comparison_plots_dir):
-                    if '_stages_comparison_plot_' in filename and filename.endswith('.json'):
-                        # Store relative path from static folder for frontend use
-                        static_folder_name = os.path.basename(app.static_folder)
-                        rel_path = os.path.join(static_folder_name, 'reports', report_folder, 'comparison_plots', filename)
-                        rel_path = rel_path.replace('\\', '/')
-                        
-                        all_comparison_plots.append({
-                            'name': filename,
-                            'report_folder': report_folder,
-                            'path': rel_path,
-                            'display_name': f"{report_folder} - {filename}"
-                        })
-        
-        return jsonify({'success': True, 'comparison_plots': all_comparison_plots})
+        plots, next_cursor = list_catalog_comparison_plots(reports_folder_abs, report_prefix=request.args.get('report_prefix') or None,
+                                                           limit=request.args.get('limit'), cursor=request.args.get('cursor'))
+        # Paths relative to the static folder's parent, for frontend use
+        static_folder_name = os.path.basename(app.static_folder)
+        all_comparison_plots = [{
+            'name': plot['name'],
+            'report_folder': plot['report'],
+            'path': '/'.join([static_folder_name, 'reports', plot['report'], 'comparison_plots', plot['name']]),
+            'display_name': f"{plot['report']} - {plot['name']}",
+            'created': plot['created']
+        } for plot in plots]
+
+        return jsonify({'success': True, 'comparison_plots': all_comparison_plots, 'next_cursor': next_cursor})
+    except ValueError as e:
+        return jsonify({'success': False, 'message': f'Invalid comparison plot listing request: {e}'}), 400
     except Exception as e:
         print(f"Error listing all comparison plots: {e}")
         import traceback
@@ -569,6 +907,7 @@ def rename_report():
         
         # Rename the folder
         os.rename(old_path, new_path)
+        rename_catalog_report(app.config['REPORTS_FOLDER'], old_name, new_name)
         
         return jsonify({'success': True, 'message': f'Report renamed from {old_name} to {new_name}'})
     
@@ -598,8 +937,8 @@ def delete_report():
             return jsonify({'success': False, 'message': f'Report folder not found: {report_name}'}), 404
         
         # Use shutil.rmtree to remove the directory and all its contents
-        import shutil
         shutil.rmtree(report_path)
+        remove_catalog_report(app.config['REPORTS_FOLDER'], report_name)
         
         return jsonify({'success': True, 'message': f'Report {report_name} deleted successfully'})
     
@@ -626,6 +965,8 @@ def list_report_contents(report_name):
         def get_directory_structure(dir_path, base_path):
             items = []
             for item in os.listdir(dir_path):
+                if item in PRIVATE_REPORT_FILES:
+                    continue
                 item_path = os.path.join(dir_path, item)
                 # Get relative path for frontend use
                 rel_path = os.path.relpath(item_path, base_path)
@@ -696,12 +1037,22 @@ def get_file_content():
             return jsonify({'success': False, 'message': 'Invalid file path.'}), 403
         
         # Check if file exists
-        if not os.path.isfile(full_path):
+        if not os.path.isfile(full_path) or os.path.basename(full_path) in PRIVATE_REPORT_FILES:
             return jsonify({'success': False, 'message': f'File not found: {file_path}'}), 404
         
         # Determine file type
         file_extension = os.path.splitext(file_path)[1].lower()
         
+        # Stored data (Parquet) is shown as CSV text, first rows only
+        if file_extension == '.parquet':
+            preview_df = read_report_frame_head(full_path, FILE_PREVIEW_ROWS)
+            return jsonify({
+                'success': True,
+                'is_binary': False,
+                'file_path': file_path,
+                'content': preview_df.to_csv(index=False)
+            })
+
         # Check if it's a binary file
         binary_extensions = ['.png', '.jpg', '.jpeg', '.gif', '.pdf']
         if file_extension in binary_extensions:
@@ -766,6 +1117,9 @@ def delete_report_file():
         
         # Delete the file
         os.remove(full_path)
+        if os.path.basename(full_path) != REPORT_MANIFEST_FILE:
+            refresh_report_manifest(report_folder) # Keep the manifest in line with the files
+        catalog_report(report_folder)
         
         return jsonify({
             'success': True,
@@ -0,0 +1,78 @@
+# --- Column Schema Registry ---
+# A schema maps the header variants written by a given instrument setup to the canonical
+# column names used by processing and plotting (the *_COL names in main_web_processor).
+# It also decides which columns are read at all:
+#   keep_all_columns=True  - every column is read and written to the report CSV/JSON (original behaviour)
+#   keep_all_columns=False - only the mapped columns are read (projected read), which is faster
+#                            and keeps far less in memory; outputs then hold just those columns.
+
+COLUMN_SCHEMAS = {
+    'skid_nh3': {
+        'description': 'Skid NH3 synthesis LV log and GC export; all columns kept in the outputs.',
+        'keep_all_columns': True,
+        # canonical name: accepted header variants, in order of preference
+        'lv_columns': {
+            'RelativeTime': ['RelativeTime'],
+            'T Heater 1': ['T Heater 1', 'T Heater UP'],
+            'Pressure setpoint': ['Pressure setpoint'],
+            'H2 Actual Flow': ['H2 Actual Flow'],
+            'N2 Actual Flow': ['N2 Actual Flow'],
+            'N2 poisoning set-point': ['N2 poisoning set-point'],
+            'H2 Set-Point': ['H2 Set-Point'], # Used by the setpoint_change stage rule
+        },
+        'gc_columns': {
+            'NH3': ['NH3'],
+            'Sample name': ['Sample name'],
+        },
+    },
+}
+
+# Same mapping, reading only the columns the plots and stage detection need
+COLUMN_SCHEMAS['skid_nh3_compact'] = dict(
+    COLUMN_SCHEMAS['skid_nh3'],
+    description='Skid NH3 synthesis; reads only the plotted and stage-detection columns (smaller, faster).',
+    keep_all_columns=False,
+)
+
+DEFAULT_SCHEMA = 'skid_nh3'
+LV_DATETIME_COLUMN = 'DateTime'
+GC_DATETIME_COLUMN = 'Date'
+
+
+def get_schema(schema=None):
+    """Returns a schema dict. schema may be a registry name, a schema dict or None (DEFAULT_SCHEMA)."""
+    if isinstance(schema, dict):
+        return schema
+    name = schema or DEFAULT_SCHEMA
+    if name not in COLUMN_SCHEMAS:
+        raise ValueError(f"Unknown column schema '{name}'. Available: {list(COLUMN_SCHEMAS)}")
+    return COLUMN_SCHEMAS[name]
+
+
+def schema_usecols(schema, kind):
+    """
+    Header names to read for kind 'lv' or 'gc' (every variant plus the date column),
+    or None when the schema keeps all columns. Names missing from a file are skipped by the parsers.
+    """
+    schema = get_schema(schema)
+    if schema['keep_all_columns']:
+        return None
+    date_column = LV_DATETIME_COLUMN if kind == 'lv' else GC_DATETIME_COLUMN
+    return [date_column] + [variant for variants in schema[f"{kind}_columns"].values() for variant in variants]
+
+
+def canonical_renames(schema, kind, columns):
+    """
+    {header name: canonical name} for the columns of a parsed frame. A canonical column already
+    present is kept as is; otherwise its first variant found is renamed to it.
+    """
+    schema = get_schema(schema)
+    renames = {}
+    for canonical, variants in schema[f"{kind}_columns"].items():
+        if canonical in columns:
+            continue
+        for variant in variants:
+            if variant in columns:
+                renames[variant] = canonical
+                break
+    return renames
@@ -0,0 +1,371 @@
+import numpy as np
+import pandas as pd
+import io
+import os
+import gzip
+import time
+import zipfile
+
+# --- Parser Layer for LV and GC Files ---
+# The fast path sniffs the header/metadata lines, then reads the body with the C (or pyarrow)
+# engine using an explicit dtype map and the known datetime formats.
+# The legacy python-engine path is only used when sniffing or the fast read fails.
+# Compressed files (.gz, .zst, .zip) are decompressed as a stream while they are read;
+# no inflated copy is written to disk.
+
+LV_DATETIME_FORMAT = '%d/%m/%y %H:%M:%S'
+GC_DATETIME_FORMAT = '%d.%m.%Y %H:%M:%S'
+LV_METADATA_LINES = 2 # 'Data' and 'Experiment' lines before the header
+LV_TEXT_COLUMNS = ['DateTime']
+GC_TEXT_COLUMNS = ['Date', 'File', 'Sample name']
+# Peak areas are whole numbers; see restore_integer_columns
+GC_INTEGER_COLUMNS = ['Area', 'H2', 'Area           _2', 'Area           _4']
+DEFAULT_CHUNK_BYTES = 8 * 1024 * 1024 # Size of the blocks read by the chunked (streaming) readers
+
+try:
+    import pyarrow as pa # Optional: faster CSV engine and datetime parsing
+    import pyarrow.compute as pc
+    FAST_ENGINES = ['pyarrow', 'c']
+except ImportError:
+    pa = None
+    FAST_ENGINES = ['c']
+
+try:
+    import zstandard # Optional: needed for .zst files only
+except ImportError:
+    zstandard = None
+
+COMPRESSED_EXTENSIONS = ('.gz', '.zst', '.zip')
+
+
+def is_compressed(filename):
+    """True if filename is a path with a compressed extension (see COMPRESSED_EXTENSIONS)."""
+    return isinstance(filename, str) and filename.lower().endswith(COMPRESSED_EXTENSIONS)
+
+
+def open_source(filename):
+    """
+    Opens an LV/GC file for binary reading. Compressed files are decompressed on the fly;
+    a .zip archive must contain exactly one file.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.gz':
+        return gzip.open(filename, 'rb')
+    if extension == '.zst':
+        if zstandard is None:
+            raise ValueError("Reading .zst files needs the 'zstandard' package (pip install zstandard).")
+        # Buffered so that readline/readlines work on the decompressed stream
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(filename, 'rb'), closefd=True))
+    if extension == '.zip':
+        with zipfile.ZipFile(filename) as archive:
+            members = [info for info in archive.infolist() if not info.is_dir()]
+            if len(members) != 1:
+                raise ValueError(f"A .zip upload must contain exactly one file, found {len(members)}: {filename}")
+            return archive.open(members[0]) # Stays readable after the archive object is closed
+    return open(filename, 'rb')
+
+
+def _read_lines(filename, count):
+    """Returns the first `count` lines (decoded, without line endings) and the byte offset after them."""
+    lines = []
+    offset = 0
+    with open_source(filename) as f:
+        for _ in range(count):
+            line = f.readline()
+            if not line:
+                break
+            offset += len(line)
+            lines.append(line.decode('utf-8', errors='replace').rstrip('\r\n'))
+    return lines, offset
+
+
+def _unique_column_names(raw_names):
+    """Strips header names and de-duplicates them the way pandas does ('NA', 'NA.1', ...)."""
+    names = []
+    seen = {}
+    for i, raw in enumerate(raw_names):
+        name = raw.strip() or f"Unnamed: {i}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def sniff_lv_layout(filename):
+    """
+    Reads the two metadata lines, the header and the units row of an LV file.
+    Returns a layout dict (columns, units, metadata, skiprows) or None if the file
+    does not look like a standard LV export.
+    """
+    lines, data_offset = _read_lines(filename, LV_METADATA_LINES + 2)
+    if len(lines) < LV_METADATA_LINES + 2:
+        return None
+    header_fields = lines[LV_METADATA_LINES].split('\t')
+    unit_fields = lines[LV_METADATA_LINES + 1].split('\t')
+    # Drop the empty field produced by a trailing tab on the header/units rows
+    while header_fields and not header_fields[-1].strip():
+        header_fields.pop()
+    stripped = [field.strip() for field in header_fields]
+    if 'DateTime' not in stripped or 'RelativeTime' not in stripped:
+        return None
+    if len(unit_fields) < len(header_fields):
+        return None
+
+    columns = _unique_column_names(header_fields)
+    metadata = {}
+    for line in lines[:LV_METADATA_LINES]:
+        key, _, value = line.partition('\t')
+        metadata[key.strip()] = value.strip()
+    return {
+        'columns': columns,
+        'units': dict(zip(columns, [unit.strip() for unit in unit_fields])),
+        'metadata': metadata,
+        'skiprows': LV_METADATA_LINES + 2,
+        'data_offset': data_offset, # Byte offset of the first data row
+    }
+
+
+def sniff_gc_layout(filename):
+    """Reads the header line of a GC file. Returns a layout dict or None if it is not recognised."""
+    lines, data_offset = _read_lines(filename, 1)
+    if not lines:
+        return None
+    header_fields = lines[0].split('\t')
+    while header_fields and not header_fields[-1].strip():
+        header_fields.pop()
+    if 'Date' not in [field.strip() for field in header_fields]:
+        return None
+    return {
+        'columns': _unique_column_names(header_fields),
+        'skiprows': 1,
+        'data_offset': data_offset,
+    }
+
+
+def _dtype_map(columns, text_columns):
+    return {col: (str if col in text_columns else 'float64') for col in columns}
+
+
+def restore_integer_columns(df, columns):
+    """
+    Converts the listed columns (read as float64) whose values are all whole numbers to nullable
+    Int64, so they are written as '9', not '9.0', and stay integers where a merge leaves rows
+    without a match. The result does not depend on how a file is split into chunks.
+    """
+    for col in columns:
+        if col in df.columns and pd.api.types.is_numeric_dtype(df[col]):
+            values = df[col].to_numpy(dtype='float64', na_value=np.nan)
+            if np.all(np.isnan(values) | (values == np.round(values))):
+                df[col] = df[col].astype('Int64')
+    return df
+
+
+def parse_datetimes(values, fmt):
+    """Parses a string Series with an explicit format; unparseable values become NaT."""
+    if pa is not None:
+        try:
+            parsed = pc.strptime(pa.array(values.to_numpy(dtype=object, na_value=None), type=pa.string()),
+                                 format=fmt, unit='s', error_is_null=True)
+            return pd.Series(parsed.to_pandas(), index=values.index, name=values.name).astype('datetime64[ns]')
+        except Exception as e:
+            print(f"pyarrow datetime parsing failed ({e}), using pandas.")
+    return pd.to_datetime(values, format=fmt, errors='coerce').astype('datetime64[ns]')
+
+
+def _usecols_positions(columns, usecols=None):
+    """Positions of the columns to read (all of them if usecols is None); unknown names are ignored."""
+    if usecols is None:
+        return list(range(len(columns)))
+    wanted = set(usecols)
+    return [i for i, col in enumerate(columns) if col in wanted]
+
+
+def _read_body(filename, layout, text_columns, engine, skiprows=None, usecols=None):
+    columns = layout['columns']
+    # Projected read by position: both the C and pyarrow engines skip the other fields
+    positions = _usecols_positions(columns, usecols)
+    names = [columns[i] for i in positions]
+    if is_compressed(filename):
+        with open_source(filename) as f:
+            return _read_body(f, layout, text_columns, engine, skiprows, usecols)
+    return pd.read_csv(filename, sep='\t', header=None,
+                       skiprows=layout['skiprows'] if skiprows is None else skiprows,
+                       names=names, usecols=positions,
+                       dtype=_dtype_map(names, text_columns), engine=engine)
+
+
+def _read_fast(filename, layout, text_columns, label, engines=None, usecols=None):
+    """Tries each fast engine in turn. Returns (df, engine) or (None, None)."""
+    if layout is None:
+        print(f"Could not sniff {label} file layout, using legacy parser.")
+        return None, None
+    for engine in engines or FAST_ENGINES:
+        try:
+            return _read_body(filename, layout, text_columns, engine, usecols=usecols), engine
+        except Exception as e:
+            print(f"Fast {label} parse with '{engine}' engine failed ({e}).")
+    return None, None
+
+
+def _record_timing(timings, key, parser, started, df):
+    elapsed = time.perf_counter() - started
+    print(f"Parsed {key.upper()} file with {parser} parser: {len(df)} rows in {elapsed:.3f}s")
+    if timings is not None:
+        timings[key] = {'parser': parser, 'seconds': round(elapsed, 4), 'rows': int(len(df))}
+
+
+# --- Legacy (python engine) readers, kept as fallback ---
+def _project_legacy(df, usecols):
+    if usecols is None:
+        return df
+    wanted = set(usecols) | {'Date'}
+    return df[[col for col in df.columns if col in wanted]]
+
+
+def read_lv_legacy(filename, usecols=None):
+    # pandas infers the compression of .gz/.zst/.zip paths
+    df = pd.read_csv(filename, sep='\t', skiprows=2, engine='python', header=None)
+    df.columns = df.iloc[0]
+    df = df.iloc[2:].reset_index(drop=True)
+    df.columns = df.columns.str.strip()
+    df['Date'] = pd.to_datetime(df['DateTime'], errors='coerce', dayfirst=True)
+    if 'DateTime' in df.columns:
+        df = df.drop(columns=['DateTime'])
+    return _project_legacy(df, usecols)
+
+
+def read_gc_legacy(filename, usecols=None):
+    df = pd.read_csv(filename, sep='\t', engine='python')
+    df.columns = df.columns.str.strip()
+    df['Date'] = pd.to_datetime(df['Date'], errors='coerce', dayfirst=True)
+    return _project_legacy(df, usecols)
+
+
+# --- Public readers ---
+def read_lv_table(filename, timings=None, engines=None, usecols=None):
+    """
+    Reads an LV file into a DataFrame with a parsed 'Date' column (the 'DateTime' column is dropped).
+    Rows whose date cannot be parsed get NaT. Parser name and time are stored in timings['lv'].
+    usecols (header names, must include 'DateTime') restricts the columns read; names not in the file are ignored.
+    """
+    started = time.perf_counter()
+    df, engine = _read_fast(filename, sniff_lv_layout(filename), LV_TEXT_COLUMNS, 'LV', engines, usecols)
+    if df is None:
+        df = read_lv_legacy(filename, usecols)
+        _record_timing(timings, 'lv', 'legacy', started, df)
+        return df
+    df['Date'] = parse_datetimes(df.pop('DateTime'), LV_DATETIME_FORMAT)
+    _record_timing(timings, 'lv', engine, started, df)
+    return df
+
+
+def read_gc_table(filename, timings=None, engines=None, usecols=None):
+    """
+    Reads a GC file into a DataFrame with a parsed 'Date' column.
+    Parser name and time are stored in timings['gc'].
+    usecols (header names, must include 'Date') restricts the columns read.
+    """
+    started = time.perf_counter()
+    df, engine = _read_fast(filename, sniff_gc_layout(filename), GC_TEXT_COLUMNS, 'GC', engines, usecols)
+    if df is None:
+        df = restore_integer_columns(read_gc_legacy(filename, usecols), GC_INTEGER_COLUMNS)
+        _record_timing(timings, 'gc', 'legacy', started, df)
+        return df
+    df['Date'] = parse_datetimes(df['Date'], GC_DATETIME_FORMAT)
+    restore_integer_columns(df, GC_INTEGER_COLUMNS)
+    _record_timing(timings, 'gc', engine, started, df)
+    return df
+
+
+# --- Chunked readers (bounded memory, resumable from a byte offset) ---
+def iter_line_blocks(filename, start_offset=0, chunk_bytes=DEFAULT_CHUNK_BYTES, complete_lines_only=False):
+    """
+    Yields (block, end_offset) pairs of raw bytes made of whole lines, each roughly chunk_bytes long.
+    With complete_lines_only=True a trailing line without a newline (a file still being
+    written) is not returned, so reading can resume from the last end_offset later.
+    Offsets of compressed files count decompressed bytes.
+    """
+    with open_source(filename) as f:
+        if is_compressed(filename):
+            # Decompressed streams cannot all seek; skip forward by reading
+            remaining = start_offset
+            while remaining > 0:
+                skipped = len(f.read(min(remaining, chunk_bytes)))
+                if not skipped:
+                    break
+                remaining -= skipped
+        else:
+            f.seek(start_offset)
+        offset = start_offset
+        while True:
+            lines = f.readlines(chunk_bytes)
+            if not lines:
+                break
+            partial = complete_lines_only and not lines[-1].endswith(b'\n')
+            if partial:
+                lines.pop()
+            block = b''.join(lines)
+            if block:
+                offset += len(block)
+                yield block, offset
+            if partial:
+                break
+
+
+def _iter_chunks(filename, layout, text_columns, label, start_offset, chunk_bytes, complete_lines_only, usecols=None):
+    if layout is None:
+        raise ValueError(f"Chunked reading needs a standard {label} file layout, but it could not be sniffed: {filename}")
+    if start_offset is None:
+        start_offset = layout['data_offset']
+    for block, end_offset in iter_line_blocks(filename, start_offset, chunk_bytes, complete_lines_only):
+        df = _read_body(io.BytesIO(block), layout, text_columns, 'c', skiprows=0, usecols=usecols)
+        yield df, end_offset
+
+
+def iter_lv_chunks(filename, layout=None, start_offset=None, chunk_bytes=DEFAULT_CHUNK_BYTES, complete_lines_only=False,
+                   usecols=None):
+    """
+    Reads an LV file block by block. Yields (df, end_offset) with the same columns as read_lv_table.
+    start_offset defaults to the first data row; layout defaults to sniff_lv_layout(filename).
+    """
+    layout = layout or sniff_lv_layout(filename)
+    for df, end_offset in _iter_chunks(filename, layout, LV_TEXT_COLUMNS, 'LV', start_offset, chunk_bytes, complete_lines_only, usecols):
+        df['Date'] = parse_datetimes(df.pop('DateTime'), LV_DATETIME_FORMAT)
+        yield df, end_offset
+
+
+def iter_gc_chunks(filename, layout=None, start_offset=None, chunk_bytes=DEFAULT_CHUNK_BYTES, complete_lines_only=False,
+                   usecols=None):
+    """Reads a GC file block by block. Yields (df, end_offset) with the same columns as read_gc_table."""
+    layout = layout or sniff_gc_layout(filename)
+    for df, end_offset in _iter_chunks(filename, layout, GC_TEXT_COLUMNS, 'GC', start_offset, chunk_bytes, complete_lines_only, usecols):
+        df['Date'] = parse_datetimes(df['Date'], GC_DATETIME_FORMAT)
+        yield restore_integer_columns(df, GC_INTEGER_COLUMNS), end_offset
+
+
+def benchmark_parsers(filename, kind):
+    """Times the legacy reader and every fast engine (including date parsing) on one file. kind is 'lv' or 'gc'."""
+    reader, legacy = (read_lv_table, read_lv_legacy) if kind == 'lv' else (read_gc_table, read_gc_legacy)
+    timings = {}
+    started = time.perf_counter()
+    legacy(filename)
+    timings['legacy'] = time.perf_counter() - started
+    for engine in FAST_ENGINES:
+        parse_info = {}
+        reader(filename, timings=parse_info, engines=[engine])
+        if parse_info[kind]['parser'] == engine:
+            timings[engine] = parse_info[kind]['seconds']
+    return timings
+
+
+if __name__ == '__main__':
+    # Usage: python data_parsers.py lv|gc <file> [<file> ...]
+    import sys
+    for path in sys.argv[2:]:
+        results = benchmark_parsers(path, sys.argv[1])
+        print(path)
+        for parser, seconds in results.items():
+            print(f"  {parser:8s} {seconds:.3f}s  ({results['legacy'] / seconds:.1f}x vs legacy)")
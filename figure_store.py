@@ -0,0 +1,142 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+
+# --- Figure Files ---
+# Plots are saved as Plotly figure JSON that script.js fetches and renders. With the 'binary'
+# trace format, the numeric and date x/y arrays of every trace are moved out of the JSON into a
+# sidecar file next to it (<plot name>.bin):
+#   - numbers as little-endian float64 (float32 columns as float32), NaN for gaps; whole numbers
+#     without gaps (stage numbers, set-points) in the smallest integer type that holds them
+#   - dates as float64 milliseconds since the epoch (the axis is marked type 'date')
+# Identical arrays (e.g. the Date axis shared by every trace) are stored once. Each array starts
+# at a multiple of 8 bytes, so the browser can view it as a typed array without copying. The JSON keeps the layout and trace styling plus a 'trace_arrays' index
+# ({'file', 'arrays': [{'trace', 'key', 'dtype', 'offset', 'length', 'date'}]}), and script.js puts
+# the arrays back into the traces before plotting. Text arrays stay in the JSON.
+
+PLOT_TRACE_FORMATS = {
+    'json': 'Plain Plotly JSON; every value written as decimal text (original format).',
+    'binary': 'Layout JSON plus a binary sidecar holding the trace arrays (much smaller, faster to load).',
+}
+PLOT_TRACE_FORMAT = 'binary' # Used by write_figure when no format is given
+TRACE_ARRAY_KEYS = ('x', 'y')
+SIDECAR_EXTENSION = '.bin'
+_DTYPES = {'float64': '<f8', 'float32': '<f4', 'int8': '<i1', 'int16': '<i2', 'int32': '<i4'}
+
+
+def sidecar_path(plot_json_filename):
+    return f"{os.path.splitext(plot_json_filename)[0]}{SIDECAR_EXTENSION}"
+
+
+def _pack_array(values):
+    """(little-endian array, is_date) for a numeric or date trace array, or None for anything else."""
+    if values is None or isinstance(values, (str, dict)):
+        return None
+    values = np.asarray(values)
+    if values.ndim != 1 or len(values) == 0:
+        return None
+    if values.dtype.kind == 'O' and pd.api.types.infer_dtype(values, skipna=True) in ('datetime', 'datetime64'):
+        values = pd.to_datetime(values).to_numpy()
+    if values.dtype.kind == 'M':
+        milliseconds = values.astype('datetime64[ms]').astype('int64').astype('<f8')
+        milliseconds[np.isnat(values)] = np.nan
+        return milliseconds, True
+    if values.dtype.kind not in 'iubf':
+        return None
+    if (values.dtype.kind == 'f' and not np.isfinite(values).all()) or (values != np.round(values)).any():
+        return values.astype(_DTYPES['float32'] if values.dtype == np.float32 else _DTYPES['float64']), False
+    low, high = values.min(), values.max()
+    for name in ('int8', 'int16', 'int32'):
+        if np.iinfo(name).min <= low and high <= np.iinfo(name).max:
+            return values.astype(_DTYPES[name]), False
+    return values.astype(_DTYPES['float64']), False
+
+
+def _date_axis_name(trace, key):
+    """Layout key of the axis a trace's x or y array is drawn on ('xaxis', 'yaxis2', ...)."""
+    axis = trace.get(f"{key}axis") or key # 'x', 'x2', 'y3', ...
+    return f"{key}axis{axis[1:]}"
+
+
+def write_figure(fig, plot_json_filename, trace_format=None, zoom=None):
+    """
+    Saves a Plotly figure for script.js in the given trace format (see PLOT_TRACE_FORMATS;
+    default PLOT_TRACE_FORMAT). zoom (plot_pyramid.build_plot_pyramid) is stored under the 'zoom' key,
+    telling script.js the plot was drawn from a coarse level. Returns plot_json_filename.
+    """
+    trace_format = trace_format or PLOT_TRACE_FORMAT
+    if trace_format not in PLOT_TRACE_FORMATS:
+        raise ValueError(f"Unknown plot trace format '{trace_format}'. Available: {list(PLOT_TRACE_FORMATS)}")
+    # The JSON file is written last and replaced in one step: once it exists, the plot is complete
+    temp_filename = f"{plot_json_filename}.tmp"
+    if trace_format == 'json' and zoom is None:
+        pio.write_json(fig, temp_filename)
+        os.replace(temp_filename, plot_json_filename)
+        return plot_json_filename
+
+    fig_dict = fig.to_dict()
+    if zoom is not None:
+        fig_dict['zoom'] = zoom
+    if trace_format == 'json':
+        with open(temp_filename, 'w') as f:
+            f.write(pio.to_json(fig_dict, validate=False))
+        os.replace(temp_filename, plot_json_filename)
+        return plot_json_filename
+    layout = fig_dict.setdefault('layout', {})
+    arrays, chunks, offset = [], [], 0
+    stored = {} # (dtype, bytes) -> offset of an array already in the sidecar
+    for trace_number, trace in enumerate(fig_dict.get('data', [])):
+        for key in TRACE_ARRAY_KEYS:
+            packed = _pack_array(trace.get(key))
+            if packed is None:
+                continue
+            values, is_date = packed
+            data = values.tobytes()
+            if (values.dtype.name, data) not in stored:
+                stored[(values.dtype.name, data)] = offset
+                padding = -len(data) % 8
+                chunks.append(data + b'\0' * padding)
+                offset += len(data) + padding
+            arrays.append({'trace': trace_number, 'key': key, 'dtype': values.dtype.name,
+                           'offset': stored[(values.dtype.name, data)], 'length': int(len(values)), 'date': is_date})
+            del trace[key]
+            if is_date:
+                # Epoch milliseconds are only read as dates on an axis of type 'date'
+                axis = layout.setdefault(_date_axis_name(trace, key), {})
+                axis.setdefault('type', 'date')
+
+    sidecar_filename = sidecar_path(plot_json_filename)
+    fig_dict['trace_arrays'] = {'file': os.path.basename(sidecar_filename), 'arrays': arrays}
+    with open(f"{sidecar_filename}.tmp", 'wb') as f:
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(f"{sidecar_filename}.tmp", sidecar_filename)
+    with open(temp_filename, 'w') as f:
+        f.write(pio.to_json(fig_dict, validate=False))
+    os.replace(temp_filename, plot_json_filename)
+    return plot_json_filename
+
+
+def read_figure(plot_json_filename):
+    """
+    Figure dict of a saved plot, with the sidecar arrays (if any) put back into the traces:
+    numbers as float arrays, dates as datetime64[ms] arrays.
+    """
+    with open(plot_json_filename, 'r') as f:
+        fig_dict = json.load(f)
+    trace_arrays = fig_dict.pop('trace_arrays', None)
+    if not trace_arrays:
+        return fig_dict
+    with open(os.path.join(os.path.dirname(plot_json_filename), trace_arrays['file']), 'rb') as f:
+        data = f.read()
+    for array in trace_arrays['arrays']:
+        values = np.frombuffer(data, dtype=_DTYPES[array['dtype']], count=array['length'], offset=array['offset'])
+        if array['date']:
+            gaps = np.isnan(values)
+            dates = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[ms]')
+            dates[~gaps] = values[~gaps].astype('int64').astype('datetime64[ms]')
+            values = dates
+        fig_dict['data'][array['trace']][array['key']] = values
+    return fig_dict
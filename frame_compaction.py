@@ -0,0 +1,88 @@
+import pandas as pd
+
+# --- Frame Compaction ---
+# Parsed and merged frames are compacted before merging and writing:
+#   - text columns holding only numbers are converted to numeric in one pass (the python-engine
+#     fallback parser leaves every column as text)
+#   - integer columns get the smallest integer dtype that holds them (lossless)
+#   - repeated strings (e.g. the GC 'File' and 'Sample name' columns) become categoricals
+#   - with float_dtype='float32', float columns are stored in single precision. This halves their
+#     size but changes the digits written to the report CSV/JSON files, so it is opt-in.
+
+COMPACTION_POLICIES = {
+    'exact': {
+        'description': 'Lossless: numeric conversion, small integers and categoricals; floats stay float64.',
+        'float_dtype': 'float64',
+        'categorical_max_ratio': 0.5, # Categorical if unique values <= 50% of the rows
+    },
+    'float32': {
+        'description': 'Like exact, but floats are stored as float32 (about 7 significant digits).',
+        'float_dtype': 'float32',
+        'categorical_max_ratio': 0.5,
+    },
+}
+
+DEFAULT_COMPACTION = 'exact'
+
+
+def get_compaction_policy(policy=None):
+    """Returns a policy dict. policy may be a registry name, a policy dict or None (DEFAULT_COMPACTION)."""
+    if isinstance(policy, dict):
+        return policy
+    name = policy or DEFAULT_COMPACTION
+    if name not in COMPACTION_POLICIES:
+        raise ValueError(f"Unknown compaction policy '{name}'. Available: {list(COMPACTION_POLICIES)}")
+    return COMPACTION_POLICIES[name]
+
+
+def frame_memory_mb(df):
+    """Memory used by df in MB, including the Python strings of text columns."""
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+
+def _is_text(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return False
+    return pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+
+
+def compact_frame(df, policy=None, label='frame', memory=None):
+    """
+    Returns a compacted copy of df following the compaction policy (see COMPACTION_POLICIES).
+    If a memory dict is given, memory[label] records the rows and MB before and after.
+    """
+    policy = get_compaction_policy(policy)
+    before_mb = frame_memory_mb(df)
+    df = df.copy(deep=False)
+    # Columns are addressed by position, since the python-engine parser can leave duplicate names
+
+    text_positions = [i for i in range(df.shape[1]) if _is_text(df.iloc[:, i])]
+    if text_positions:
+        # One pass over all text columns; a column is kept numeric only if no value was lost
+        text_frame = df.iloc[:, text_positions]
+        converted = text_frame.apply(pd.to_numeric, errors='coerce')
+        kept = (converted.count().to_numpy() == text_frame.count().to_numpy())
+        for j, position in enumerate(text_positions):
+            if kept[j]:
+                df.isetitem(position, converted.iloc[:, j])
+        text_positions = [position for position, column_kept in zip(text_positions, kept) if not column_kept]
+
+    for i in range(df.shape[1]):
+        series = df.iloc[:, i]
+        if pd.api.types.is_bool_dtype(series):
+            continue
+        if pd.api.types.is_integer_dtype(series):
+            df.isetitem(i, pd.to_numeric(series, downcast='integer'))
+        elif pd.api.types.is_float_dtype(series) and policy['float_dtype'] != str(series.dtype):
+            df.isetitem(i, series.astype(policy['float_dtype']))
+
+    for i in text_positions:
+        series = df.iloc[:, i]
+        if len(series) and series.nunique(dropna=True) <= policy['categorical_max_ratio'] * len(series):
+            df.isetitem(i, series.astype('category'))
+
+    after_mb = frame_memory_mb(df)
+    print(f"Compacted {label} frame: {before_mb:.2f} MB -> {after_mb:.2f} MB ({len(df)} rows)")
+    if memory is not None:
+        memory[label] = {'rows': int(len(df)), 'before_mb': round(float(before_mb), 3), 'after_mb': round(float(after_mb), 3)}
+    return df
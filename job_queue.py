@@ -0,0 +1,171 @@
+import time
+import uuid
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Background Jobs ---
+# Long-running requests (/process) are not handled inside the request thread. The request is
+# checked, its files are saved, and the work is submitted here; the client gets a job id at once
+# and polls /jobs/<id>. At most JOB_MAX_WORKERS jobs run at the same time, the rest wait in order.
+# Once JOB_MAX_PENDING jobs are queued or running, submit_job refuses new work (the route answers
+# "busy") instead of piling more onto the host. Finished jobs are kept for JOB_RETENTION_SECONDS.
+# Jobs live in this process's memory: they do not survive a server restart.
+# While a job runs, its progress events (add_job_event: phase, message, row counts, elapsed seconds)
+# are kept with it; iter_job_events follows them as they arrive, for the /jobs/<id>/events stream.
+
+JOB_MAX_WORKERS = 2
+JOB_MAX_PENDING = 8 # Queued + running jobs
+JOB_RETENTION_SECONDS = 60 * 60
+JOB_STATES = ('queued', 'running', 'done', 'failed')
+JOB_EVENT_HEARTBEAT_SECONDS = 15 # iter_job_events yields None after this long without events
+
+_jobs = {} # job id -> job record (see submit_job)
+_jobs_lock = threading.Lock()
+_jobs_changed = threading.Condition(_jobs_lock) # Notified on every new event and state change
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=JOB_MAX_WORKERS, thread_name_prefix='job')
+    return _executor
+
+
+def _prune_finished_jobs(now):
+    """Forgets finished jobs older than JOB_RETENTION_SECONDS. Call with _jobs_lock held."""
+    for job_id in [job_id for job_id, job in _jobs.items()
+                   if job['finished_at'] is not None and now - job['finished_at'] > JOB_RETENTION_SECONDS]:
+        del _jobs[job_id]
+
+
+def pending_job_count():
+    """Number of jobs queued or running."""
+    with _jobs_lock:
+        return sum(job['state'] in ('queued', 'running') for job in _jobs.values())
+
+
+def new_job_id():
+    return uuid.uuid4().hex
+
+
+def submit_job(kind, work, job_id=None):
+    """
+    Queues work() (returning (results dict, HTTP status)) as a job of the given kind ('process', ...).
+    Returns the job's status (see job_status), or None when JOB_MAX_PENDING jobs are already
+    queued or running. job_id may be given when it was needed before submitting (new_job_id).
+    """
+    now = time.time()
+    with _jobs_lock:
+        _prune_finished_jobs(now)
+        if sum(job['state'] in ('queued', 'running') for job in _jobs.values()) >= JOB_MAX_PENDING:
+            return None
+        job_id = job_id or new_job_id()
+        _jobs[job_id] = {
+            'id': job_id,
+            'kind': kind,
+            'state': 'queued',
+            'submitted_at': now,
+            'started_at': None,
+            'finished_at': None,
+            'message': 'Waiting for a free worker.',
+            'results': None, # Final payload of the job (the former response of the route)
+            'status_code': None, # HTTP status the route would have answered with
+            'events': [], # Progress events, see add_job_event
+        }
+        _add_event(_jobs[job_id], 'queued', 'Waiting for a free worker.')
+    _get_executor().submit(_run_job, job_id, work)
+    print(f"Queued {kind} job {job_id}.")
+    return job_status(job_id)
+
+
+def _add_event(job, phase, message, **details):
+    """Appends a progress event to a job. Call with _jobs_lock held."""
+    started_at = job['started_at'] or job['submitted_at']
+    job['events'].append({'id': len(job['events']) + 1, 'phase': phase, 'message': message,
+                          'elapsed': round(time.time() - started_at, 2), **details})
+    job['message'] = message
+    _jobs_changed.notify_all()
+
+
+def add_job_event(job_id, phase, message, **details):
+    """
+    Records a progress event of a running job: {'id' (1, 2, ...), 'phase', 'message', 'elapsed'
+    (seconds since the job started), **details}. details must be JSON-serializable.
+    """
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is not None:
+            _add_event(job, phase, message, **details)
+
+
+def _run_job(job_id, work):
+    with _jobs_lock:
+        job = _jobs[job_id]
+        job.update(state='running', started_at=time.time(), message='Processing...')
+        _add_event(job, 'running', 'Processing started.')
+    print(f"Started {job['kind']} job {job_id}.")
+    try:
+        results, status_code = work()
+        state = 'done' if status_code < 400 and results.get('success') else 'failed'
+        message = results.get('message', '')
+    except Exception as e:
+        print(f"Error in {job['kind']} job {job_id}: {e}")
+        traceback.print_exc()
+        results, status_code, state = {'success': False, 'message': f'Processing failed: {e}'}, 500, 'failed'
+        message = results['message']
+    with _jobs_lock:
+        job.update(state=state, finished_at=time.time(), message=message, results=results, status_code=status_code)
+        _jobs_changed.notify_all()
+    print(f"Finished {job['kind']} job {job_id}: {state}.")
+
+
+def job_status(job_id):
+    """
+    Status of a job: {'id', 'kind', 'state', 'message', 'submitted_at', 'started_at', 'finished_at',
+    'queue_position' (1 = next to start, queued jobs only), 'progress' (latest event), 'results',
+    'status_code'}. None if unknown.
+    """
+    with _jobs_lock:
+        _prune_finished_jobs(time.time())
+        job = _jobs.get(job_id)
+        if job is None:
+            return None
+        status = {key: value for key, value in job.items() if key != 'events'}
+        status['progress'] = dict(job['events'][-1]) if job['events'] else None
+        if job['state'] == 'queued':
+            status['queue_position'] = 1 + sum(other['state'] == 'queued' and other['submitted_at'] < job['submitted_at']
+                                               for other in _jobs.values())
+        else:
+            status['queue_position'] = None
+        return status
+
+
+def iter_job_events(job_id, after=0, heartbeat_seconds=None):
+    """
+    Yields the progress events of a job with an id above `after`, waiting for new ones as they are
+    added. Yields None after heartbeat_seconds (default JOB_EVENT_HEARTBEAT_SECONDS) without an event,
+    so the caller can keep its connection alive. Once the job has finished and every event was
+    yielded, yields a last {'phase': 'end', 'state', 'message'} event and stops. Stops at once for
+    an unknown job.
+    """
+    heartbeat_seconds = heartbeat_seconds or JOB_EVENT_HEARTBEAT_SECONDS
+    while True:
+        with _jobs_changed:
+            job = _jobs.get(job_id)
+            if job is None:
+                return
+            if len(job['events']) <= after and job['finished_at'] is None:
+                _jobs_changed.wait(heartbeat_seconds)
+            events = [dict(event) for event in job['events'][after:]]
+            finished = job['finished_at'] is not None
+            end_event = {'phase': 'end', 'state': job['state'], 'message': job['message']}
+        for event in events:
+            after = event['id']
+            yield event
+        if finished:
+            yield end_event
+            return
+        if not events:
+            yield None
@@ -2,6 +2,8 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import os
 from datetime import datetime
+from stage_segmentation import segment_stages
+from data_parsers import read_lv_table, read_gc_table
 
 # --- Configuration ---
 LV_TEMP_COL = 'T Heater 1' # Use 10th column for temperature
@@ -22,25 +24,12 @@ def get_unique_filename_prefix():
     return datetime.now().strftime("%Y%m%d_%H%M%S")
 
 # --- File Processing Functions ---
-def process_lv_file(filename):
-    # Read the LV file, skipping the first 2 metadata lines.
-    # The 3rd line is the header, 4th is units.
-    # Use tab as separator, specify python engine to avoid warning
-    df = pd.read_csv(filename, sep='\\t', skiprows=2, engine='python', header=None)
+def process_lv_file(filename, stage_rules=None):
+    # Read the LV file: the first 2 lines are metadata, the 3rd is the header, 4th is units.
+    # The parser layer sniffs this layout, reads the body with the C/pyarrow engine and
+    # converts 'DateTime' (2-digit year format) into a 'Date' column.
+    df = read_lv_table(filename)
     
-    # Assign header from the first row of the read data (original line 3)
-    df.columns = df.iloc[0]
-    # Drop the now redundant header row and the units row (original lines 3 and 4)
-    df = df.iloc[2:].reset_index(drop=True)
-    
-    # Strip any extra whitespace from column names 
-    df.columns = df.columns.str.strip()
-    
-    # Convert the 'DateTime' column (using 2-digit year format) and rename it to 'Date'
-    df['Date'] = pd.to_datetime(df['DateTime'], format='%d/%m/%y %H:%M:%S', dayfirst=True, errors='coerce')
-    # Drop the original 'DateTime' column
-    if 'DateTime' in df.columns:
-        df = df.drop(columns=['DateTime'])
     # Remove rows where Date could not be parsed
     df.dropna(subset=['Date'], inplace=True)
 
@@ -64,30 +53,19 @@ def process_lv_file(filename):
 
     # Stage Detection (ensure sorting first)
     df = df.sort_values(by='Date').reset_index(drop=True)
-    df['Stage'] = 0
-    if not df.empty:
-        current_stage = 1
-        df.loc[0, 'Stage'] = current_stage
-        for i in range(1, len(df)):
-            # Check if RelativeTime exists and is valid before comparison
-            if 'RelativeTime' in df.columns and pd.notna(df.loc[i, 'RelativeTime']) and pd.notna(df.loc[i-1, 'RelativeTime']):
-                if df.loc[i, 'RelativeTime'] < df.loc[i-1, 'RelativeTime']:
-                    current_stage += 1
-            # Always assign the current stage, even if RelativeTime was invalid for comparison
-            df.loc[i, 'Stage'] = current_stage
-    else:
+    if df.empty:
         print("Warning: LV DataFrame empty before stage detection.")
+    # Vectorized stage detection: a new stage starts whenever RelativeTime resets
+    stages, _ = segment_stages(df, rules=stage_rules)
+    df['Stage'] = stages
 
     return df
 
 
 def process_gc_file(filename):
     # Read the GC file with the header from the first line
-    # Use tab as separator, specify python engine to avoid warning
-    df = pd.read_csv(filename, sep='\\t', engine='python')
-    df.columns = df.columns.str.strip()
-    # Convert the 'Date' column to datetime using format dd.mm.yyyy HH:MM:SS
-    df['Date'] = pd.to_datetime(df['Date'], format='%d.%m.%Y %H:%M:%S', errors='coerce') 
+    # The parser layer converts the 'Date' column using format dd.mm.yyyy HH:MM:SS
+    df = read_gc_table(filename)
     # Remove rows where Date could not be parsed
     df.dropna(subset=['Date'], inplace=True)
 
@@ -1,4 +1,5 @@
 import pandas as pd
+import numpy as np
 # No longer need matplotlib directly here, but need plotly
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
@@ -8,6 +9,28 @@ from datetime import datetime
 import json # For saving plot json
 import plotly.utils # For PlotlyJSONEncoder
 import plotly.colors # For comparison plot colors
+from stage_segmentation import segment_stages, stage_boundaries, DEFAULT_STAGE_RULES
+from data_parsers import read_lv_table, read_gc_table
+import re
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from parsed_cache import cached_parse, cached_parse_groups, file_content_hash, PARSER_VERSION
+from data_parsers import sniff_lv_layout
+from resampling import resample_frame, parse_interval, aggregation_for
+from frame_compaction import compact_frame, get_compaction_policy
+from column_schemas import get_schema, schema_usecols, canonical_renames
+from report_index import report_fingerprint, write_report_fingerprint, collect_report_results, write_report_manifest
+from report_catalog import catalog_report, find_catalog_report
+from report_store import write_report_frame, read_report_frame, find_report_data, data_file_paths
+from figure_store import write_figure, read_figure, sidecar_path, PLOT_TRACE_FORMAT
+from plot_pyramid import build_plot_pyramid, PYRAMID_BASE_BUCKETS, PYRAMID_LEVEL_FACTOR
+
+try:
+    import pyarrow as pa # Optional: stage frames are shared with the stage worker processes as Arrow IPC
+except ImportError:
+    pa = None
 
 # Define consistent layout settings for dark theme
 dark_theme_layout_updates = dict(
@@ -79,78 +102,290 @@ LV_H2_FLOW_COL = 'H2 Actual Flow'
 LV_N2_FLOW_COL = 'N2 Actual Flow'
 LV_N2_POISON_SP_COL = 'N2 poisoning set-point'
 GC_NH3_COL = 'NH3'
+GC_STREAM_COL = 'Sample name' # e.g. 'Stream 1 - R101'; one GC export can interleave several reactor streams
 MERGE_TOLERANCE = pd.Timedelta('5 minutes')
+# How LV and GC rows are combined; selectable per request (merge_mode)
+MERGE_MODES = {
+    'nearest': 'One row per LV sample with the nearest GC injection within MERGE_TOLERANCE.',
+    'interpolate_gc': 'One row per LV sample; GC values linearly interpolated to the LV time.',
+    'interpolate_lv': 'One row per GC injection; LV values linearly interpolated to the injection time.',
+    'gc_window': 'One row per GC injection; LV values aggregated (mean/min/max) over the injection window.',
+}
+DEFAULT_MERGE_MODE = 'nearest'
+INTERPOLATION_MAX_GAP = pd.Timedelta('10 minutes') # No interpolation across larger gaps; longest gc_window window
+# LV signals that also get their minimum and maximum over each window in the gc_window merge mode
+GC_WINDOW_RANGE_COLS = [LV_TEMP_COL, LV_PRESSURE_COL, LV_H2_FLOW_COL, LV_N2_FLOW_COL]
+# Per-column aggregation of the fixed-grid resampling (resample_interval); other columns: see resampling.py
+RESAMPLE_AGGREGATIONS = {
+    LV_TEMP_COL: 'mean',
+    LV_H2_FLOW_COL: 'mean',
+    LV_N2_FLOW_COL: 'mean',
+    LV_PRESSURE_COL: 'last',
+    LV_N2_POISON_SP_COL: 'last',
+    'RelativeTime': 'first',
+    GC_NH3_COL: 'max',
+}
+REQUIRED_LV_COLS = [LV_TEMP_COL, LV_PRESSURE_COL, LV_H2_FLOW_COL, LV_N2_FLOW_COL, LV_N2_POISON_SP_COL, 'RelativeTime', 'Date']
+BATCH_MAX_WORKERS = 4 # LV files of a batch merged and written at the same time
+# Stage plots are generated the first time they are requested (ensure_step_plot) and kept in the
+# report folder; generate_reports only stores the stage data. False plots every stage up front.
+LAZY_STAGE_PLOTS = True
+# Stages are written (and, without LAZY_STAGE_PLOTS, plotted) by up to this many worker processes.
+# Runs with fewer merged rows than STAGE_POOL_MIN_ROWS are written in-process, where starting the
+# workers would cost more than it saves.
+STAGE_MAX_WORKERS = min(4, os.cpu_count() or 1)
+STAGE_POOL_MIN_ROWS = 100000
+STAGE_FRAMES_FILE = '_stage_frames.arrow' # Temporary, in the report folder while its stages are written
 
 # --- File Processing Functions (mostly same as your main.py) ---
-def process_lv_file(filename):
-    df = pd.read_csv(filename, sep='\t', skiprows=2, engine='python', header=None)
-    df.columns = df.iloc[0]
-    df = df.iloc[2:].reset_index(drop=True)
-    df.columns = df.columns.str.strip()
-
-    # Standardize Temperature Column Name
-    if LV_TEMP_COL not in df.columns and 'T Heater UP' in df.columns:
-        print(f"Found 'T Heater UP', renaming to '{LV_TEMP_COL}' for consistency.")
-        df.rename(columns={'T Heater UP': LV_TEMP_COL}, inplace=True)
-    elif LV_TEMP_COL not in df.columns:
-        print(f"Warning: Neither '{LV_TEMP_COL}' nor 'T Heater UP' found in LV file columns.")
+def process_lv_file(filename, stage_rules=None, stage_options=None, return_boundaries=False, timings=None,
+                    use_cache=True, schema=None):
+    """
+    Parses an LV file and assigns a Stage number to every row.
+    stage_rules/stage_options select the segmentation rules (default: RelativeTime resets).
+    With return_boundaries=True, returns (df, stage boundary table) instead of df.
+    If a timings dict is given, the parser used and its duration are stored in timings['lv'].
+    With use_cache=True a file already parsed with the same settings is loaded from the parsed cache.
+    schema names the column schema (see column_schemas.py) that maps header variants and picks the columns read.
+    """
+    def parse(path):
+        # Fast C/pyarrow parse with explicit dtypes and date format (falls back to the python engine),
+        # reading only the schema's columns when it does not keep them all
+        df = prepare_lv_frame(read_lv_table(path, timings=timings, usecols=schema_usecols(schema, 'lv')), schema)
+        df = df.sort_values(by='Date').reset_index(drop=True)
+        # Vectorized stage detection (see stage_segmentation.py for the available rules)
+        stages, _ = segment_stages(df, rules=stage_rules, **(stage_options or {}))
+        df['Stage'] = stages
+        return df
+
+    if use_cache:
+        config = {'stage_rules': stage_rules or DEFAULT_STAGE_RULES, 'stage_options': stage_options or {},
+                  'schema': get_schema(schema)}
+        df = cached_parse(filename, 'lv', parse, config=config, timings=timings)
+    else:
+        df = parse(filename)
+    if return_boundaries:
+        return df, stage_boundaries(df['Stage'].to_numpy(), df['Date'])
+    return df
+
+def prepare_lv_frame(df, schema=None):
+    """Cleans a freshly parsed LV frame: column names, numeric conversion and invalid rows."""
+    # Standardize column names: header variants in the schema (e.g. 'T Heater UP') get the canonical name
+    renames = canonical_renames(schema, 'lv', df.columns)
+    if renames:
+        print(f"Renaming LV columns for consistency: {renames}")
+        df.rename(columns=renames, inplace=True)
+    if LV_TEMP_COL not in df.columns:
+        print(f"Warning: Neither '{LV_TEMP_COL}' nor one of its schema variants found in LV file columns.")
         # Potentially handle this case further if it's critical, e.g., by returning an error
         # For now, processing will continue, and it might fail later if temp is essential
 
-    df['Date'] = pd.to_datetime(df['DateTime'], errors='coerce', dayfirst=True)
-    if 'DateTime' in df.columns:
-        df = df.drop(columns=['DateTime'])
     df.dropna(subset=['Date'], inplace=True)
 
     numeric_cols_lv = ['RelativeTime', LV_H2_FLOW_COL, LV_N2_FLOW_COL, LV_TEMP_COL, LV_PRESSURE_COL, LV_N2_POISON_SP_COL]
-    
-    for col_name in df.columns.tolist():
-        if col_name in numeric_cols_lv:
-            try:
-                df[col_name] = pd.to_numeric(df[col_name], errors='coerce')
-            except ValueError:
-                print(f"Warning: Could not convert LV column '{col_name}' to numeric.")
+    present_cols = [col for col in numeric_cols_lv if col in df.columns]
+    if present_cols: # One pass over all instrument columns
+        df[present_cols] = df[present_cols].apply(pd.to_numeric, errors='coerce')
     
     df.dropna(subset=numeric_cols_lv, how='any', inplace=True)
-    
-    df = df.sort_values(by='Date').reset_index(drop=True)
-    df['Stage'] = 0
-    if not df.empty:
-        current_stage = 1
-        df.loc[0, 'Stage'] = current_stage
-        for i in range(1, len(df)):
-            if 'RelativeTime' in df.columns and pd.notna(df.loc[i, 'RelativeTime']) and pd.notna(df.loc[i-1, 'RelativeTime']):
-                if df.loc[i, 'RelativeTime'] < df.loc[i-1, 'RelativeTime']:
-                    current_stage += 1
-            df.loc[i, 'Stage'] = current_stage
     return df
 
-def process_gc_file(filename):
-    df = pd.read_csv(filename, sep='\t', engine='python')
-    df.columns = df.columns.str.strip()
-    df['Date'] = pd.to_datetime(df['Date'], errors='coerce', dayfirst=True)
+def process_gc_file(filename, timings=None, use_cache=True, schema=None):
+    """
+    Parses a GC file. If a timings dict is given, the parser used and its
+    duration are stored in timings['gc'].
+    With use_cache=True a file already parsed is loaded from the parsed cache.
+    schema names the column schema (see column_schemas.py).
+    """
+    def parse(path):
+        return prepare_gc_frame(read_gc_table(path, timings=timings, usecols=schema_usecols(schema, 'gc')), schema)
+
+    if use_cache:
+        return cached_parse(filename, 'gc', parse, config={'schema': get_schema(schema)}, timings=timings)
+    return parse(filename)
+
+def prepare_gc_frame(df, schema=None):
+    """Cleans a freshly parsed GC frame: column names, invalid dates and numeric conversion."""
+    renames = canonical_renames(schema, 'gc', df.columns)
+    if renames:
+        print(f"Renaming GC columns for consistency: {renames}")
+        df.rename(columns=renames, inplace=True)
     df.dropna(subset=['Date'], inplace=True)
     numeric_cols_gc = ['Area', 'H2', 'Area           _2', 'N2', 'Area           _4', GC_NH3_COL]
-    for col_name in df.columns.tolist():
-        if col_name in numeric_cols_gc:
-            try:
-                df[col_name] = pd.to_numeric(df[col_name], errors='coerce')
-            except ValueError:
-                 print(f"Warning: Could not convert GC column '{col_name}' to numeric.")
+    present_cols = [col for col in numeric_cols_gc if col in df.columns]
+    if present_cols:
+        df[present_cols] = df[present_cols].apply(pd.to_numeric, errors='coerce')
     return df
 
-def merge_step_data(df_lv_step, df_gc):
-    if df_lv_step.empty or df_gc.empty:
-        return pd.DataFrame()
-    df_lv_step = df_lv_step.sort_values('Date')
-    df_gc_sorted = df_gc.sort_values('Date')
-    merged_step_df = pd.merge_asof(df_lv_step, df_gc_sorted, on='Date',
-                                   direction='nearest',
-                                   tolerance=MERGE_TOLERANCE,
-                                   suffixes=['_LV', '_GC'])
-    return merged_step_df
-
-def merge_overall_data(df_lv, df_gc):
+def split_gc_streams(df_gc):
+    """
+    Splits a GC frame into {stream name: frame} with a single grouped pass over 'Sample name'.
+    Rows keep their original index and order. Without the column, everything is stream ''.
+    """
+    if GC_STREAM_COL not in df_gc.columns:
+        return {'': df_gc}
+    names = df_gc[GC_STREAM_COL].fillna('').astype(str).str.strip()
+    return {name: df_gc.iloc[positions] for name, positions in names.groupby(names, sort=False).indices.items()}
+
+def process_gc_streams(filename, timings=None, use_cache=True, schema=None):
+    """
+    Parses a GC file and splits it by stream. The split is cached per stream, so processing
+    further reactors from the same GC upload loads only the cached frames. The whole frame is not
+    cached as well, which would store every GC upload twice.
+    """
+    def parse_groups(path):
+        return split_gc_streams(process_gc_file(path, timings=timings, use_cache=False, schema=schema))
+
+    if use_cache:
+        return cached_parse_groups(filename, 'gc', parse_groups, config={'split': GC_STREAM_COL, 'schema': get_schema(schema)},
+                                   timings=timings)
+    return parse_groups(filename)
+
+def reactor_id_from_lv(lv_file_path):
+    """Reactor id from the LV 'Experiment' metadata line (e.g. '003_R150' -> 'R150'), or None."""
+    layout = sniff_lv_layout(lv_file_path)
+    experiment = (layout or {}).get('metadata', {}).get('Experiment', '')
+    match = re.search(r'R\d+', experiment)
+    return match.group(0) if match else None
+
+def select_gc_stream(gc_streams, gc_stream=None, reactor_id=None):
+    """
+    Picks the GC series to merge with one LV file. Returns (frame, stream name).
+    gc_stream selects a stream by name (case-insensitive). Otherwise a single stream is used as is,
+    or the stream naming the LV reactor id. If no single stream matches, all streams are
+    merged together as before (stream name None) and a warning is printed.
+    """
+    if gc_stream:
+        for name, df in gc_streams.items():
+            if name.lower() == gc_stream.strip().lower():
+                return df, name
+        raise ValueError(f"GC stream '{gc_stream}' not found. Available streams: {list(gc_streams)}")
+    if len(gc_streams) == 1:
+        name = next(iter(gc_streams))
+        return gc_streams[name], name
+    if reactor_id:
+        matches = [name for name in gc_streams if re.search(rf'\b{re.escape(reactor_id)}\b', name)]
+        if len(matches) == 1:
+            print(f"Using GC stream '{matches[0]}' for reactor {reactor_id}.")
+            return gc_streams[matches[0]], matches[0]
+    print(f"Warning: GC file has {len(gc_streams)} streams {list(gc_streams)} and none was selected; merging all of them.")
+    return pd.concat(gc_streams.values()).sort_index(kind='stable'), None
+
+def sort_by_date(df):
+    """df sorted by 'Date'; returned as is when it already is (e.g. a GC frame sorted once for a batch)."""
+    if df['Date'].is_monotonic_increasing:
+        return df
+    return df.sort_values('Date', kind='stable')
+
+def interpolate_onto(target_dates, df_source, max_gap=None):
+    """
+    Values of df_source's columns (except 'Date') at target_dates; both must be sorted by date.
+    Numeric float columns are linearly interpolated between the two source samples around each
+    target time (per column, skipping missing values); other columns take the nearest sample.
+    A target gets NaN when it lies outside the source's time range or when the samples around it
+    are more than max_gap (default INTERPOLATION_MAX_GAP) apart. Everything is done with
+    searchsorted/interp over whole arrays.
+    """
+    max_gap_ns = (max_gap if max_gap is not None else INTERPOLATION_MAX_GAP).value
+    targets = target_dates.to_numpy(dtype='datetime64[ns]').astype('int64')
+    source_dates = df_source['Date'].to_numpy(dtype='datetime64[ns]').astype('int64')
+    values = {}
+    for col in df_source.columns:
+        if col == 'Date':
+            continue
+        series = df_source[col]
+        valid = series.notna().to_numpy()
+        times = source_dates[valid]
+        if len(times) == 0:
+            values[col] = pd.Series(np.nan, index=range(len(targets)))
+            continue
+        after = np.searchsorted(times, targets, side='left') # First sample at or after each target
+        after_idx = np.minimum(after, len(times) - 1)
+        before_idx = np.maximum(after - 1, 0)
+        exact = (after < len(times)) & (times[after_idx] == targets)
+        inside = (after > 0) & (after < len(times)) & (times[after_idx] - times[before_idx] <= max_gap_ns)
+        usable = exact | inside
+        if pd.api.types.is_float_dtype(series):
+            result = np.interp(targets, times, series.to_numpy()[valid].astype('float64'))
+            result[~usable] = np.nan
+            values[col] = pd.Series(result.astype(series.dtype, copy=False))
+        else:
+            # An exact match is the sample at after_idx; otherwise the closer neighbour (the earlier one on a tie)
+            nearest = np.where(exact, after_idx,
+                               np.where(targets - times[before_idx] <= times[after_idx] - targets, before_idx, after_idx))
+            picked = series[valid].iloc[nearest].reset_index(drop=True)
+            values[col] = picked if usable.all() else picked.where(usable)
+    return pd.DataFrame(values, index=range(len(targets)))
+
+def merge_interpolated(df_anchor, df_source, anchor_suffix, source_suffix, max_gap=None):
+    """Rows of df_anchor with df_source's columns interpolated onto its dates (see interpolate_onto)."""
+    df_anchor = sort_by_date(df_anchor).reset_index(drop=True)
+    interpolated = interpolate_onto(df_anchor['Date'], sort_by_date(df_source), max_gap)
+    shared = [col for col in interpolated.columns if col in df_anchor.columns]
+    if shared: # Same naming as merge_asof's suffixes
+        df_anchor = df_anchor.rename(columns={col: f"{col}{anchor_suffix}" for col in shared})
+        interpolated = interpolated.rename(columns={col: f"{col}{source_suffix}" for col in shared})
+    return pd.concat([df_anchor, interpolated], axis=1)
+
+def merge_gc_windows(df_lv, df_gc, max_gap=None):
+    """
+    One row per GC injection, with the LV rows logged since the previous injection (at most max_gap,
+    default INTERPOLATION_MAX_GAP, before it) aggregated into it. LV columns are aggregated as in
+    resampling (mean for signals, last for setpoints and the stage); GC_WINDOW_RANGE_COLS also get
+    '<col>_min'/'<col>_max' columns, and 'LV samples' counts the rows in the window.
+    Injections without LV rows in their window are dropped.
+    """
+    max_gap_ns = (max_gap if max_gap is not None else INTERPOLATION_MAX_GAP).value
+    df_lv = sort_by_date(df_lv)
+    df_gc = sort_by_date(df_gc).reset_index(drop=True)
+    gc_times = df_gc['Date'].to_numpy(dtype='datetime64[ns]').astype('int64')
+    lv_times = df_lv['Date'].to_numpy(dtype='datetime64[ns]').astype('int64')
+    # Window of injection i: (injection i-1, injection i], so each LV row belongs to the next injection
+    window = np.searchsorted(gc_times, lv_times, side='left')
+    in_window = window < len(gc_times)
+    in_window[in_window] = gc_times[window[in_window]] - lv_times[in_window] <= max_gap_ns
+
+    lv_columns = [col for col in df_lv.columns if col != 'Date']
+    agg = {col: ('last' if col == 'Stage' else aggregation_for(col, df_lv[col], RESAMPLE_AGGREGATIONS))
+           for col in lv_columns}
+    grouped = df_lv.loc[in_window, lv_columns].groupby(window[in_window], sort=True)
+    aggregated = grouped.agg(agg)
+    range_cols = [col for col in GC_WINDOW_RANGE_COLS if col in lv_columns]
+    if range_cols:
+        minimum = grouped[range_cols].min().add_suffix('_min')
+        maximum = grouped[range_cols].max().add_suffix('_max')
+        aggregated = pd.concat([aggregated, minimum, maximum], axis=1)
+    aggregated['LV samples'] = grouped.size()
+
+    shared = [col for col in aggregated.columns if col in df_gc.columns]
+    if shared: # Same naming as merge_asof's suffixes
+        df_gc = df_gc.rename(columns={col: f"{col}_GC" for col in shared})
+        aggregated = aggregated.rename(columns={col: f"{col}_LV" for col in shared})
+    return pd.concat([df_gc.take(aggregated.index).reset_index(drop=True), aggregated.reset_index(drop=True)], axis=1)
+
+def merge_frames(df_lv, df_gc, merge_mode=None, max_gap=None):
+    """Merges sorted-or-not LV and GC frames with one of MERGE_MODES (default DEFAULT_MERGE_MODE)."""
+    merge_mode = merge_mode or DEFAULT_MERGE_MODE
+    if merge_mode == 'nearest':
+        return pd.merge_asof(sort_by_date(df_lv), sort_by_date(df_gc), on='Date',
+                             direction='nearest',
+                             tolerance=MERGE_TOLERANCE,
+                             suffixes=['_LV', '_GC'])
+    if merge_mode == 'interpolate_gc':
+        return merge_interpolated(df_lv, df_gc, '_LV', '_GC', max_gap)
+    if merge_mode == 'interpolate_lv':
+        merged = merge_interpolated(df_gc, df_lv, '_GC', '_LV', max_gap)
+        # Injections outside the LV run (no stage) are dropped; the stage number stays an integer
+        if 'Stage' in merged.columns:
+            merged = merged[merged['Stage'].notna()].reset_index(drop=True)
+            if 'Stage' in df_lv.columns:
+                merged['Stage'] = merged['Stage'].astype(df_lv['Stage'].dtype)
+        return merged
+    if merge_mode == 'gc_window':
+        return merge_gc_windows(df_lv, df_gc, max_gap)
+    raise ValueError(f"Unknown merge mode '{merge_mode}'. Available: {list(MERGE_MODES)}")
+
+def merge_overall_data(df_lv, df_gc, merge_mode=None, max_gap=None):
     if df_lv.empty:
         print("Warning: LV DataFrame is empty for overall merge.")
         return df_gc.copy() if not df_gc.empty else pd.DataFrame()
@@ -158,31 +393,54 @@ def merge_overall_data(df_lv, df_gc):
         print("Warning: GC DataFrame is empty for overall merge.")
         return df_lv.copy()
 
-    df_lv_sorted = df_lv.sort_values('Date')
-    df_gc_sorted = df_gc.sort_values('Date')
-    merged_overall_df = pd.merge_asof(df_lv_sorted, df_gc_sorted, on='Date',
-                                      direction='nearest',
-                                      tolerance=MERGE_TOLERANCE, 
-                                      suffixes=['_LV', '_GC'])
-    print(f"Overall merged data shape: {merged_overall_df.shape}")
+    merged_overall_df = merge_frames(df_lv, df_gc, merge_mode, max_gap)
+    print(f"Overall merged data shape ({merge_mode or DEFAULT_MERGE_MODE} merge): {merged_overall_df.shape}")
     return merged_overall_df
 
+def resample_merged_data(merged_df, interval, aggregations=None):
+    """Merged frame on a fixed time grid (see resampling.py), aggregated with RESAMPLE_AGGREGATIONS."""
+    resampled_df = resample_frame(merged_df, interval, aggregations or RESAMPLE_AGGREGATIONS)
+    print(f"Resampled merged data to a {parse_interval(interval)} grid: {len(merged_df)} -> {len(resampled_df)} rows")
+    return resampled_df
+
+def stage_rows(merged_df):
+    """
+    {stage number: rows of that stage} from one pass over 'Stage': (start, stop) for a stage whose
+    rows are contiguous (the usual case, as stages follow each other in time), else their positions.
+    """
+    rows = {}
+    for stage, positions in merged_df.groupby('Stage', sort=True).indices.items():
+        if positions[-1] - positions[0] + 1 == len(positions):
+            rows[int(stage)] = (int(positions[0]), int(positions[-1]) + 1)
+        else:
+            rows[int(stage)] = positions
+    return rows
+
+def take_stage_rows(frame, rows):
+    """Rows of one stage (see stage_rows) of a DataFrame, as a frame with a fresh index."""
+    if isinstance(rows, tuple):
+        # Contiguous rows: a positional slice instead of a gather. reset_index still returns a new
+        # frame (its data is only shared under pandas copy-on-write)
+        return frame.iloc[rows[0]:rows[1]].reset_index(drop=True)
+    return frame.take(rows).reset_index(drop=True)
+
 # --- Plotting Functions (Rewritten for Plotly, saving JSON) ---
-def plot_overall_merged_data(merged_df, output_folder_path):
+def plot_overall_merged_data(merged_df, output_folder_path, save_data=True):
     if merged_df.empty:
-        print("Overall merged data is empty. Skipping overall plot and CSV save.")
-        return None, None # plot_json_path, csv_path
+        print("Overall merged data is empty. Skipping overall plot and data save.")
+        return None, None # plot_json_path, data_path
 
     os.makedirs(output_folder_path, exist_ok=True)
-    overall_csv_filename = os.path.join(output_folder_path, "overall_merged_data.csv")
+    overall_data_filename = None
     plot_json_filename = os.path.join(output_folder_path, "overall_plot.json") # Save as JSON
     
-    try:
-        merged_df.to_csv(overall_csv_filename, index=False)
-        print(f"Saved overall merged data to: {overall_csv_filename}")
-    except Exception as e:
-        print(f"Error saving overall merged data to CSV: {e}")
-        overall_csv_filename = None
+    if save_data:
+        try:
+            # Parquet store; the CSV download is produced from it on request (report_store.py)
+            overall_data_filename = write_report_frame(merged_df, os.path.join(output_folder_path, "overall_merged_data"))
+            print(f"Saved overall merged data to: {overall_data_filename}")
+        except Exception as e:
+            print(f"Error saving overall merged data: {e}")
 
     # --- Create figure with multiple Y axes ---
     # Instead of make_subplots, we create a regular figure
@@ -202,36 +460,42 @@ def plot_overall_merged_data(merged_df, output_folder_path):
     raw_stage_col_name = 'Stage' # This is the original name from process_lv_file
     stage_col = f"{raw_stage_col_name}_LV" if f"{raw_stage_col_name}_LV" in merged_df.columns else raw_stage_col_name
 
+    # Long runs are drawn from the coarsest pyramid level; zoomed windows are fetched at full
+    # resolution through /plot_window (plot_pyramid.py). Columns in trace order.
+    plot_columns = [col for col in (temp_col, nh3_col, h2_flow_col, n2_flow_col, n2_poison_col, pressure_col, stage_col)
+                    if col in merged_df.columns and pd.api.types.is_numeric_dtype(merged_df[col])]
+    plot_df, zoom = build_plot_pyramid(merged_df, plot_columns, plot_json_filename, overall_data_filename)
+
     # --- Add Traces, assigning to different Y axes ---
     # Y Axis 1 (Left): Temperature
     if temp_col in merged_df.columns and pd.api.types.is_numeric_dtype(merged_df[temp_col]):
-        fig.add_trace(go.Scatter(x=merged_df[date_col], y=merged_df[temp_col], name=f'LV Temp ({temp_col})', 
+        fig.add_trace(go.Scatter(x=plot_df[date_col], y=plot_df[temp_col], name=f'LV Temp ({temp_col})', 
                                  mode='lines+markers', marker=dict(color='red'), yaxis='y1'))
 
     # Y Axis 2 (Right): NH3
     if nh3_col in merged_df.columns and pd.api.types.is_numeric_dtype(merged_df[nh3_col]):
-        fig.add_trace(go.Scatter(x=merged_df[date_col], y=merged_df[nh3_col], name=f'GC NH3 ({nh3_col})', 
+        fig.add_trace(go.Scatter(x=plot_df[date_col], y=plot_df[nh3_col], name=f'GC NH3 ({nh3_col})', 
                                  mode='lines+markers', line=dict(dash='dot', color='lime'), yaxis='y2'))
 
     # Y Axis 3 (Right, shifted): Flows & Setpoints
     if h2_flow_col in merged_df.columns and pd.api.types.is_numeric_dtype(merged_df[h2_flow_col]):
-        fig.add_trace(go.Scatter(x=merged_df[date_col], y=merged_df[h2_flow_col], name=f'LV H2 Flow ({h2_flow_col})', 
+        fig.add_trace(go.Scatter(x=plot_df[date_col], y=plot_df[h2_flow_col], name=f'LV H2 Flow ({h2_flow_col})', 
                                  mode='lines+markers', marker=dict(color='orange'), yaxis='y3'))
     if n2_flow_col in merged_df.columns and pd.api.types.is_numeric_dtype(merged_df[n2_flow_col]):
-        fig.add_trace(go.Scatter(x=merged_df[date_col], y=merged_df[n2_flow_col], name=f'LV N2 Flow ({n2_flow_col})', 
+        fig.add_trace(go.Scatter(x=plot_df[date_col], y=plot_df[n2_flow_col], name=f'LV N2 Flow ({n2_flow_col})', 
                                  mode='lines+markers', line=dict(dash='dash', color='purple'), yaxis='y3'))
     if n2_poison_col in merged_df.columns and pd.api.types.is_numeric_dtype(merged_df[n2_poison_col]):
-        fig.add_trace(go.Scatter(x=merged_df[date_col], y=merged_df[n2_poison_col], name=f'LV N2 Poison SP ({n2_poison_col})', 
+        fig.add_trace(go.Scatter(x=plot_df[date_col], y=plot_df[n2_poison_col], name=f'LV N2 Poison SP ({n2_poison_col})', 
                                  mode='lines+markers', line=dict(dash='dot', color='magenta'), yaxis='y3'))
 
     # Y Axis 4 (Left, shifted): Pressure
     if pressure_col in merged_df.columns and pd.api.types.is_numeric_dtype(merged_df[pressure_col]):
-        fig.add_trace(go.Scatter(x=merged_df[date_col], y=merged_df[pressure_col], name=f'LV Pressure ({pressure_col})', 
+        fig.add_trace(go.Scatter(x=plot_df[date_col], y=plot_df[pressure_col], name=f'LV Pressure ({pressure_col})', 
                                  mode='lines+markers', marker=dict(color='cyan'), yaxis='y4'))
 
     # Y Axis 5 (Right, new): Stage Number
     if stage_col in merged_df.columns and pd.api.types.is_numeric_dtype(merged_df[stage_col]):
-        fig.add_trace(go.Scatter(x=merged_df[date_col], y=merged_df[stage_col], name='Stage Number', 
+        fig.add_trace(go.Scatter(x=plot_df[date_col], y=plot_df[stage_col], name='Stage Number', 
                                  mode='lines', line=dict(color='saddlebrown', shape='hv'), yaxis='y5'))
 
     # --- Update Layout with Multiple Axes, Dark Theme --- 
@@ -305,37 +569,174 @@ def plot_overall_merged_data(merged_df, output_folder_path):
 
     # --- Save Plotly JSON ---
     try:
-        pio.write_json(fig, plot_json_filename)
+        write_figure(fig, plot_json_filename, zoom=zoom)
         print(f"Saved overall Plotly plot to: {plot_json_filename}")
     except Exception as e:
         print(f"Error saving overall Plotly plot JSON: {e}")
         plot_json_filename = None
 
-    return plot_json_filename, overall_csv_filename
+    return plot_json_filename, overall_data_filename
 
-def plot_per_step_data(step_df, step_number, step_output_folder_path):
-    if step_df.empty:
-        print(f"No data to plot for step {step_number}.")
-        return None, None, None # plot_json_path, csv_path, json_path
+def step_plot_path(step_output_folder_path, step_number):
+    return os.path.join(step_output_folder_path, f"step_{step_number}_plot.json")
 
+def remove_step_plot(step_output_folder_path, step_number):
+    """
+    Creates a stage's folder, removing plot files of an earlier version of the stage (e.g. before
+    a live-run refresh), so the plot is generated again from the new data.
+    """
     os.makedirs(step_output_folder_path, exist_ok=True)
-    csv_filename = os.path.join(step_output_folder_path, f"step_{step_number}_data.csv")
-    json_filename = os.path.join(step_output_folder_path, f"step_{step_number}_data.json")
-    plot_json_filename = os.path.join(step_output_folder_path, f"step_{step_number}_plot.json") # Save plot as JSON
+    plot_json_filename = step_plot_path(step_output_folder_path, step_number)
+    for stale_path in (plot_json_filename, sidecar_path(plot_json_filename), f"{os.path.splitext(plot_json_filename)[0]}_pyramid.parquet"):
+        if os.path.exists(stale_path):
+            os.remove(stale_path)
 
+def save_step_data(step_df, step_number, step_output_folder_path):
+    """
+    Stores a stage's data and returns its path (None on error). Plot files of an earlier version
+    of the stage (e.g. before a live-run refresh) are removed, so the plot is generated again.
+    """
+    remove_step_plot(step_output_folder_path, step_number)
     try:
-        step_df.to_csv(csv_filename, index=False)
-        print(f"Saved step {step_number} data to CSV: {csv_filename}")
-    except Exception as e: print(f"Error saving step {step_number} CSV: {e}"); csv_filename = None
-    try:
-        # Prepare DataFrame for JSON serialization (convert datetime)
-        df_for_json = step_df.copy()
-        for col in df_for_json.select_dtypes(include=['datetime64[ns]']).columns:
-            # Ensure NaT values are handled correctly (e.g., convert to None or empty string)
-            df_for_json[col] = df_for_json[col].apply(lambda x: x.isoformat() if pd.notnull(x) else None)
-        df_for_json.to_json(json_filename, orient='records', indent=4, lines=False, date_format='iso')
-        print(f"Saved step {step_number} data to JSON: {json_filename}")
-    except Exception as e: print(f"Error saving step {step_number} JSON: {e}"); json_filename = None
+        # Parquet store; the CSV/JSON downloads are produced from it on request (report_store.py)
+        data_filename = write_report_frame(step_df, os.path.join(step_output_folder_path, f"step_{step_number}_data"),
+                                           json_copy=True)
+        print(f"Saved step {step_number} data to: {data_filename}")
+        return data_filename
+    except Exception as e:
+        print(f"Error saving step {step_number} data: {e}")
+        return None
+
+def write_stage_report(step_df, step_number, step_output_folder_path, lazy_plot=None):
+    """
+    Stores one stage's data and, unless the plot is lazy (lazy_plot, default LAZY_STAGE_PLOTS), plots it.
+    Returns (plot_json_path, data_path); a lazy plot's path names the file written on first request.
+    """
+    lazy_plot = LAZY_STAGE_PLOTS if lazy_plot is None else lazy_plot
+    if not lazy_plot:
+        return plot_per_step_data(step_df, step_number, step_output_folder_path)
+    data_path = save_step_data(step_df, step_number, step_output_folder_path)
+    return (step_plot_path(step_output_folder_path, step_number) if data_path else None), data_path
+
+_stage_pools = {} # max_workers -> ProcessPoolExecutor, kept for the next report
+_stage_pools_guard = threading.Lock()
+
+def stage_process_pool(max_workers):
+    """Shared worker pool of the stage writers. Workers are spawned, never forked from the (threaded) server."""
+    with _stage_pools_guard:
+        if max_workers not in _stage_pools:
+            _stage_pools[max_workers] = ProcessPoolExecutor(max_workers=max_workers,
+                                                            mp_context=multiprocessing.get_context('spawn'))
+        return _stage_pools[max_workers]
+
+def _write_stage_from_arrow(frames_path, rows, step_number, step_output_folder_path, lazy_plot):
+    """
+    Stage worker task. The merged frame is memory-mapped from the Arrow IPC file written by
+    write_stage_reports, so only this stage's rows are ever converted, and nothing is pickled.
+    """
+    with pa.memory_map(frames_path) as source:
+        table = pa.ipc.open_file(source).read_all() # Zero-copy views of the mapped file
+        if isinstance(rows, tuple):
+            table = table.slice(rows[0], rows[1] - rows[0])
+        else:
+            table = table.take(pa.array(rows))
+        step_df = table.to_pandas()
+    return write_stage_report(step_df, step_number, step_output_folder_path, lazy_plot)
+
+def write_stage_reports(merged_df, rows_by_stage, output_folder_path, max_workers=None, on_stage_written=None):
+    """
+    Writes the stages of merged_df ({stage number: rows}, see stage_rows) into step_N folders of
+    output_folder_path and returns their (plot_json_path, data_path) in the order of rows_by_stage.
+    on_stage_written(stage, (plot_json_path, data_path)) is called as each stage is finished.
+    Large runs are handed to up to max_workers (default STAGE_MAX_WORKERS) worker processes, which
+    read their rows from one memory-mapped Arrow IPC copy of merged_df; a stage whose worker fails
+    is written in-process.
+    """
+    max_workers = min(max_workers or STAGE_MAX_WORKERS, len(rows_by_stage))
+    folders = {stage: os.path.join(output_folder_path, f"step_{stage}") for stage in rows_by_stage}
+    written = {}
+    if pa is not None and max_workers > 1 and len(merged_df) >= STAGE_POOL_MIN_ROWS:
+        frames_path = os.path.join(output_folder_path, STAGE_FRAMES_FILE)
+        try:
+            with pa.OSFile(frames_path, 'wb') as sink:
+                table = pa.Table.from_pandas(merged_df, preserve_index=False)
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            del table
+            pool = stage_process_pool(max_workers)
+            futures = {stage: pool.submit(_write_stage_from_arrow, frames_path, rows, stage, folders[stage], LAZY_STAGE_PLOTS)
+                       for stage, rows in rows_by_stage.items()}
+            for stage, future in futures.items():
+                try:
+                    written[stage] = future.result()
+                    if on_stage_written is not None:
+                        on_stage_written(stage, written[stage])
+                except Exception as e:
+                    print(f"Stage worker failed for step {stage} ({e}); writing it in-process.")
+                    if isinstance(e, BrokenProcessPool):
+                        with _stage_pools_guard:
+                            _stage_pools.pop(max_workers, None) # Started again for the next report
+            print(f"Wrote {len(written)} stages with {max_workers} worker processes.")
+        except Exception as e:
+            print(f"Error starting stage workers ({e}); writing stages in-process.")
+        finally:
+            if os.path.exists(frames_path):
+                os.remove(frames_path)
+
+    for stage, rows in rows_by_stage.items():
+        if stage not in written:
+            written[stage] = write_stage_report(take_stage_rows(merged_df, rows), stage, folders[stage])
+            if on_stage_written is not None:
+                on_stage_written(stage, written[stage])
+    return [written[stage] for stage in rows_by_stage]
+
+_step_plot_locks = {} # plot path -> lock, so a plot requested twice at once is generated once
+_step_plot_locks_guard = threading.Lock()
+
+def ensure_step_plot(plot_json_filename):
+    """
+    Returns the path of a stage plot (step_N/step_N_plot.json), generating it from the stored stage
+    data if it does not exist yet. None if the stage has no stored data or plotting fails.
+    """
+    if os.path.exists(plot_json_filename):
+        return plot_json_filename
+    match = re.fullmatch(r'step_(\d+)_plot\.json', os.path.basename(plot_json_filename))
+    if not match:
+        return None
+    step_number = int(match.group(1))
+    step_output_folder_path = os.path.dirname(plot_json_filename)
+    with _step_plot_locks_guard:
+        lock = _step_plot_locks.setdefault(os.path.abspath(plot_json_filename), threading.Lock())
+    with lock:
+        if os.path.exists(plot_json_filename):
+            return plot_json_filename # Generated by a concurrent request
+        data_filename = find_report_data(os.path.join(step_output_folder_path, f"step_{step_number}_data.json"))
+        if data_filename is None:
+            return None
+        print(f"Generating step {step_number} plot on first request: {plot_json_filename}")
+        try:
+            plot_json_path, _ = plot_per_step_data(read_report_frame(data_filename), step_number, step_output_folder_path,
+                                                   save_data=False)
+        except Exception as e:
+            print(f"Error generating step {step_number} plot: {e}")
+            return None
+        return plot_json_path
+
+def plot_per_step_data(step_df, step_number, step_output_folder_path, save_data=True):
+    """
+    Stores a stage's data (unless save_data=False, when it is already stored) and writes its plot.
+    Returns (plot_json_path, data_path).
+    """
+    if step_df.empty:
+        print(f"No data to plot for step {step_number}.")
+        return None, None # plot_json_path, data_path
+
+    plot_json_filename = step_plot_path(step_output_folder_path, step_number) # Save plot as JSON
+    if save_data:
+        data_filename = save_step_data(step_df, step_number, step_output_folder_path)
+    else:
+        os.makedirs(step_output_folder_path, exist_ok=True)
+        data_filename = find_report_data(os.path.join(step_output_folder_path, f"step_{step_number}_data.json"))
 
     # --- Create single figure with multiple Y axes --- 
     fig = go.Figure()
@@ -349,30 +750,35 @@ def plot_per_step_data(step_df, step_number, step_output_folder_path):
     n2_poison_col = f"{LV_N2_POISON_SP_COL}_LV" if f"{LV_N2_POISON_SP_COL}_LV" in step_df.columns else LV_N2_POISON_SP_COL
     date_col = 'Date'
 
+    # Coarse pyramid level for long stages, see plot_overall_merged_data. Columns in trace order.
+    plot_columns = [col for col in (temp_col, pressure_col, n2_flow_col, h2_flow_col, n2_poison_col, nh3_col)
+                    if col in step_df.columns and pd.api.types.is_numeric_dtype(step_df[col])]
+    plot_df, zoom = build_plot_pyramid(step_df, plot_columns, plot_json_filename, data_filename)
+
     # --- Add Traces --- 
     # Y1 (Left): Temp
     if temp_col in step_df.columns and pd.api.types.is_numeric_dtype(step_df[temp_col]):
-        fig.add_trace(go.Scatter(x=step_df[date_col], y=step_df[temp_col], name=f'LV Temp ({temp_col})', 
+        fig.add_trace(go.Scatter(x=plot_df[date_col], y=plot_df[temp_col], name=f'LV Temp ({temp_col})', 
                                  mode='lines+markers', marker=dict(color='red'), yaxis='y1'))
     # Y2 (Right): Pressure
     if pressure_col in step_df.columns and pd.api.types.is_numeric_dtype(step_df[pressure_col]):
-        fig.add_trace(go.Scatter(x=step_df[date_col], y=step_df[pressure_col], name=f'LV Pressure ({pressure_col})', 
+        fig.add_trace(go.Scatter(x=plot_df[date_col], y=plot_df[pressure_col], name=f'LV Pressure ({pressure_col})', 
                                  mode='lines+markers', line=dict(dash='dash', color='aqua'), yaxis='y2'))
     # Y3 (Right, offset): Flows
     if n2_flow_col in step_df.columns and pd.api.types.is_numeric_dtype(step_df[n2_flow_col]):
-        fig.add_trace(go.Scatter(x=step_df[date_col], y=step_df[n2_flow_col], name=f'LV N2 Flow ({n2_flow_col})', 
+        fig.add_trace(go.Scatter(x=plot_df[date_col], y=plot_df[n2_flow_col], name=f'LV N2 Flow ({n2_flow_col})', 
                                  mode='lines+markers', marker=dict(color='purple'), yaxis='y3'))
     if h2_flow_col in step_df.columns and pd.api.types.is_numeric_dtype(step_df[h2_flow_col]):
-        fig.add_trace(go.Scatter(x=step_df[date_col], y=step_df[h2_flow_col], name=f'LV H2 Flow ({h2_flow_col})', 
+        fig.add_trace(go.Scatter(x=plot_df[date_col], y=plot_df[h2_flow_col], name=f'LV H2 Flow ({h2_flow_col})', 
                                  mode='lines+markers', marker=dict(color='orange'), yaxis='y3'))
     # Add N2 Poisoning Flow
     if n2_poison_col in step_df.columns and pd.api.types.is_numeric_dtype(step_df[n2_poison_col]):
-        fig.add_trace(go.Scatter(x=step_df[date_col], y=step_df[n2_poison_col], name=f'LV N2 Poison SP ({n2_poison_col})', 
+        fig.add_trace(go.Scatter(x=plot_df[date_col], y=plot_df[n2_poison_col], name=f'LV N2 Poison SP ({n2_poison_col})', 
                                  mode='lines+markers', line=dict(dash='dot', color='magenta'), yaxis='y3'))
 
     # Y4 (Left, offset): NH3
     if nh3_col in step_df.columns and pd.api.types.is_numeric_dtype(step_df[nh3_col]):
-        fig.add_trace(go.Scatter(x=step_df[date_col], y=step_df[nh3_col], name=f'GC NH3 ({nh3_col})', 
+        fig.add_trace(go.Scatter(x=plot_df[date_col], y=plot_df[nh3_col], name=f'GC NH3 ({nh3_col})', 
                                  mode='lines+markers', marker=dict(color='lime'), yaxis='y4'))
 
     # --- Update Layout with Multiple Axes & Dark Theme ---
@@ -433,22 +839,38 @@ def plot_per_step_data(step_df, step_number, step_output_folder_path):
 
     # --- Save Plotly JSON ---
     try:
-        pio.write_json(fig, plot_json_filename)
+        write_figure(fig, plot_json_filename, zoom=zoom)
         print(f"Saved step {step_number} Plotly plot to: {plot_json_filename}")
     except Exception as e:
         print(f"Error saving step {step_number} Plotly plot JSON: {e}")
         plot_json_filename = None
 
-    return plot_json_filename, csv_filename, json_filename
+    return plot_json_filename, data_filename
 
-# --- Main Orchestration Function for Web App ---
-def generate_reports(lv_file_path, gc_file_path, base_output_folder, report_prefix_text=None):
+def report_progress(progress, phase, message, **details):
     """
-    Processes LV and GC files, generates plots and data files (CSV, JSON)
-    into a timestamped subfolder within base_output_folder.
-    Accepts an optional report_prefix_text to prepend to the folder name.
-    Returns paths to generated overall files and a list of dicts for step files.
+    Prints a progress message and passes it to the progress callback of a run (if any), as
+    progress(phase, message, **details). Phases: 'parse_lv', 'parse_gc', 'merge', 'write' and 'stage'.
+    A failing callback never stops the run.
     """
+    print(message)
+    if progress is None:
+        return
+    try:
+        progress(phase, message, **details)
+    except Exception as e:
+        print(f"Error reporting progress: {e}")
+
+def step_report_entry(step_number, plot_json_path, data_path):
+    """One item of results['step_reports']."""
+    return {
+        'step_number': step_number,
+        'plot_path': plot_json_path, # Path to the plot JSON file (written on first request if lazy)
+        **data_file_paths(data_path) # data_path, csv_path, json_path
+    }
+
+def create_report_folder(base_output_folder, report_prefix_text=None):
+    """Creates the timestamped (optionally prefixed) output folder for a run and returns its path."""
     current_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     if report_prefix_text and report_prefix_text.strip():
         # Sanitize prefix text to be filesystem-friendly and URL-friendly
@@ -472,25 +894,111 @@ def generate_reports(lv_file_path, gc_file_path, base_output_folder, report_pref
     current_run_output_folder = os.path.join(base_output_folder, folder_name)
     os.makedirs(current_run_output_folder, exist_ok=True)
     print(f"Created main output folder for this run: {current_run_output_folder}")
+    return current_run_output_folder
+
+def processing_config(stage_rules=None, stage_options=None, mode='full', gc_stream=None, schema=None,
+                      compaction=None, merge_mode=None, max_gap=None, resample_interval=None):
+    """Settings that determine a report's outputs; part of the report fingerprint."""
+    merge_mode = merge_mode or DEFAULT_MERGE_MODE
+    return {
+        'mode': mode,
+        'merge_mode': merge_mode,
+        'resample_interval': str(parse_interval(resample_interval)) if resample_interval else None,
+        'resample_aggregations': RESAMPLE_AGGREGATIONS if resample_interval else None,
+        'interpolation_max_gap': str(max_gap or INTERPOLATION_MAX_GAP) if merge_mode != 'nearest' else None,
+        'gc_stream': gc_stream,
+        'column_schema': get_schema(schema),
+        'compaction': get_compaction_policy(compaction),
+        'stage_rules': stage_rules or DEFAULT_STAGE_RULES,
+        'stage_options': stage_options or {},
+        'merge_tolerance': str(MERGE_TOLERANCE),
+        'columns': [LV_TEMP_COL, LV_PRESSURE_COL, LV_H2_FLOW_COL, LV_N2_FLOW_COL, LV_N2_POISON_SP_COL, GC_NH3_COL],
+        'parser_version': PARSER_VERSION,
+        'plot_trace_format': PLOT_TRACE_FORMAT,
+        'plot_pyramid': [PYRAMID_BASE_BUCKETS, PYRAMID_LEVEL_FACTOR],
+    }
+
+def fingerprint_inputs(lv_file_path, gc_file_path, config):
+    return report_fingerprint(file_content_hash(lv_file_path), file_content_hash(gc_file_path), config)
+
+def reuse_existing_report(base_output_folder, fingerprint):
+    """Returns the results of an existing report with this fingerprint, or None."""
+    existing_folder = find_catalog_report(base_output_folder, fingerprint)
+    if existing_folder is None:
+        return None
+    results = collect_report_results(existing_folder)
+    if not results['overall_data_path']:
+        return None # Outputs were deleted; compute the report again
+    results['reused_report'] = os.path.basename(existing_folder)
+    results['parse_timings'] = {}
+    results['frame_memory'] = {}
+    results['message'] = f"Identical inputs and settings were already processed; showing report {results['reused_report']}."
+    print(results['message'])
+    return results
+
+# --- Main Orchestration Function for Web App ---
+def generate_reports(lv_file_path, gc_file_path, base_output_folder, report_prefix_text=None,
+                     stage_rules=None, stage_options=None, reuse_existing=True, gc_stream=None, schema=None,
+                     compaction=None, gc_streams=None, merge_mode=None, max_gap=None, resample_interval=None,
+                     stage_workers=None, progress=None):
+    """
+    Processes LV and GC files, generates plots and data files (Parquet; CSV/JSON on download, see report_store.py)
+    into a timestamped subfolder within base_output_folder.
+    Accepts an optional report_prefix_text to prepend to the folder name.
+    stage_rules/stage_options select the stage segmentation rules (see stage_segmentation.py).
+    With reuse_existing=True, a report already generated from the same file contents and
+    settings is returned as is (results['reused_report'] names its folder).
+    gc_stream selects one 'Sample name' stream of a multi-stream GC file; by default the stream
+    naming the LV file's reactor is used when there are several (see select_gc_stream).
+    schema names the column schema (column_schemas.py); the default keeps every column.
+    compaction names the dtype policy applied to the parsed and merged frames (frame_compaction.py);
+    memory before and after is returned in results['frame_memory'].
+    gc_streams ({stream name: frame}, as from process_gc_streams) skips parsing the GC file;
+    generate_reports_batch uses it to share one parsed GC file between several LV files.
+    merge_mode selects how LV and GC rows are combined (see MERGE_MODES; default nearest GC row);
+    max_gap is the largest sample spacing the interpolating modes interpolate across.
+    resample_interval (e.g. '1min') puts the merged data on a fixed time grid before anything is
+    written, so the overall and per-stage files and plots are grid-aligned (see RESAMPLE_AGGREGATIONS).
+    stage_workers caps the worker processes writing the stages (default STAGE_MAX_WORKERS, see write_stage_reports).
+    progress(phase, message, **details) is called at every phase of the run (see report_progress) with
+    row counts; each finished stage is reported with its results['step_reports'] item as step_report.
+    Returns paths to generated overall files and a list of dicts for step files.
+    """
+    fingerprint = None
+    if reuse_existing:
+        config = processing_config(stage_rules, stage_options, mode='full', gc_stream=gc_stream, schema=schema,
+                                   compaction=compaction, merge_mode=merge_mode, max_gap=max_gap,
+                                   resample_interval=resample_interval)
+        fingerprint = fingerprint_inputs(lv_file_path, gc_file_path, config)
+        existing_results = reuse_existing_report(base_output_folder, fingerprint)
+        if existing_results:
+            return existing_results
+
+    current_run_output_folder = create_report_folder(base_output_folder, report_prefix_text)
 
     results = {
         'overall_plot_path': None, # Path to plot JSON
-        'overall_csv_path': None,
-        'step_reports': [], # Each item will have plot_path (JSON), csv_path, json_path
+        'overall_data_path': None, # Stored data (Parquet)
+        'overall_csv_path': None, # Download name, produced from the stored data on request
+        'stage_boundaries_path': None,
+        'step_reports': [], # Each item will have plot_path (JSON), data_path, csv_path, json_path
         'success': False,
         'message': '',
-        'num_stages': 0
+        'num_stages': 0,
+        'parse_timings': {}, # Parser used and seconds taken for the LV and GC files
+        'frame_memory': {} # MB before/after compaction of the LV, GC and merged frames
     }
 
     try:
         print(f"Processing LV file: {lv_file_path}")
-        df_lv_full = process_lv_file(lv_file_path)
+        df_lv_full, stage_boundaries = process_lv_file(lv_file_path, stage_rules=stage_rules,
+                                                       stage_options=stage_options, return_boundaries=True,
+                                                       timings=results['parse_timings'], schema=schema)
         if df_lv_full.empty:
             results['message'] = "LV DataFrame is empty after processing."
             return results
         
-        required_lv_cols = [LV_TEMP_COL, LV_PRESSURE_COL, LV_H2_FLOW_COL, LV_N2_FLOW_COL, LV_N2_POISON_SP_COL, 'RelativeTime', 'Date']
-        missing_lv_cols = [col for col in required_lv_cols if col not in df_lv_full.columns]
+        missing_lv_cols = [col for col in REQUIRED_LV_COLS if col not in df_lv_full.columns]
         if missing_lv_cols:
             results['message'] = f"Error: Required LV columns missing: {missing_lv_cols}"
             return results
@@ -502,44 +1010,79 @@ def generate_reports(lv_file_path, gc_file_path, base_output_folder, report_pref
             num_stages = int(df_lv_full['Stage'].max()) # Cast to standard Python int
             print(f"Detected {num_stages} stages in LV data.")
         results['num_stages'] = num_stages
+        report_progress(progress, 'parse_lv', f"Parsed LV file: {len(df_lv_full)} rows, {num_stages} stages.",
+                        rows=len(df_lv_full), stages=num_stages)
+
+        stage_boundaries_path = os.path.join(current_run_output_folder, "stage_boundaries.csv")
+        try:
+            stage_boundaries.to_csv(stage_boundaries_path, index=False)
+            results['stage_boundaries_path'] = stage_boundaries_path
+            print(f"Saved stage boundary table to: {stage_boundaries_path}")
+        except Exception as e:
+            print(f"Error saving stage boundary table: {e}")
 
         print(f"\nProcessing GC file: {gc_file_path}")
-        df_gc_full = process_gc_file(gc_file_path)
+        if gc_streams is None:
+            gc_streams = process_gc_streams(gc_file_path, timings=results['parse_timings'], schema=schema)
+        df_gc_full, results['gc_stream'] = select_gc_stream(gc_streams, gc_stream, reactor_id_from_lv(lv_file_path))
+        results['gc_streams'] = list(gc_streams)
         if df_gc_full.empty:
             print("Warning: GC DataFrame is empty for overall merge.")
+        report_progress(progress, 'parse_gc', f"Parsed GC file: {len(df_gc_full)} rows.", rows=len(df_gc_full))
+
+        # Compact before merging, so the merge copies (and the writers read) the smaller frames
+        df_lv_full = compact_frame(df_lv_full, compaction, label='lv', memory=results['frame_memory'])
+        df_gc_full = compact_frame(df_gc_full, compaction, label='gc', memory=results['frame_memory'])
 
         print("\nPerforming overall data merge...")
-        df_merged_overall = merge_overall_data(df_lv_full, df_gc_full)
+        df_merged_overall = compact_frame(merge_overall_data(df_lv_full, df_gc_full, merge_mode, max_gap), compaction, label='merged',
+                                          memory=results['frame_memory'])
+        if resample_interval:
+            df_merged_overall = resample_merged_data(df_merged_overall, resample_interval)
+            results['resample_interval'] = str(parse_interval(resample_interval))
+        report_progress(progress, 'merge', f"Merged LV and GC data: {len(df_merged_overall)} rows.", rows=len(df_merged_overall))
         
         # Pass the specific timestamped output folder for this run
-        overall_plot_json_path, overall_csv_path = plot_overall_merged_data(df_merged_overall, current_run_output_folder)
+        overall_plot_json_path, overall_data_path = plot_overall_merged_data(df_merged_overall, current_run_output_folder)
         results['overall_plot_path'] = overall_plot_json_path
-        results['overall_csv_path'] = overall_csv_path
+        overall_paths = data_file_paths(overall_data_path)
+        results['overall_data_path'] = overall_paths['data_path']
+        results['overall_csv_path'] = overall_paths['csv_path']
+        report_progress(progress, 'write', f"Saved overall data and plot ({len(df_merged_overall)} rows).",
+                        rows=len(df_merged_overall), overall_plot_path=results['overall_plot_path'],
+                        overall_data_path=results['overall_data_path'], overall_csv_path=results['overall_csv_path'])
 
         if num_stages > 0:
             print("\nProcessing and plotting per stage...")
+            # Each output row is matched (or interpolated) independently of the others, so the stage frames
+            # are simply the stage slices of the overall merge (no per-stage masking, sorting or merging)
+            all_stage_rows = stage_rows(df_merged_overall) if not df_gc_full.empty else {}
+            rows_by_stage = {} # Stages to write, in stage order
             for step_num in range(1, num_stages + 1):
-                print(f"\n--- Processing Step {step_num} ---")
-                df_lv_step = df_lv_full[df_lv_full['Stage'] == step_num].copy()
-                if df_lv_step.empty:
+                if df_gc_full.empty:
+                    print(f"No data merged for Step {step_num}."); continue
+                if step_num not in all_stage_rows:
                     print(f"No LV data for step {step_num}."); continue
-                
-                step_output_folder = os.path.join(current_run_output_folder, f"step_{step_num}")
-                merged_step_df = merge_step_data(df_lv_step, df_gc_full)
-
-                if not merged_step_df.empty:
-                    plot_json_path, csv_path, json_path = plot_per_step_data(merged_step_df, step_num, step_output_folder)
-                    results['step_reports'].append({
-                        'step_number': step_num,
-                        'plot_path': plot_json_path, # Path to the plot JSON file
-                        'csv_path': csv_path,
-                        'json_path': json_path
-                    })
-                else:
-                    print(f"No data merged for Step {step_num}.")
+                rows_by_stage[step_num] = all_stage_rows[step_num]
+
+            def stage_written(step_num, outputs):
+                rows = rows_by_stage[step_num]
+                rows = rows[1] - rows[0] if isinstance(rows, tuple) else len(rows)
+                report_progress(progress, 'stage', f"Saved stage {step_num} of {num_stages} ({rows} rows).",
+                                stage=step_num, stages=num_stages, rows=rows, step_report=step_report_entry(step_num, *outputs))
+
+            # Stages are independent of each other; large runs are written by worker processes
+            stage_outputs = write_stage_reports(df_merged_overall, rows_by_stage, current_run_output_folder, stage_workers,
+                                                on_stage_written=stage_written)
+            for step_num, (plot_json_path, data_path) in zip(rows_by_stage, stage_outputs):
+                results['step_reports'].append(step_report_entry(step_num, plot_json_path, data_path))
         
         results['success'] = True
         results['message'] = "Processing complete."
+        write_report_manifest(current_run_output_folder, results)
+        if fingerprint:
+            write_report_fingerprint(current_run_output_folder, fingerprint, lv_file_path, gc_file_path, config)
+        catalog_report(current_run_output_folder) # After the fingerprint, which the catalog records
 
     except Exception as e:
         print(f"Error during processing: {e}")
@@ -550,12 +1093,93 @@ def generate_reports(lv_file_path, gc_file_path, base_output_folder, report_pref
         
     return results
 
+# --- Batch Mode: one GC file, several LV files (parallel reactors) ---
+def batch_report_prefix(report_prefix_text, lv_file_path, used_prefixes):
+    """Folder prefix of one batch report: the batch prefix plus the LV reactor id (or file name), made unique."""
+    label = reactor_id_from_lv(lv_file_path) or os.path.splitext(os.path.basename(lv_file_path))[0]
+    prefix = "_".join(filter(None, [(report_prefix_text or '').strip(), label]))
+    candidate, count = prefix, 1
+    while candidate in used_prefixes:
+        count += 1
+        candidate = f"{prefix}_{count}"
+    used_prefixes.add(candidate)
+    return candidate
+
+def generate_reports_batch(lv_file_paths, gc_file_path, base_output_folder, report_prefix_text=None,
+                           stage_rules=None, stage_options=None, reuse_existing=True, schema=None,
+                           compaction=None, max_workers=None, merge_mode=None, max_gap=None,
+                           resample_interval=None):
+    """
+    Processes one GC file against several LV files (one per reactor) in a single job.
+    The GC file is parsed, split into streams, sorted and compacted once; the LV files are then
+    processed concurrently (up to max_workers threads, default BATCH_MAX_WORKERS), each merged with
+    the GC stream of its reactor (see select_gc_stream) into its own report folder
+    (prefix + reactor id + timestamp).
+    Returns {'success', 'message', 'gc_streams', 'parse_timings', 'reports'}, where reports holds the
+    generate_reports results of each LV file in the given order. success is True only if all succeeded.
+    """
+    batch_results = {
+        'success': False,
+        'message': '',
+        'gc_streams': [],
+        'parse_timings': {}, # GC parse, shared by all reports
+        'reports': []
+    }
+    if not lv_file_paths:
+        batch_results['message'] = "No LV files given for the batch."
+        return batch_results
+
+    try:
+        print(f"\nBatch: parsing GC file {gc_file_path} once for {len(lv_file_paths)} LV files")
+        gc_streams = process_gc_streams(gc_file_path, timings=batch_results['parse_timings'], schema=schema)
+        gc_streams = {name: compact_frame(sort_by_date(df), compaction, label=f"gc {name}".strip())
+                      for name, df in gc_streams.items()}
+        batch_results['gc_streams'] = list(gc_streams)
+    except Exception as e:
+        print(f"Error parsing GC file for batch: {e}")
+        import traceback
+        traceback.print_exc()
+        batch_results['message'] = f"An error occurred while parsing the GC file: {e}"
+        return batch_results
+
+    used_prefixes = set()
+    prefixes = [batch_report_prefix(report_prefix_text, path, used_prefixes) for path in lv_file_paths]
+
+    def process_one(lv_file_path, prefix):
+        results = generate_reports(lv_file_path, gc_file_path, base_output_folder, report_prefix_text=prefix,
+                                   stage_rules=stage_rules, stage_options=stage_options,
+                                   reuse_existing=reuse_existing, schema=schema, compaction=compaction,
+                                   gc_streams=gc_streams, merge_mode=merge_mode, max_gap=max_gap,
+                                   resample_interval=resample_interval)
+        results['lv_file'] = os.path.basename(lv_file_path)
+        if 'gc' in batch_results['parse_timings'] and not results.get('reused_report'):
+            results['parse_timings']['gc'] = batch_results['parse_timings']['gc']
+        return results
+
+    with ThreadPoolExecutor(max_workers=max_workers or BATCH_MAX_WORKERS) as executor:
+        batch_results['reports'] = list(executor.map(process_one, lv_file_paths, prefixes))
+
+    failed = [report['lv_file'] for report in batch_results['reports'] if not report.get('success')]
+    batch_results['success'] = not failed
+    if failed:
+        batch_results['message'] = f"{len(lv_file_paths) - len(failed)} of {len(lv_file_paths)} reports generated; failed: {failed}"
+    else:
+        batch_results['message'] = f"Batch complete: {len(lv_file_paths)} reports generated."
+    print(batch_results['message'])
+    return batch_results
+
 # --- New Function for Generating Comparison Plot ---
+# Columns the comparison plots read from the stage data (projected read; absent names are skipped)
+COMPARISON_COLUMNS = ['RelativeTime'] + [name for col in [LV_TEMP_COL, GC_NH3_COL, LV_PRESSURE_COL, LV_H2_FLOW_COL,
+                                                          LV_N2_FLOW_COL, LV_N2_POISON_SP_COL]
+                                         for name in (f"{col}_LV", f"{col}_GC", col)]
+
 def generate_comparison_plot(stage_data_json_paths, report_folder_abs, comparison_prefix_text=None):
     """
     Generates a plot comparing selected variables from multiple stages against RelativeTime.
     Args:
-        stage_data_json_paths (list): List of absolute paths to stage data JSON files.
+        stage_data_json_paths (list): List of absolute paths to stage data files
+                                      (step_N_data.parquet, or step_N_data.json of older reports).
         report_folder_abs (str): Absolute path to the main report folder for this run 
                                 (e.g., 'static/reports/YYYYMMDD_HHMMSS'),
                                 used to save the comparison plot.
@@ -591,7 +1215,7 @@ def generate_comparison_plot(stage_data_json_paths, report_folder_abs, compariso
 
     for i, json_path in enumerate(stage_data_json_paths):
         try:
-            stage_df = pd.read_json(json_path, orient='records')
+            stage_df = read_report_frame(json_path, columns=COMPARISON_COLUMNS)
             stage_num = "Unknown" # Fallback
             # Try to infer stage number from file path (might need adjustment based on actual path structure)
             try:
@@ -673,8 +1297,9 @@ def generate_comparison_plot(stage_data_json_paths, report_folder_abs, compariso
     fig.update_yaxes(**axis_style)
 
     try:
-        pio.write_json(fig, plot_json_filename)
+        write_figure(fig, plot_json_filename)
         print(f"Saved stage comparison plot to: {plot_json_filename}")
+        catalog_report(report_folder_abs)
         return plot_json_filename # Return absolute path
     except Exception as e:
         print(f"Error saving stage comparison plot JSON: {e}")
@@ -777,8 +1402,7 @@ def create_cross_comparison_plot(selected_comparison_json_file_paths, current_re
     # 1. Process pre-existing comparison_plot JSONs
     for json_full_path in selected_comparison_json_file_paths:
         try:
-            with open(json_full_path, 'r') as f:
-                existing_plot_json = json.load(f)
+            existing_plot_json = read_figure(json_full_path) # Trace arrays restored from a binary sidecar
             
             # Extract report folder name from path for labelling (e.g., 20250513_181058)
             # Path is like "static/reports/20250513_181058/comparison_plots/stages_comparison_plot_....json"
@@ -818,14 +1442,16 @@ def create_cross_comparison_plot(selected_comparison_json_file_paths, current_re
     # 2. Process selected stages from the current report
     if current_report_timestamp and current_report_selected_stages:
         current_report_folder_abs = os.path.join(base_reports_folder_abs, current_report_timestamp)
+        stage_data = {str(report['step_number']): report['data_path']
+                      for report in collect_report_results(current_report_folder_abs)['step_reports']}
         for stage_num in current_report_selected_stages:
-            stage_data_json_path = os.path.join(current_report_folder_abs, f"step_{stage_num}", f"step_{stage_num}_data.json")
+            stage_data_path = stage_data.get(str(stage_num))
             try:
-                if not os.path.exists(stage_data_json_path):
-                    print(f"Stage data JSON not found for current report stage {stage_num}: {stage_data_json_path}")
+                if stage_data_path is None:
+                    print(f"Stage data not found for current report stage {stage_num}")
                     continue
                 
-                stage_df = pd.read_json(stage_data_json_path, orient='records')
+                stage_df = read_report_frame(stage_data_path, columns=COMPARISON_COLUMNS)
                 if stage_df.empty or 'RelativeTime' not in stage_df.columns:
                     print(f"Data for current report stage {stage_num} is empty or missing RelativeTime.")
                     continue
@@ -860,7 +1486,7 @@ def create_cross_comparison_plot(selected_comparison_json_file_paths, current_re
                 color_idx += 1 # Next color for next stage/source
 
             except Exception as e:
-                print(f"Error processing current report stage {stage_num} from {stage_data_json_path}: {e}")
+                print(f"Error processing current report stage {stage_num} from {stage_data_path}: {e}")
                 # Continue to next stage
     
     if not fig.data:
@@ -889,7 +1515,7 @@ def create_cross_comparison_plot(selected_comparison_json_file_paths, current_re
     fig.update_yaxes(selector=dict(overlaying='y1'), **axis_style) # For y2, y3 etc. that overlay y1
 
     try:
-        pio.write_json(fig, plot_json_filename)
+        write_figure(fig, plot_json_filename)
         print(f"Saved cross-comparison plot to: {plot_json_filename}")
         return plot_json_filename # Return absolute path
     except Exception as e:
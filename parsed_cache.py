@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import pandas as pd
+
+# --- Parsed-Input Cache ---
+# Parsed, cleaned (and for LV, stage-annotated) frames are stored next to uploads/, keyed by
+# the file content hash, the parser version and the settings that affect the result.
+# Re-uploading the same file skips parsing entirely. The folder is kept under
+# PARSED_CACHE_MAX_BYTES by evicting the least recently used entries.
+
+PARSED_CACHE_FOLDER = 'parsed_cache'
+PARSED_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+# Bump when parsing, cleaning or stage detection changes, so older entries are no longer used
+PARSER_VERSION = 3 # 2: relative tolerance of the setpoint_change rule; 3: inferred (integer) GC dtypes
+HASH_BLOCK_BYTES = 1024 * 1024
+
+try:
+    import pyarrow # Optional: Parquet keeps dtypes and index and is compact
+    CACHE_FORMAT = 'parquet'
+except ImportError:
+    CACHE_FORMAT = 'pkl'
+
+
+_content_hashes = {} # (path, size, mtime) -> digest, so one request does not hash a file twice
+
+
+def file_content_hash(filename, block_bytes=HASH_BLOCK_BYTES):
+    """SHA-256 hex digest of a file's content, read in blocks."""
+    stat = os.stat(filename)
+    memo_key = (os.path.abspath(filename), stat.st_size, stat.st_mtime_ns)
+    if memo_key in _content_hashes:
+        return _content_hashes[memo_key]
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(block_bytes), b''):
+            digest.update(block)
+    if len(_content_hashes) > 256:
+        _content_hashes.clear()
+    _content_hashes[memo_key] = digest.hexdigest()
+    return _content_hashes[memo_key]
+
+
+def cache_key(content_hash, kind, config=None):
+    """Key for one parsed file: content hash + kind ('lv'/'gc') + parser version + settings."""
+    key_source = json.dumps([kind, PARSER_VERSION, content_hash, config], sort_keys=True, default=str)
+    return f"{kind}_{hashlib.sha256(key_source.encode('utf-8')).hexdigest()[:32]}"
+
+
+def _cache_path(key, cache_folder):
+    return os.path.join(cache_folder, f"{key}.{CACHE_FORMAT}")
+
+
+def load_cached_frame(key, cache_folder=None):
+    """Returns the cached DataFrame for key, or None. A hit marks the entry as recently used."""
+    path = _cache_path(key, cache_folder or PARSED_CACHE_FOLDER)
+    if not os.path.exists(path):
+        return None
+    try:
+        df = pd.read_parquet(path) if CACHE_FORMAT == 'parquet' else pd.read_pickle(path)
+    except Exception as e:
+        print(f"Could not read cached frame {path} ({e}), parsing the file again.")
+        return None
+    os.utime(path) # The modification time is the LRU clock
+    return df
+
+
+def store_cached_frame(key, df, cache_folder=None, max_bytes=None):
+    """Stores df under key (written atomically), then evicts old entries beyond max_bytes."""
+    cache_folder = cache_folder or PARSED_CACHE_FOLDER
+    path = _cache_path(key, cache_folder)
+    try:
+        os.makedirs(cache_folder, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        if CACHE_FORMAT == 'parquet':
+            df.to_parquet(temp_path)
+        else:
+            df.to_pickle(temp_path)
+        os.replace(temp_path, path)
+    except Exception as e:
+        print(f"Could not cache parsed frame ({e}).")
+        return None
+    evict_cache(cache_folder, max_bytes if max_bytes is not None else PARSED_CACHE_MAX_BYTES)
+    return path
+
+
+def evict_cache(cache_folder=None, max_bytes=None):
+    """Removes least recently used entries until the cache folder is within max_bytes."""
+    cache_folder = cache_folder or PARSED_CACHE_FOLDER
+    max_bytes = max_bytes if max_bytes is not None else PARSED_CACHE_MAX_BYTES
+    if not os.path.isdir(cache_folder):
+        return
+    entries = []
+    for name in os.listdir(cache_folder):
+        path = os.path.join(cache_folder, name)
+        if os.path.isfile(path) and not name.endswith('.tmp'):
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+            print(f"Evicted cached frame: {path}")
+        except OSError as e:
+            print(f"Could not evict cached frame {path}: {e}")
+
+
+def cached_parse(filename, kind, parse, config=None, timings=None):
+    """
+    Returns parse(filename), using the cache when the same content was parsed with the same config.
+    On a hit, timings[kind] (if given) records parser 'cache'.
+    """
+    started = time.perf_counter()
+    key = cache_key(file_content_hash(filename), kind, config)
+    df = load_cached_frame(key)
+    if df is not None:
+        elapsed = time.perf_counter() - started
+        print(f"Loaded {kind.upper()} file from parsed cache: {len(df)} rows in {elapsed:.3f}s")
+        if timings is not None:
+            timings[kind] = {'parser': 'cache', 'seconds': round(elapsed, 4), 'rows': int(len(df))}
+        return df
+    df = parse(filename)
+    store_cached_frame(key, df)
+    return df
+
+
+def cached_parse_groups(filename, kind, parse_groups, config=None, timings=None):
+    """
+    Like cached_parse for a parser returning {name: DataFrame} (e.g. one frame per GC stream).
+    Each group is cached separately, along with the list of group names.
+    """
+    started = time.perf_counter()
+    content_hash = file_content_hash(filename)
+    names_key = cache_key(content_hash, f"{kind}_groups", config)
+    names = load_cached_frame(names_key)
+    if names is not None:
+        groups = {name: load_cached_frame(cache_key(content_hash, kind, dict(config or {}, group=name)))
+                  for name in names['name']}
+        if all(df is not None for df in groups.values()):
+            elapsed = time.perf_counter() - started
+            rows = sum(len(df) for df in groups.values())
+            print(f"Loaded {len(groups)} {kind.upper()} group(s) from parsed cache: {rows} rows in {elapsed:.3f}s")
+            if timings is not None:
+                timings[kind] = {'parser': 'cache', 'seconds': round(elapsed, 4), 'rows': int(rows)}
+            return groups
+    groups = parse_groups(filename)
+    for name, df in groups.items():
+        store_cached_frame(cache_key(content_hash, kind, dict(config or {}, group=name)), df)
+    store_cached_frame(names_key, pd.DataFrame({'name': list(groups)}))
+    return groups
@@ -0,0 +1,158 @@
+import os
+import numpy as np
+import pandas as pd
+from report_store import read_report_frame, iso_date_strings
+
+try:
+    import pyarrow as pa # Optional: without it no pyramid file is stored
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# --- Multi-Resolution Plot Data ---
+# Long frames are not sent to the browser in full. When a plot is generated, a pyramid of
+# min/max-downsampled levels of its plotted columns is built: level k splits the rows into
+# PYRAMID_BASE_BUCKETS * PYRAMID_LEVEL_FACTOR**k equal buckets and keeps, for every column, the
+# rows holding the bucket's minimum and maximum (plus the first and last row), so peaks and
+# dips survive at every level. The plot is drawn from the coarsest level; the levels are stored
+# in <plot name>_pyramid.parquet (one row group per level, with Date statistics), and
+# read_plot_window serves a zoomed time window at full resolution, or from the finest level that
+# stays within PLOT_WINDOW_MAX_POINTS rows.
+
+PYRAMID_BASE_BUCKETS = 500 # Buckets of the coarsest level
+PYRAMID_LEVEL_FACTOR = 4
+PYRAMID_MAX_FRACTION = 0.5 # A level must keep at most this share of the rows to be worth storing
+PLOT_WINDOW_MAX_POINTS = 20000 # Rows returned for one zoom window
+PYRAMID_LEVEL_COLUMN = 'pyramid_level'
+DATE_COLUMN = 'Date'
+
+
+def minmax_rows(df, value_columns, buckets):
+    """
+    Sorted row positions keeping, for each value column, the minimum and maximum of each of
+    `buckets` equal-row buckets, plus the first and last row. NaN values are skipped.
+    """
+    n = len(df)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return np.flatnonzero(keep)
+    keep[[0, -1]] = True
+    bucket = np.arange(n) * buckets // n
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    for col in value_columns:
+        values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+        gaps = np.isnan(values)
+        # Sorting by (bucket, value) puts each bucket's minimum first and its maximum last
+        order = np.lexsort((np.where(gaps, np.inf, values), bucket))
+        keep[order[starts]] = True
+        order = np.lexsort((np.where(gaps, -np.inf, values), bucket))
+        keep[order[ends]] = True
+    return np.flatnonzero(keep)
+
+
+def pyramid_levels(df, value_columns):
+    """
+    [(buckets, row positions)] of the pyramid levels of df, coarsest first. Only levels that keep
+    at most PYRAMID_MAX_FRACTION of the rows are built; short frames get none.
+    """
+    levels = []
+    buckets = PYRAMID_BASE_BUCKETS
+    while True:
+        positions = minmax_rows(df, value_columns, buckets)
+        if len(positions) > PYRAMID_MAX_FRACTION * len(df):
+            return levels
+        levels.append((buckets, positions))
+        buckets *= PYRAMID_LEVEL_FACTOR
+
+
+def build_plot_pyramid(df, value_columns, plot_json_filename, data_filename=None):
+    """
+    Builds the pyramid of df's Date and value_columns (in trace order) for the plot saved at
+    plot_json_filename. Returns (frame to draw the plot from, zoom info or None).
+    The zoom info is stored in the figure file and names the full-resolution data file
+    (data_filename, for read_plot_window), the pyramid file and its levels. Without a data file
+    (e.g. the thinned streaming overall plot) the coarsest level is drawn and there is no zoom info;
+    without pyarrow no pyramid file is stored and zoom windows are downsampled when read.
+    """
+    plot_columns = [DATE_COLUMN] + [col for col in value_columns if col != DATE_COLUMN]
+    levels = pyramid_levels(df, value_columns)
+    if not levels:
+        return df, None # Short enough to plot every row
+
+    coarse_df = df.iloc[levels[0][1]].reset_index(drop=True)
+    if not data_filename:
+        return coarse_df, None
+
+    pyramid_filename = None
+    if pq is not None:
+        pyramid_filename = f"{os.path.splitext(plot_json_filename)[0]}_pyramid.parquet"
+        writer = None
+        try:
+            for level, (_, positions) in enumerate(levels):
+                level_df = df.iloc[positions][plot_columns].reset_index(drop=True)
+                level_df.insert(0, PYRAMID_LEVEL_COLUMN, np.int8(level))
+                table = pa.Table.from_pandas(level_df, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(f"{pyramid_filename}.tmp", table.schema, compression='zstd')
+                writer.write_table(table) # One row group per level
+            writer.close()
+            writer = None
+            os.replace(f"{pyramid_filename}.tmp", pyramid_filename)
+            print(f"Saved plot pyramid ({len(levels)} levels) to: {pyramid_filename}")
+        except Exception as e:
+            # Zoom windows are then downsampled from the data file
+            print(f"Error saving plot pyramid {pyramid_filename}: {e}")
+            pyramid_filename = None
+        finally:
+            if writer is not None:
+                writer.close()
+
+    zoom = {
+        'data': os.path.basename(data_filename),
+        'pyramid': os.path.basename(pyramid_filename) if pyramid_filename else None,
+        'levels': [{'buckets': buckets, 'rows': int(len(positions))} for buckets, positions in levels],
+        'rows': int(len(df)),
+        'x': DATE_COLUMN,
+        'columns': list(value_columns),
+    }
+    return coarse_df, zoom
+
+
+def read_plot_window(plot_folder, zoom, start, end, max_points=None):
+    """
+    Rows of a plot's columns with start <= Date <= end: every row if there are at most max_points
+    (default PLOT_WINDOW_MAX_POINTS), else the finest pyramid level within max_points (or, without
+    a pyramid file, the window downsampled the same way). Returns (frame, level), where level is
+    'full' or the pyramid level number.
+    """
+    max_points = max_points or PLOT_WINDOW_MAX_POINTS
+    columns = [zoom['x']] + zoom['columns']
+    data_filename = os.path.join(plot_folder, zoom['data'])
+    # Counting only needs the Date column; Parquet row groups outside the window are skipped
+    window_rows = len(read_report_frame(data_filename, columns=[zoom['x']], start=start, end=end))
+    if window_rows <= max_points:
+        return read_report_frame(data_filename, columns=columns, start=start, end=end), 'full'
+
+    if zoom.get('pyramid') and os.path.exists(os.path.join(plot_folder, zoom['pyramid'])):
+        # Finest level whose share of the window fits; levels keep roughly rows * level_rows / total rows
+        fitting = [level for level, info in enumerate(zoom['levels'])
+                   if info['rows'] * window_rows / zoom['rows'] <= max_points]
+        level = fitting[-1] if fitting else 0
+        window = pd.read_parquet(os.path.join(plot_folder, zoom['pyramid']), columns=columns,
+                                 filters=[(PYRAMID_LEVEL_COLUMN, '=', level), (zoom['x'], '>=', pd.Timestamp(start)),
+                                          (zoom['x'], '<=', pd.Timestamp(end))])
+        return window, level
+
+    window = read_report_frame(data_filename, columns=columns, start=start, end=end).reset_index(drop=True)
+    return window.iloc[minmax_rows(window, zoom['columns'], max(1, max_points // (2 * len(zoom['columns']) or 1)))], 'downsampled'
+
+
+def window_to_traces(window, zoom):
+    """{'x': ISO dates, 'y': [values per trace]} of a window frame (NaN as null), for the browser."""
+    y = []
+    for col in zoom['columns']:
+        values = window[col] if col in window.columns else pd.Series(np.nan, index=window.index)
+        values = pd.to_numeric(values, errors='coerce').astype(object)
+        y.append(values.where(values.notna(), None).tolist())
+    return {'x': iso_date_strings(window[zoom['x']]).tolist(), 'y': y}
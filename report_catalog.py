@@ -0,0 +1,289 @@
+import os
+import json
+import base64
+import hashlib
+import sqlite3
+from datetime import datetime, timedelta
+from report_index import read_report_manifest, read_report_fingerprint
+
+# --- Report Catalog ---
+# The report and comparison-plot listings are answered from a SQLite catalog (one file per reports
+# folder in REPORT_CATALOG_FOLDER, next to uploads/ and outside the served static folder), instead of
+# listing and checking every report folder on each request.
+# The catalog is updated when a report or comparison plot is written, renamed or deleted
+# (catalog_report, rename_catalog_report, remove_catalog_report). Folders added or removed by other
+# means (command line runs, copied folders) are picked up by sync_catalog: the reports folder's
+# modification time is compared on every listing, and only when it changed is the folder listed
+# again, adding the new reports and dropping the missing ones. Listings are indexed queries with
+# sorting, name-prefix and date filters and cursor (keyset) pagination. The catalog also holds each
+# report's fingerprint (report_index.py), so a request for an identical report is one lookup.
+
+REPORT_CATALOG_FOLDER = 'report_catalog'
+CATALOG_VERSION = 2 # Bump when _SCHEMA changes; an older catalog is dropped and rebuilt from the folders
+CATALOG_PAGE_SIZE = 200
+CATALOG_MAX_PAGE_SIZE = 1000
+CATALOG_SORTS = ('name', 'created') # Report listing sort keys; ties are broken by name
+COMPARISON_PLOTS_FOLDER = 'comparison_plots'
+COMPARISON_PLOT_MARKER = 'stages_comparison_plot_' # With or without a prefix (see generate_comparison_plot)
+NON_REPORT_FOLDERS = ('cross_comparisons',) # Folders of the reports folder that are not reports
+CATALOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    name TEXT PRIMARY KEY,
+    created TEXT NOT NULL,
+    num_stages INTEGER,
+    rows INTEGER,
+    start_time TEXT,
+    end_time TEXT,
+    fingerprint TEXT
+);
+CREATE INDEX IF NOT EXISTS reports_by_created ON reports (created, name);
+CREATE INDEX IF NOT EXISTS reports_by_fingerprint ON reports (fingerprint);
+CREATE TABLE IF NOT EXISTS comparison_plots (
+    report TEXT NOT NULL,
+    name TEXT NOT NULL,
+    created TEXT NOT NULL,
+    PRIMARY KEY (report, name)
+);
+CREATE TABLE IF NOT EXISTS catalog_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def catalog_path(reports_folder):
+    """Catalog file of a reports folder, named after its absolute path."""
+    key = hashlib.sha256(os.path.abspath(reports_folder).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(REPORT_CATALOG_FOLDER, f"reports_{key}.sqlite")
+
+
+def _connect(reports_folder):
+    os.makedirs(REPORT_CATALOG_FOLDER, exist_ok=True)
+    connection = sqlite3.connect(catalog_path(reports_folder), timeout=30)
+    connection.row_factory = sqlite3.Row
+    if connection.execute("PRAGMA user_version").fetchone()[0] != CATALOG_VERSION:
+        connection.executescript("DROP TABLE IF EXISTS reports; DROP TABLE IF EXISTS comparison_plots; "
+                                 "DROP TABLE IF EXISTS catalog_state;")
+        connection.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+    connection.executescript(_SCHEMA)
+    return connection
+
+
+def _modified_text(path):
+    return datetime.fromtimestamp(os.stat(path).st_mtime).strftime(CATALOG_DATE_FORMAT)
+
+
+def _comparison_plot_names(report_folder):
+    folder = os.path.join(report_folder, COMPARISON_PLOTS_FOLDER)
+    if not os.path.isdir(folder):
+        return []
+    return [name for name in os.listdir(folder) if COMPARISON_PLOT_MARKER in name and name.endswith('.json')]
+
+
+def _store_report(connection, reports_folder, name):
+    """Adds or updates one report and its comparison plots from its folder. A report keeps its first 'created' time."""
+    report_folder = os.path.join(reports_folder, name)
+    manifest = read_report_manifest(report_folder) or {}
+    overall = manifest.get('overall') or {}
+    connection.execute(
+        "INSERT INTO reports (name, created, num_stages, rows, start_time, end_time, fingerprint) VALUES (?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (name) DO UPDATE SET num_stages = excluded.num_stages, rows = excluded.rows, "
+        "start_time = excluded.start_time, end_time = excluded.end_time, fingerprint = excluded.fingerprint",
+        (name, _modified_text(report_folder), len(manifest['stages']) if 'stages' in manifest else None,
+         overall.get('rows'), overall.get('start'), overall.get('end'), read_report_fingerprint(report_folder)))
+    connection.execute("DELETE FROM comparison_plots WHERE report = ?", (name,))
+    comparison_folder = os.path.join(report_folder, COMPARISON_PLOTS_FOLDER)
+    connection.executemany("INSERT INTO comparison_plots (report, name, created) VALUES (?, ?, ?)",
+                           [(name, plot_name, _modified_text(os.path.join(comparison_folder, plot_name)))
+                            for plot_name in _comparison_plot_names(report_folder)])
+
+
+def sync_catalog(reports_folder, connection=None):
+    """
+    Brings the catalog in line with the report folders, if the reports folder changed since the
+    last sync: new folders are added, missing ones removed. Otherwise costs one stat call.
+    """
+    own_connection = connection is None
+    connection = connection or _connect(reports_folder)
+    try:
+        modified = str(os.stat(reports_folder).st_mtime_ns) # Read before listing, so a change during the sync is seen next time
+        row = connection.execute("SELECT value FROM catalog_state WHERE key = 'reports_mtime'").fetchone()
+        if row is not None and row['value'] == modified:
+            return
+        names = {name for name in os.listdir(reports_folder)
+                 if name not in NON_REPORT_FOLDERS and os.path.isdir(os.path.join(reports_folder, name))}
+        with connection:
+            known = {row['name'] for row in connection.execute("SELECT name FROM reports")}
+            for name in names - known:
+                try:
+                    _store_report(connection, reports_folder, name)
+                except FileNotFoundError:
+                    names.discard(name) # Removed while listing
+            for name in known - names:
+                connection.execute("DELETE FROM reports WHERE name = ?", (name,))
+                connection.execute("DELETE FROM comparison_plots WHERE report = ?", (name,))
+            connection.execute("INSERT OR REPLACE INTO catalog_state (key, value) VALUES ('reports_mtime', ?)", (modified,))
+        print(f"Report catalog synced: {len(names - known)} added, {len(known - names)} removed.")
+    finally:
+        if own_connection:
+            connection.close()
+
+
+def _update_catalog(reports_folder, description, update):
+    """Runs update(connection) in one transaction. Errors are printed; folders added or removed are still caught by sync_catalog."""
+    try:
+        connection = _connect(reports_folder)
+        try:
+            with connection:
+                update(connection)
+        finally:
+            connection.close()
+    except Exception as e:
+        print(f"Could not update report catalog ({description}): {e}")
+
+
+def catalog_report(report_folder):
+    """Records a report written or changed (new files, comparison plots added or deleted)."""
+    reports_folder, name = os.path.split(os.path.normpath(report_folder))
+    _update_catalog(reports_folder, f"report {name}", lambda connection: _store_report(connection, reports_folder, name))
+
+
+def rename_catalog_report(reports_folder, old_name, new_name):
+    def update(connection):
+        connection.execute("UPDATE reports SET name = ? WHERE name = ?", (new_name, old_name))
+        connection.execute("UPDATE comparison_plots SET report = ? WHERE report = ?", (new_name, old_name))
+    _update_catalog(reports_folder, f"rename {old_name} to {new_name}", update)
+
+
+def remove_catalog_report(reports_folder, name):
+    def update(connection):
+        connection.execute("DELETE FROM reports WHERE name = ?", (name,))
+        connection.execute("DELETE FROM comparison_plots WHERE report = ?", (name,))
+    _update_catalog(reports_folder, f"remove {name}", update)
+
+
+def find_catalog_report(reports_folder, fingerprint):
+    """
+    Folder of a report with this fingerprint (see report_index.report_fingerprint), or None.
+    Catalog errors are printed and answered with None: the report is then computed again.
+    """
+    if not os.path.isdir(reports_folder):
+        return None
+    try:
+        connection = _connect(reports_folder)
+        try:
+            sync_catalog(reports_folder, connection)
+            rows = connection.execute("SELECT name FROM reports WHERE fingerprint = ? ORDER BY created DESC",
+                                      (fingerprint,)).fetchall()
+        finally:
+            connection.close()
+    except Exception as e:
+        print(f"Could not look up report fingerprint in the catalog: {e}")
+        return None
+    for row in rows:
+        report_folder = os.path.join(reports_folder, row['name'])
+        if read_report_fingerprint(report_folder) == fingerprint: # Not removed or rewritten since it was catalogued
+            return report_folder
+    return None
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Position of a cursor returned by a listing; ValueError if it is not one."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError("Invalid cursor.")
+    if not isinstance(values, list) or len(values) != 2 or not all(isinstance(value, str) for value in values):
+        raise ValueError("Invalid cursor.")
+    return values
+
+
+def parse_catalog_date(text, end=False):
+    """
+    Catalog time text of a date filter ('2025-05-02' or '2025-05-02 10:16[:02]', 'T' allowed).
+    A date alone as the end of a range covers the whole day. ValueError if it cannot be read.
+    """
+    try:
+        moment = datetime.fromisoformat(text.strip())
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid date '{text}'. Use YYYY-MM-DD or YYYY-MM-DD HH:MM:SS.")
+    if end and len(text.strip()) == 10:
+        moment += timedelta(days=1) - timedelta(seconds=1)
+    return moment.strftime(CATALOG_DATE_FORMAT)
+
+
+def _page_size(limit):
+    return max(1, min(int(limit or CATALOG_PAGE_SIZE), CATALOG_MAX_PAGE_SIZE))
+
+
+def _prefix_condition(column, prefix, conditions, parameters):
+    """Name-prefix filter as a range on the column, so it uses the index."""
+    if prefix:
+        conditions.append(f"{column} >= ? AND {column} < ?")
+        parameters.extend([prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)])
+
+
+def list_catalog_reports(reports_folder, prefix=None, created_from=None, created_to=None, sort='name',
+                         descending=True, limit=None, cursor=None):
+    """
+    One page of reports: ([{'name', 'created', 'num_stages', 'rows', 'start', 'end'}], next cursor or None).
+    prefix keeps names starting with it; created_from/created_to (catalog time text, see
+    parse_catalog_date) bound the creation time. sort is one of CATALOG_SORTS. cursor continues
+    after the last report of the previous page.
+    """
+    if sort not in CATALOG_SORTS:
+        raise ValueError(f"Unknown sort '{sort}'. Available: {list(CATALOG_SORTS)}")
+    page_size = _page_size(limit)
+    direction, comparison = ('DESC', '<') if descending else ('ASC', '>')
+    conditions, parameters = [], []
+    _prefix_condition('name', prefix, conditions, parameters)
+    if created_from:
+        conditions.append("created >= ?"); parameters.append(created_from)
+    if created_to:
+        conditions.append("created <= ?"); parameters.append(created_to)
+    if cursor:
+        conditions.append(f"({sort}, name) {comparison} (?, ?)"); parameters.extend(decode_cursor(cursor))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+    connection = _connect(reports_folder)
+    try:
+        sync_catalog(reports_folder, connection)
+        rows = connection.execute(
+            f"SELECT name, created, num_stages, rows, start_time, end_time FROM reports {where} "
+            f"ORDER BY {sort} {direction}, name {direction} LIMIT ?", (*parameters, page_size + 1)).fetchall()
+    finally:
+        connection.close()
+    reports = [{'name': row['name'], 'created': row['created'], 'num_stages': row['num_stages'], 'rows': row['rows'],
+                'start': row['start_time'], 'end': row['end_time']} for row in rows[:page_size]]
+    next_cursor = encode_cursor([reports[-1][sort], reports[-1]['name']]) if len(rows) > page_size else None
+    return reports, next_cursor
+
+
+def list_catalog_comparison_plots(reports_folder, report_prefix=None, limit=None, cursor=None):
+    """
+    One page of the comparison plots of all reports, ordered by report and file name:
+    ([{'report', 'name', 'created'}], next cursor or None). report_prefix keeps reports whose name starts with it.
+    """
+    page_size = _page_size(limit)
+    conditions, parameters = [], []
+    _prefix_condition('report', report_prefix, conditions, parameters)
+    if cursor:
+        conditions.append("(report, name) > (?, ?)"); parameters.extend(decode_cursor(cursor))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+    connection = _connect(reports_folder)
+    try:
+        sync_catalog(reports_folder, connection)
+        rows = connection.execute(f"SELECT report, name, created FROM comparison_plots {where} ORDER BY report, name LIMIT ?",
+                                  (*parameters, page_size + 1)).fetchall()
+    finally:
+        connection.close()
+    plots = [dict(row) for row in rows[:page_size]]
+    next_cursor = encode_cursor([plots[-1]['report'], plots[-1]['name']]) if len(rows) > page_size else None
+    return plots, next_cursor
@@ -0,0 +1,205 @@
+import os
+import glob
+import json
+import hashlib
+from datetime import datetime
+from report_store import find_report_data, data_file_paths, report_frame_summary
+
+# --- Report Fingerprints ---
+# Every finished report folder records a fingerprint of its inputs (LV and GC content hashes)
+# and of the processing configuration. A request with the same fingerprint returns the
+# existing report instead of computing an identical new one; the report catalog
+# (report_catalog.find_catalog_report) finds it with one indexed lookup.
+
+REPORT_FINGERPRINT_FILE = 'report_fingerprint.json'
+REPORT_FORMAT_VERSION = 2 # Bump when report outputs change, so older reports are not reused
+
+
+def report_fingerprint(lv_hash, gc_hash, config):
+    """Fingerprint of one report: input content hashes + processing configuration (a JSON-able dict)."""
+    source = json.dumps([REPORT_FORMAT_VERSION, lv_hash, gc_hash, config], sort_keys=True, default=str)
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+
+def write_report_fingerprint(report_folder, fingerprint, lv_file_path=None, gc_file_path=None, config=None):
+    """Records the fingerprint of a successfully generated report."""
+    info = {
+        'fingerprint': fingerprint,
+        'lv_file': os.path.basename(lv_file_path) if lv_file_path else None,
+        'gc_file': os.path.basename(gc_file_path) if gc_file_path else None,
+        'config': config,
+        'created': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    try:
+        with open(os.path.join(report_folder, REPORT_FINGERPRINT_FILE), 'w') as f:
+            json.dump(info, f, indent=2, default=str)
+    except Exception as e:
+        print(f"Could not save report fingerprint: {e}")
+
+
+def read_report_fingerprint(report_folder):
+    """Fingerprint recorded in a report folder, or None (no or unreadable fingerprint file)."""
+    path = os.path.join(report_folder, REPORT_FINGERPRINT_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f).get('fingerprint')
+    except Exception as e:
+        print(f"Could not read report fingerprint {path}: {e}")
+        return None
+
+
+# --- Report Manifests ---
+# A finished report also records its contents in manifest.json: the overall and per-stage file
+# paths (relative to the report folder, so a renamed report stays valid), row counts, Date ranges
+# and data sizes. Loading a report then takes one file read instead of listing the step_* folders
+# and checking every file. The manifest is written last and replaced in one step; it is removed
+# while a report is rewritten (live-run refresh), so readers fall back to scanning the folder, as
+# for reports written before manifests.
+
+REPORT_MANIFEST_FILE = 'manifest.json'
+REPORT_MANIFEST_VERSION = 1
+
+
+def _manifest_entry(report_folder, plot_path, data_path, csv_path=None, json_path=None):
+    """Manifest record of one stored frame: relative paths plus its row count, Date range and size."""
+    def relative(path):
+        return os.path.relpath(path, report_folder).replace(os.sep, '/') if path else None
+
+    entry = {'plot': relative(plot_path), 'data': relative(data_path), 'csv': relative(csv_path), 'json': relative(json_path),
+             'rows': None, 'start': None, 'end': None, 'bytes': None}
+    if data_path:
+        entry.update(report_frame_summary(data_path))
+    return entry
+
+
+def write_report_manifest(report_folder, results):
+    """
+    Records the outputs of a finished report (a generate_reports results dict, absolute paths) in the
+    report's manifest. Errors are printed; readers then scan the folder.
+    """
+    manifest_path = os.path.join(report_folder, REPORT_MANIFEST_FILE)
+    try:
+        manifest = {
+            'version': REPORT_MANIFEST_VERSION,
+            'created': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'overall': _manifest_entry(report_folder, results.get('overall_plot_path'), results.get('overall_data_path'),
+                                       results.get('overall_csv_path')),
+            'stage_boundaries': os.path.basename(results['stage_boundaries_path']) if results.get('stage_boundaries_path') else None,
+            'stages': [dict(step_number=report['step_number'],
+                            **_manifest_entry(report_folder, report.get('plot_path'), report.get('data_path'),
+                                              report.get('csv_path'), report.get('json_path')))
+                       for report in sorted(results.get('step_reports', []), key=lambda report: report['step_number'])],
+        }
+        with open(f"{manifest_path}.tmp", 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(f"{manifest_path}.tmp", manifest_path)
+        print(f"Saved report manifest ({len(manifest['stages'])} stages) to: {manifest_path}")
+    except Exception as e:
+        print(f"Could not save report manifest: {e}")
+
+
+def read_report_manifest(report_folder):
+    """The report's manifest, or None if it has none (older report, being rewritten) or it cannot be read."""
+    manifest_path = os.path.join(report_folder, REPORT_MANIFEST_FILE)
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Could not read report manifest {manifest_path}: {e}")
+        return None
+    return manifest if manifest.get('version') == REPORT_MANIFEST_VERSION else None
+
+
+def remove_report_manifest(report_folder):
+    """Removes the manifest of a report whose files are about to change."""
+    manifest_path = os.path.join(report_folder, REPORT_MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+
+def refresh_report_manifest(report_folder):
+    """Rewrites a report's manifest from its files (e.g. after one was deleted). Reports without one are left as they are."""
+    if read_report_manifest(report_folder) is not None:
+        write_report_manifest(report_folder, scan_report_results(report_folder))
+
+
+def _results_from_manifest(report_folder, manifest):
+    def absolute(path):
+        return os.path.join(report_folder, *path.split('/')) if path else None
+
+    overall = manifest['overall']
+    step_reports = [{'step_number': stage['step_number'], 'plot_path': absolute(stage['plot']),
+                     'data_path': absolute(stage['data']), 'csv_path': absolute(stage['csv']),
+                     'json_path': absolute(stage['json'])}
+                    for stage in manifest['stages']]
+    return {
+        'overall_plot_path': absolute(overall['plot']),
+        'overall_data_path': absolute(overall['data']),
+        'overall_csv_path': absolute(overall['csv']),
+        'stage_boundaries_path': absolute(manifest['stage_boundaries']),
+        'step_reports': step_reports,
+        'success': True,
+        'message': '',
+        'num_stages': len(step_reports)
+    }
+
+
+def collect_report_results(report_folder):
+    """
+    Builds the results structure of generate_reports (absolute paths) of an existing report folder:
+    from its manifest, or by scanning its files (scan_report_results) when it has none.
+    """
+    manifest = read_report_manifest(report_folder)
+    if manifest is not None:
+        return _results_from_manifest(report_folder, manifest)
+    return scan_report_results(report_folder)
+
+
+def scan_report_results(report_folder):
+    """
+    Builds the results structure of generate_reports (absolute paths) from the files of an
+    existing report folder. Missing files are reported as None. Stage and overall data may be
+    stored as Parquet (csv_path/json_path are then produced on download) or as CSV/JSON files.
+    """
+    def existing(*parts):
+        path = os.path.join(report_folder, *parts)
+        return path if os.path.exists(path) else None
+
+    def stored_data(*parts):
+        return data_file_paths(find_report_data(os.path.join(report_folder, *parts)))
+
+    overall_paths = stored_data('overall_merged_data.csv')
+    results = {
+        'overall_plot_path': existing('overall_plot.json'),
+        'overall_data_path': overall_paths['data_path'],
+        'overall_csv_path': overall_paths['csv_path'],
+        'stage_boundaries_path': existing('stage_boundaries.csv'),
+        'step_reports': [],
+        'success': True,
+        'message': '',
+        'num_stages': 0
+    }
+
+    step_numbers = []
+    for step_folder in glob.glob(os.path.join(report_folder, 'step_*')):
+        try:
+            step_numbers.append(int(os.path.basename(step_folder).split('_')[1]))
+        except (IndexError, ValueError):
+            print(f"Warning: Could not parse step number from folder: {os.path.basename(step_folder)}")
+    for step_num in sorted(step_numbers):
+        step_name = f"step_{step_num}"
+        step_data = stored_data(step_name, f"{step_name}_data.json")
+        # Stage plots are generated on first request (main_web_processor.ensure_step_plot), so a stage
+        # with stored data has a plot even before its file exists
+        plot_path = os.path.join(report_folder, step_name, f"{step_name}_plot.json")
+        results['step_reports'].append({
+            'step_number': step_num,
+            'plot_path': plot_path if step_data['data_path'] or os.path.exists(plot_path) else None,
+            **step_data
+        })
+    results['num_stages'] = len(results['step_reports'])
+    return results
@@ -0,0 +1,326 @@
+import io
+import os
+import numpy as np
+import pandas as pd
+
+# --- Report Data Store ---
+# The overall and per-stage merged data of a report are stored once, as Parquet (columnar,
+# compressed, dtypes kept). Row groups carry min/max statistics on 'Date', so time-window reads
+# skip the row groups outside the window. The CSV and JSON files offered for download are
+# produced from the Parquet file when they are requested (export_report_frame) and never stored.
+# Reports written before this store (or without pyarrow installed) keep plain CSV/JSON files;
+# the readers below accept either.
+
+try:
+    import pyarrow as pa # Optional: without it, reports are written as CSV + JSON as before
+    import pyarrow.parquet as pq
+    REPORT_DATA_FORMAT = 'parquet'
+except ImportError:
+    pa = pq = None
+    REPORT_DATA_FORMAT = 'csv'
+
+REPORT_ROW_GROUP_ROWS = 50000 # Rows per Parquet row group (unit of the Date-range skipping)
+REPORT_PARQUET_COMPRESSION = 'zstd'
+EXPORT_FORMATS = ('csv', 'json')
+
+
+def _stem(path):
+    return os.path.splitext(path)[0]
+
+
+def data_file_paths(data_path):
+    """
+    {'data_path', 'csv_path', 'json_path'} of one stored frame. csv_path/json_path name the
+    download files; with a Parquet store they do not exist on disk and are produced on request.
+    """
+    if not data_path:
+        return {'data_path': None, 'csv_path': None, 'json_path': None}
+    stem = _stem(data_path)
+    paths = {'data_path': data_path}
+    for export_format in EXPORT_FORMATS:
+        export_path = f"{stem}.{export_format}"
+        # Without a Parquet file (older reports, streaming overall CSV) only files on disk are offered
+        paths[f"{export_format}_path"] = export_path if data_path.endswith('.parquet') or os.path.exists(export_path) else None
+    return paths
+
+
+def find_report_data(path):
+    """
+    Stored data file behind path (a .parquet, .csv or .json name of the same frame):
+    the Parquet file if there is one, else the CSV or JSON file itself. None if neither exists.
+    """
+    parquet_path = f"{_stem(path)}.parquet"
+    if os.path.exists(parquet_path):
+        return parquet_path
+    return path if os.path.exists(path) else None
+
+
+def write_report_frame(df, data_path_stem, json_copy=False):
+    """
+    Stores df as <data_path_stem>.parquet and returns its path. Without pyarrow, writes
+    <stem>.csv (plus <stem>.json if json_copy) instead and returns the CSV path.
+    """
+    if REPORT_DATA_FORMAT != 'parquet':
+        csv_path = f"{data_path_stem}.csv"
+        df.to_csv(csv_path, index=False)
+        if json_copy:
+            with open(f"{data_path_stem}.json", 'w') as f:
+                f.write(frame_to_json(df))
+        return csv_path
+    data_path = f"{data_path_stem}.parquet"
+    temp_path = f"{data_path}.tmp"
+    df.to_parquet(temp_path, index=False, compression=REPORT_PARQUET_COMPRESSION,
+                  row_group_size=REPORT_ROW_GROUP_ROWS, write_statistics=True)
+    os.replace(temp_path, data_path)
+    return data_path
+
+
+def open_report_frame_writer(data_path_stem, json_copy=False):
+    """
+    Writer storing a frame part by part (append_report_frame), so the whole frame is never held
+    in memory: each part becomes a Parquet row group of <data_path_stem>.parquet. Without pyarrow,
+    parts are appended to <stem>.csv (and <stem>.json if json_copy). The file appears under its
+    name when close_report_frame_writer is called.
+    """
+    data_path = f"{data_path_stem}.{'parquet' if REPORT_DATA_FORMAT == 'parquet' else 'csv'}"
+    json_path = f"{data_path_stem}.json" if json_copy and REPORT_DATA_FORMAT != 'parquet' else None
+    return {'data_path': data_path, 'temp_path': f"{data_path}.tmp", 'json_path': json_path,
+            'parquet_writer': None, 'schema': None, 'rows': 0}
+
+
+def _conform_table(table, schema):
+    """table with the fields of schema, in its order; missing columns are null."""
+    columns = [table.column(field.name).cast(field.type) if field.name in table.column_names
+               else pa.nulls(len(table), field.type) for field in schema]
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def _widen_report_frame_writer(writer, schema):
+    """
+    Rewrites the row groups written so far with a schema that also holds the part's columns and
+    types (e.g. a column that was all null in the first part), one row group at a time.
+    """
+    widened = pa.unify_schemas([writer['schema'].remove_metadata(), schema.remove_metadata()], promote_options='permissive')
+    writer['parquet_writer'].close()
+    widened_path = f"{writer['temp_path']}.widen"
+    parquet_writer = pq.ParquetWriter(widened_path, widened, compression=REPORT_PARQUET_COMPRESSION, write_statistics=True)
+    written = pq.ParquetFile(writer['temp_path'])
+    for i in range(written.num_row_groups):
+        parquet_writer.write_table(_conform_table(written.read_row_group(i), widened))
+    written.close()
+    os.replace(widened_path, writer['temp_path'])
+    writer['parquet_writer'], writer['schema'] = parquet_writer, widened
+
+
+def append_report_frame(writer, df):
+    """Appends the rows of df to a frame opened with open_report_frame_writer."""
+    if df.empty:
+        return
+    if writer['json_path'] is not None:
+        records = frame_to_json(df)[1:-1] # Without the enclosing brackets, see iter_export_report_frame
+        with open(f"{writer['json_path']}.tmp", 'a' if writer['rows'] else 'w') as f:
+            f.write(',' + records if writer['rows'] else '[' + records)
+    if writer['data_path'].endswith('.csv'):
+        df.to_csv(writer['temp_path'], mode='a' if writer['rows'] else 'w', header=not writer['rows'], index=False)
+        writer['rows'] += len(df)
+        return
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if writer['parquet_writer'] is None:
+        writer['schema'] = table.schema
+        writer['parquet_writer'] = pq.ParquetWriter(writer['temp_path'], table.schema,
+                                                    compression=REPORT_PARQUET_COMPRESSION, write_statistics=True)
+    elif not table.schema.equals(writer['schema']):
+        if not set(table.column_names) <= set(writer['schema'].names):
+            _widen_report_frame_writer(writer, table.schema)
+        try:
+            table = _conform_table(table, writer['schema'])
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            _widen_report_frame_writer(writer, table.schema)
+            table = _conform_table(table, writer['schema'])
+    writer['parquet_writer'].write_table(table, row_group_size=REPORT_ROW_GROUP_ROWS)
+    writer['rows'] += len(df)
+
+
+def close_report_frame_writer(writer):
+    """Finishes a frame written with append_report_frame and returns its path (None if no rows were appended)."""
+    if writer['parquet_writer'] is not None:
+        writer['parquet_writer'].close()
+    if not writer['rows']:
+        return None
+    os.replace(writer['temp_path'], writer['data_path'])
+    if writer['json_path'] is not None:
+        with open(f"{writer['json_path']}.tmp", 'a') as f:
+            f.write(']')
+        os.replace(f"{writer['json_path']}.tmp", writer['json_path'])
+    return writer['data_path']
+
+
+def report_data_columns(path):
+    """Column names of a stored frame, without reading its data where the format allows it."""
+    path = find_report_data(path)
+    if path is None:
+        return []
+    if path.endswith('.parquet'):
+        return list(pq.read_schema(path).names) if pq is not None else list(pd.read_parquet(path).columns)
+    if path.endswith('.json'):
+        return list(pd.read_json(path, orient='records').columns)
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def report_frame_summary(path):
+    """
+    {'rows', 'start', 'end' (ISO text of the first and last Date, None without dates), 'bytes'} of a
+    stored frame. A Parquet file is summarized from its footer (row count, Date statistics) without
+    reading its data; older CSV/JSON files read their Date column.
+    """
+    data_path = find_report_data(path)
+    if data_path is None:
+        raise FileNotFoundError(f"No report data found for {path}")
+    summary = {'rows': 0, 'start': None, 'end': None, 'bytes': os.path.getsize(data_path)}
+    if data_path.endswith('.parquet') and pq is not None:
+        parquet_file = pq.ParquetFile(data_path)
+        metadata = parquet_file.metadata
+        summary['rows'] = metadata.num_rows
+        date_index = parquet_file.schema_arrow.get_field_index('Date')
+        statistics = [metadata.row_group(i).column(date_index).statistics
+                      for i in range(metadata.num_row_groups)] if date_index >= 0 else []
+        bounds = [(stats.min, stats.max) for stats in statistics if stats is not None and stats.has_min_max]
+        if bounds and len(bounds) == len(statistics):
+            summary['start'] = pd.Timestamp(min(low for low, _ in bounds)).isoformat()
+            summary['end'] = pd.Timestamp(max(high for _, high in bounds)).isoformat()
+            return summary
+    if data_path.endswith('.csv'):
+        dates = pd.read_csv(data_path, usecols=lambda column: column == 'Date')
+    else:
+        dates = read_report_frame(data_path, columns=['Date'])
+    summary['rows'] = len(dates)
+    if 'Date' in dates.columns and dates['Date'].notna().any():
+        dates = pd.to_datetime(dates['Date'])
+        summary['start'], summary['end'] = dates.min().isoformat(), dates.max().isoformat()
+    return summary
+
+
+def read_report_frame(path, columns=None, start=None, end=None):
+    """
+    Reads a stored frame (see find_report_data). columns projects the read to the listed names
+    that exist in the file (missing names are skipped); start/end keep rows with start <= Date <= end,
+    pruning whole row groups by their Date statistics. Older CSV/JSON files are read in full and filtered.
+    """
+    data_path = find_report_data(path)
+    if data_path is None:
+        raise FileNotFoundError(f"No report data found for {path}")
+    if columns is not None:
+        available = report_data_columns(data_path)
+        columns = [col for col in dict.fromkeys(columns) if col in available]
+    date_filters = []
+    if start is not None:
+        date_filters.append(('Date', '>=', pd.Timestamp(start)))
+    if end is not None:
+        date_filters.append(('Date', '<=', pd.Timestamp(end)))
+
+    if data_path.endswith('.parquet'):
+        return pd.read_parquet(data_path, columns=columns, filters=date_filters or None)
+    if data_path.endswith('.json'):
+        df = pd.read_json(data_path, orient='records')
+    else:
+        df = pd.read_csv(data_path)
+    if date_filters and 'Date' in df.columns:
+        dates = pd.to_datetime(df['Date'])
+        keep = pd.Series(True, index=df.index)
+        if start is not None:
+            keep &= dates >= pd.Timestamp(start)
+        if end is not None:
+            keep &= dates <= pd.Timestamp(end)
+        df = df[keep]
+    return df[columns] if columns is not None else df
+
+
+def read_report_frame_head(path, rows):
+    """
+    First rows of a stored frame (see find_report_data). A Parquet file is read only as far as its
+    first batch of rows, so previews of large files stay cheap; CSV files read only those rows.
+    """
+    data_path = find_report_data(path)
+    if data_path is None:
+        raise FileNotFoundError(f"No report data found for {path}")
+    if data_path.endswith('.parquet') and pq is not None:
+        parquet_file = pq.ParquetFile(data_path)
+        batch = next(parquet_file.iter_batches(batch_size=rows), None)
+        batches = [batch] if batch is not None else []
+        return pa.Table.from_batches(batches, schema=parquet_file.schema_arrow).to_pandas()
+    if data_path.endswith('.csv'):
+        return pd.read_csv(data_path, nrows=rows)
+    return read_report_frame(data_path).head(rows)
+
+
+def iso_date_strings(series):
+    """
+    ISO 8601 text of a datetime column, converted in one vectorized step. Same text as
+    Timestamp.isoformat() at microsecond resolution ('2025-02-05T17:40:26', fractions only when set);
+    NaT becomes null.
+    """
+    text = np.datetime_as_string(series.to_numpy(dtype='datetime64[us]'), unit='us')
+    text = pd.Series(text, index=series.index, dtype=object).str.removesuffix('.000000')
+    return text.where(series.notna().to_numpy(), None)
+
+
+def frame_to_json(df):
+    """
+    Compact records JSON of a frame ([{column: value, ...}, ...], ISO dates). Only the datetime
+    columns are converted (vectorized, see iso_date_strings); the rest is encoded by pandas'
+    C JSON writer straight from the column arrays, without per-cell Python objects.
+    """
+    date_positions = [i for i, dtype in enumerate(df.dtypes) if pd.api.types.is_datetime64_dtype(dtype)]
+    if date_positions:
+        df = df.copy(deep=False)
+        for i in date_positions:
+            df.isetitem(i, iso_date_strings(df.iloc[:, i]))
+    return df.to_json(orient='records', lines=False)
+
+
+def _iter_stored_parts(data_path):
+    """Stored frame in parts: one per Parquet row group (older CSV/JSON files: a single part)."""
+    if data_path.endswith('.parquet') and pq is not None:
+        parquet_file = pq.ParquetFile(data_path)
+        for i in range(parquet_file.num_row_groups):
+            yield parquet_file.read_row_group(i).to_pandas()
+    else:
+        yield read_report_frame(data_path)
+
+
+def iter_export_report_frame(path, export_format):
+    """
+    Yields the CSV or JSON text of a stored frame piece by piece (one piece per Parquet row group),
+    so a download is streamed without building the whole text or frame in memory.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{export_format}'. Available: {list(EXPORT_FORMATS)}")
+    data_path = find_report_data(path)
+    if data_path is None:
+        raise FileNotFoundError(f"No report data found for {path}")
+    if data_path.endswith(f".{export_format}"):
+        with open(data_path, 'r', encoding='utf-8') as f:
+            for block in iter(lambda: f.read(1024 * 1024), ''):
+                yield block
+        return
+    if export_format == 'json':
+        yield '['
+    first = True
+    for part in _iter_stored_parts(data_path):
+        if export_format == 'csv':
+            buffer = io.StringIO()
+            part.to_csv(buffer, index=False, header=first)
+            yield buffer.getvalue()
+        else:
+            records = frame_to_json(part)[1:-1] # Without the enclosing brackets
+            if not records:
+                continue
+            yield records if first else ',' + records
+        first = False
+    if export_format == 'json':
+        yield ']'
+
+
+def export_report_frame(path, export_format):
+    """CSV or JSON text of a stored frame, produced from its Parquet file (or read as stored)."""
+    return ''.join(iter_export_report_frame(path, export_format))
@@ -0,0 +1,67 @@
+import pandas as pd
+
+# --- Fixed-Grid Resampling ---
+# Puts a merged LV+GC frame on a regular time grid (e.g. 1 min or 10 min). Each grid cell of each
+# stage becomes one row, stamped with the start of the cell, so stage files stay separate even
+# when a cell spans a stage change. Every column is aggregated with its own function; names not
+# listed in the aggregations map fall back to default_aggregation.
+
+SETPOINT_MARKERS = ('set-point', 'setpoint', 'set point')
+MIN_INTERVAL = pd.Timedelta('1s') # Finer grids would be larger than the raw merge
+
+
+def default_aggregation(column, series):
+    """'last' for setpoints and text columns, 'mean' for other numeric columns."""
+    if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return 'last'
+    if any(marker in column.lower() for marker in SETPOINT_MARKERS):
+        return 'last'
+    return 'mean'
+
+
+def aggregation_for(column, series, aggregations=None):
+    """Aggregation of one column; merge suffixes ('_LV'/'_GC') are ignored when looking it up."""
+    aggregations = aggregations or {}
+    for name in (column, column.removesuffix('_LV').removesuffix('_GC')):
+        if name in aggregations:
+            return aggregations[name]
+    return default_aggregation(column, series)
+
+
+def parse_interval(interval):
+    """
+    Grid interval as a Timedelta of at least MIN_INTERVAL ('1min', '10min', '30s', a Timedelta, ...).
+    A bare number ('10', 10) is read as minutes, like the other minute settings, not as nanoseconds.
+    """
+    text = interval
+    try:
+        if isinstance(interval, str):
+            interval = interval.strip()
+            try:
+                interval = float(interval)
+            except ValueError:
+                pass
+        if isinstance(interval, (int, float)) and not isinstance(interval, bool):
+            interval = pd.Timedelta(minutes=interval)
+        interval = pd.Timedelta(interval)
+    except (ValueError, TypeError, OverflowError):
+        raise ValueError(f"Invalid resampling interval '{text}'. Use e.g. '30s', '1min' or '10min'.")
+    if interval is pd.NaT or not interval >= MIN_INTERVAL:
+        raise ValueError(f"The resampling interval must be at least {MIN_INTERVAL.total_seconds():g} s, got '{text}'.")
+    return interval
+
+
+def resample_frame(df, interval, aggregations=None, group_col='Stage'):
+    """
+    Returns df aggregated onto a grid of `interval` (one grouped pass, no per-row Python work).
+    Rows are grouped by group_col (if present) and grid cell; 'Date' becomes the cell start.
+    aggregations maps column names to pandas aggregation names ('mean', 'last', 'max', ...).
+    """
+    interval = parse_interval(interval)
+    grid = df['Date'].dt.floor(interval)
+    keys = [df[group_col], grid] if group_col in df.columns else [grid]
+    value_columns = [col for col in df.columns if col not in ('Date', group_col)]
+    agg = {col: aggregation_for(col, df[col], aggregations) for col in value_columns}
+    resampled = df[value_columns].groupby(keys, sort=True, observed=True).agg(agg).reset_index()
+    # Same column order as the input
+    return resampled[[col for col in df.columns if col in resampled.columns]]
@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+
+# --- Stage Segmentation for LV Data ---
+# Every rule returns a boolean "break" array: True at row i means row i opens a new stage.
+# Rules are evaluated on whole columns, so the cost is linear in the number of rows
+# and no per-row Python work is done.
+
+SETPOINT_COLUMNS = ['H2 Set-Point', 'Pressure setpoint', 'N2 poisoning set-point']
+DEFAULT_GAP_THRESHOLD = pd.Timedelta('30 minutes')
+DEFAULT_STAGE_RULES = ['relative_time_reset'] # Same rule as the original row-by-row loop
+# Logged setpoints drift by a few hundredths between rows; only a relative change above this opens a stage
+DEFAULT_SETPOINT_TOLERANCE = 0.01
+
+_missing_setpoint_columns = set() # Reported once, not on every call (the streaming path calls per chunk)
+
+
+def _float_values(df, column):
+    return pd.to_numeric(df[column], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+
+
+def relative_time_reset_breaks(df, column='RelativeTime', **kwargs):
+    """A new stage starts whenever RelativeTime drops below the previous row's value."""
+    breaks = np.zeros(len(df), dtype=bool)
+    if column not in df.columns or len(df) < 2:
+        return breaks
+    values = _float_values(df, column)
+    # Comparisons involving NaN are False, matching the notna() checks of the old loop
+    breaks[1:] = values[1:] < values[:-1]
+    return breaks
+
+
+def setpoint_change_breaks(df, setpoint_columns=None, setpoint_tolerance=DEFAULT_SETPOINT_TOLERANCE, **kwargs):
+    """
+    A new stage starts whenever one of the setpoint columns changes value by more than
+    setpoint_tolerance, relative to the larger of the two values (0 counts every change).
+    """
+    breaks = np.zeros(len(df), dtype=bool)
+    if len(df) < 2:
+        return breaks
+    for column in (setpoint_columns or SETPOINT_COLUMNS):
+        if column not in df.columns:
+            if column not in _missing_setpoint_columns:
+                _missing_setpoint_columns.add(column)
+                print(f"Warning: Setpoint column '{column}' not found, skipping it for stage detection.")
+            continue
+        values = _float_values(df, column)
+        previous, current = values[:-1], values[1:]
+        # Comparisons involving NaN are False, so missing values never open a stage
+        breaks[1:] |= np.abs(current - previous) > setpoint_tolerance * np.maximum(np.abs(previous), np.abs(current))
+    return breaks
+
+
+def data_gap_breaks(df, gap_threshold=DEFAULT_GAP_THRESHOLD, date_column='Date', **kwargs):
+    """A new stage starts after a logging gap longer than gap_threshold."""
+    breaks = np.zeros(len(df), dtype=bool)
+    if date_column not in df.columns or len(df) < 2:
+        return breaks
+    dates = df[date_column].to_numpy(dtype='datetime64[ns]')
+    gaps = dates[1:] - dates[:-1]
+    # NaT gaps compare False, so missing dates never open a stage on their own
+    breaks[1:] = gaps > np.timedelta64(pd.Timedelta(gap_threshold).value, 'ns')
+    return breaks
+
+
+STAGE_RULES = {
+    'relative_time_reset': relative_time_reset_breaks,
+    'setpoint_change': setpoint_change_breaks,
+    'data_gap': data_gap_breaks,
+}
+
+
+def stage_boundaries(stages, dates=None):
+    """
+    Builds the stage boundary table from a per-row stage array.
+    Args:
+        stages (array-like): Stage number of every row, in row order.
+        dates (array-like, optional): Timestamp of every row, used for start/end times.
+    Returns:
+        pd.DataFrame: One row per stage with Stage, start_row, end_row (inclusive),
+                      rows, start_time and end_time.
+    """
+    stages = np.asarray(stages)
+    columns = ['Stage', 'start_row', 'end_row', 'rows', 'start_time', 'end_time']
+    if len(stages) == 0:
+        return pd.DataFrame(columns=columns)
+
+    starts = np.flatnonzero(np.r_[True, stages[1:] != stages[:-1]])
+    ends = np.r_[starts[1:] - 1, len(stages) - 1]
+    boundaries = pd.DataFrame({
+        'Stage': stages[starts],
+        'start_row': starts,
+        'end_row': ends,
+        'rows': ends - starts + 1,
+    })
+    if dates is not None:
+        dates = pd.to_datetime(pd.Series(dates)).to_numpy()
+        boundaries['start_time'] = dates[starts]
+        boundaries['end_time'] = dates[ends]
+    else:
+        boundaries['start_time'] = pd.NaT
+        boundaries['end_time'] = pd.NaT
+    return boundaries[columns]
+
+
+def segment_stages(df, rules=None, start_stage=1, previous_row=None, **rule_options):
+    """
+    Assigns a stage number to every row of a Date-sorted LV DataFrame.
+    Args:
+        df (pd.DataFrame): LV data sorted by Date.
+        rules (list, optional): Names from STAGE_RULES to combine; a stage boundary is
+                                placed wherever any rule fires. Defaults to DEFAULT_STAGE_RULES.
+        start_stage (int): Stage number given to the first row.
+        previous_row (pd.DataFrame, optional): Last row of the preceding chunk, which belongs
+                                to start_stage. Used when data is segmented chunk by chunk, so
+                                the first row of df only opens a new stage if a rule fires.
+        **rule_options: Passed to every rule (e.g. gap_threshold, setpoint_columns).
+    Returns:
+        tuple: (stages as an int64 numpy array, stage boundary DataFrame)
+    """
+    rules = rules or DEFAULT_STAGE_RULES
+    unknown_rules = [rule for rule in rules if rule not in STAGE_RULES]
+    if unknown_rules:
+        raise ValueError(f"Unknown stage rule(s): {unknown_rules}. Available: {list(STAGE_RULES)}")
+
+    frame = df if previous_row is None else pd.concat([previous_row, df], ignore_index=True)
+    breaks = np.zeros(len(frame), dtype=bool)
+    for rule in rules:
+        breaks |= STAGE_RULES[rule](frame, **rule_options)
+    if len(breaks):
+        breaks[0] = False # The first row always belongs to start_stage
+    if previous_row is not None:
+        breaks = breaks[len(previous_row):]
+
+    stages = np.cumsum(breaks, dtype=np.int64) + start_stage
+    dates = df['Date'] if 'Date' in df.columns else None
+    return stages, stage_boundaries(stages, dates)
@@ -41,6 +41,9 @@ document.addEventListener('DOMContentLoaded', () => {
 
     // Report Contents Elements
     const viewReportContentsButton = document.getElementById('view-report-contents-button');
+    const refreshReportButton = document.getElementById('refresh-report-button');
+    const refreshLvFileInput = document.getElementById('refresh-lv-file');
+    const refreshGcFileInput = document.getElementById('refresh-gc-file');
     const reportContentsModal = document.getElementById('report-contents-modal');
     const reportContentsTree = document.getElementById('report-contents-tree');
     const refreshContentsButton = document.getElementById('refresh-contents-button');
@@ -140,6 +143,10 @@ document.addEventListener('DOMContentLoaded', () => {
         viewReportContentsButton.addEventListener('click', handleViewReportContentsClick);
     }
 
+    if (refreshReportButton) {
+        refreshReportButton.addEventListener('click', handleRefreshReportClick);
+    }
+
     if (refreshContentsButton) {
         refreshContentsButton.addEventListener('click', () => {
             if (currentReportName) {
@@ -263,13 +270,26 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
-    // Function to fetch the list of reports and populate the dropdown
-    function fetchAndPopulateReportList() {
-        fetch('/list_reports')
+    // Fetches every page of a paginated listing (/list_reports, /list_all_comparison_plots), following
+    // next_cursor, and resolves to the last page's response with the items of all pages under `key`
+    function fetchAllPages(url, key, items = [], cursor = null) {
+        const pageUrl = cursor ? `${url}${url.includes('?') ? '&' : '?'}cursor=${encodeURIComponent(cursor)}` : url;
+        return fetch(pageUrl)
             .then(response => {
-                if (!response.ok) throw new Error('Failed to fetch report list');
+                if (!response.ok) throw new Error(`Failed to fetch ${url}`);
                 return response.json();
             })
+            .then(data => {
+                if (!data.success) return data;
+                items.push(...(data[key] || []));
+                if (data.next_cursor) return fetchAllPages(url, key, items, data.next_cursor);
+                return { ...data, [key]: items };
+            });
+    }
+
+    // Function to fetch the list of reports and populate the dropdown
+    function fetchAndPopulateReportList() {
+        fetchAllPages('/list_reports', 'reports')
             .then(data => {
                 if (data.success && data.reports && data.reports.length > 0) {
                     reportSelect.innerHTML = '<option value="">Select a report...</option>'; // Clear loading message
@@ -352,19 +372,20 @@ document.addEventListener('DOMContentLoaded', () => {
         uploadStatusMessage.className = '';
         loadingIndicator.style.display = 'block';
 
+        // /process queues the work as a background job; its state is polled until it has finished
         fetch('/process', {
             method: 'POST',
             body: formData
         })
-        .then(response => {
-            if (!response.ok) {
-                return response.json().then(err => { throw new Error(err.message || `Server error: ${response.status}`); })
-                               .catch(() => { throw new Error(`Server error: ${response.status}`); });
-            }
-            return response.json();
-        })
+        .then(response => response.json()
+            .catch(() => { throw new Error(`Server error: ${response.status}`); })
+            .then(data => {
+                if (!response.ok || !data.success) throw new Error(data.message || `Server error: ${response.status}`);
+                return waitForJob(data.status_url, data.events_url);
+            }))
         .then(data => {
             loadingIndicator.style.display = 'none';
+            loadingIndicator.textContent = 'Processing... Please wait.';
             if (data.success) {
                 uploadStatusMessage.textContent = data.message || 'Processing successful!';
                 uploadStatusMessage.className = 'status-success';
@@ -376,6 +397,7 @@ document.addEventListener('DOMContentLoaded', () => {
         })
         .catch(error => {
             loadingIndicator.style.display = 'none';
+            loadingIndicator.textContent = 'Processing... Please wait.';
             uploadStatusMessage.textContent = 'Error: ' + error.message;
             uploadStatusMessage.className = 'status-error';
             console.error('Error during fetch /process:', error);
@@ -383,6 +405,64 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
+    const JOB_POLL_INTERVAL_MS = 1000;
+
+    // Follows a background job until it has finished and resolves with its results. Progress events
+    // (Server-Sent Events from /jobs/<id>/events) update the loading indicator, and the overall plot and
+    // every finished stage are shown as soon as they are saved. Without EventSource support, or if the
+    // stream breaks, the job is polled instead.
+    function waitForJob(statusUrl, eventsUrl) {
+        if (!window.EventSource || !eventsUrl) return pollJob(statusUrl);
+        return new Promise((resolve, reject) => {
+            const source = new EventSource(eventsUrl);
+            const finish = () => {
+                source.close();
+                pollJob(statusUrl).then(resolve, reject);
+            };
+            source.addEventListener('progress', event => showJobProgress(JSON.parse(event.data)));
+            source.addEventListener('end', finish);
+            source.onerror = finish;
+        });
+    }
+
+    function showJobProgress(event) {
+        loadingIndicator.textContent = `${event.message} (${event.elapsed.toFixed(1)} s)`;
+        if (event.phase === 'write' && event.overall_plot_path) {
+            resultsDiv.style.display = 'block';
+            fetchAndRenderPlotly(event.overall_plot_path, overallPlotDiv);
+        }
+        if (event.phase === 'stage' && event.step_report) {
+            resultsDiv.style.display = 'block';
+            stageSelectorScrollContainer.style.display = 'block';
+            stageProcessingSection.style.display = 'block';
+            addStageButton(event.step_report);
+        }
+    }
+
+    // Polls a background job (/jobs/<id>) until it has finished and resolves with its results.
+    // The loading indicator shows the job's place in the queue while it waits.
+    function pollJob(statusUrl) {
+        return new Promise((resolve, reject) => {
+            function poll() {
+                fetch(statusUrl)
+                    .then(response => response.json().then(data => {
+                        if (!response.ok || !data.success) throw new Error(data.message || `Server error: ${response.status}`);
+                        const job = data.job;
+                        if (job.state === 'done' || job.state === 'failed') {
+                            resolve(data.results);
+                            return;
+                        }
+                        loadingIndicator.textContent = job.state === 'queued'
+                            ? `Queued (position ${job.queue_position})... Please wait.`
+                            : 'Processing... Please wait.';
+                        setTimeout(poll, JOB_POLL_INTERVAL_MS);
+                    }))
+                    .catch(reject);
+            }
+            poll();
+        });
+    }
+
     // Common function to reset the results display area
     function resetResultsUI() {
         resultsDiv.style.display = 'none';
@@ -427,18 +507,7 @@ document.addEventListener('DOMContentLoaded', () => {
             stageSelectorScrollContainer.style.display = 'block';
             stageProcessingSection.style.display = 'block';
             
-            data.step_reports.forEach(step => {
-                const button = document.createElement('button');
-                button.type = 'button'; 
-                button.className = 'stage-selector-button';
-                button.textContent = `Stage ${step.step_number}`;
-                button.value = step.step_number;
-                button.dataset.plotPath = step.plot_path || 'None';
-                button.dataset.csvPath = step.csv_path || 'None';
-                button.dataset.jsonPath = step.json_path || 'None';
-                button.addEventListener('click', handleStageButtonClick); 
-                stageSelectorItems.appendChild(button);
-            });
+            data.step_reports.forEach(addStageButton);
         } else {
             stageSelectorScrollContainer.style.display = 'none';
             stageProcessingSection.style.display = 'none';
@@ -448,6 +517,20 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
 
+    // Adds the selector button of one stage (an item of step_reports)
+    function addStageButton(step) {
+        const button = document.createElement('button');
+        button.type = 'button'; 
+        button.className = 'stage-selector-button';
+        button.textContent = `Stage ${step.step_number}`;
+        button.value = step.step_number;
+        button.dataset.plotPath = step.plot_path || 'None';
+        button.dataset.csvPath = step.csv_path || 'None';
+        button.dataset.jsonPath = step.json_path || 'None';
+        button.addEventListener('click', handleStageButtonClick); 
+        stageSelectorItems.appendChild(button);
+    }
+
     // --- Handler for Stage Button Clicks ---
     function handleStageButtonClick(event) {
         const button = event.target;
@@ -510,6 +593,58 @@ document.addEventListener('DOMContentLoaded', () => {
          }
     }
 
+    const TRACE_ARRAY_TYPES = { float64: Float64Array, float32: Float32Array, int8: Int8Array, int16: Int16Array, int32: Int32Array };
+
+    // Puts the trace arrays of a plot saved with a binary sidecar (figure_store.py) back into its traces.
+    // Numbers become typed arrays viewing the sidecar buffer; dates are epoch milliseconds on 'date' axes.
+    function loadTraceArrays(plotData, plotJsonPath) {
+        if (!plotData.trace_arrays) return Promise.resolve(plotData);
+        const folder = plotJsonPath.substring(0, plotJsonPath.lastIndexOf('/') + 1);
+        return fetch('/' + folder + plotData.trace_arrays.file)
+            .then(response => {
+                if (!response.ok) throw new Error(`Failed to fetch plot arrays: ${response.status} ${response.statusText} for ${plotJsonPath}`);
+                return response.arrayBuffer();
+            })
+            .then(buffer => {
+                plotData.trace_arrays.arrays.forEach(array => {
+                    const ArrayType = TRACE_ARRAY_TYPES[array.dtype];
+                    plotData.data[array.trace][array.key] = new ArrayType(buffer, array.offset, array.length);
+                });
+                delete plotData.trace_arrays;
+                return plotData;
+            });
+    }
+
+    // Plots of long runs are drawn from a coarse pyramid level (plot_pyramid.py). When the x-axis is zoomed,
+    // the window is fetched from /plot_window (full resolution when it is short enough) and swapped into the
+    // traces; resetting the zoom puts the coarse arrays back.
+    function attachZoomWindows(targetDivElement, plotData, plotJsonPath) {
+        if (!plotData.zoom) return;
+        const traceIndices = plotData.zoom.columns.map((_, i) => i);
+        const coarse = { x: traceIndices.map(i => plotData.data[i].x), y: traceIndices.map(i => plotData.data[i].y) };
+        let requestCounter = 0;
+        targetDivElement.on('plotly_relayout', eventData => {
+            let start = eventData['xaxis.range[0]'];
+            let end = eventData['xaxis.range[1]'];
+            if (eventData['xaxis.range']) [start, end] = eventData['xaxis.range'];
+            const request = ++requestCounter; // Only the latest zoom is applied
+            if (eventData['xaxis.autorange']) {
+                Plotly.restyle(targetDivElement, coarse, traceIndices);
+                return;
+            }
+            if (start === undefined || end === undefined) return;
+            const params = new URLSearchParams({ plot: plotJsonPath, start: start, end: end });
+            fetch(`/plot_window?${params}`)
+                .then(response => response.json())
+                .then(windowData => {
+                    if (request !== requestCounter) return;
+                    if (!windowData.success) throw new Error(windowData.message);
+                    Plotly.restyle(targetDivElement, { x: traceIndices.map(() => windowData.x), y: windowData.y }, traceIndices);
+                })
+                .catch(error => console.error(`Error loading zoom window for ${plotJsonPath}:`, error));
+        });
+    }
+
     // Helper function to fetch and render Plotly JSON
     function fetchAndRenderPlotly(plotJsonPath, targetDivElement) {
         targetDivElement.innerHTML = 'Loading plot...'; 
@@ -518,6 +653,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 if (!response.ok) throw new Error(`Failed to fetch plot data: ${response.status} ${response.statusText} for ${plotJsonPath}`);
                 return response.json();
             })
+            .then(plotData => loadTraceArrays(plotData, plotJsonPath))
             .then(plotData => {
                 const themeColors = getCurrentThemeColors();
 
@@ -560,6 +696,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 }
 
                 Plotly.newPlot(targetDivElement, plotData.data, plotData.layout, {responsive: true});
+                attachZoomWindows(targetDivElement, plotData, plotJsonPath);
                 targetDivElement.dataset.currentPlotPath = plotJsonPath; // Store path for re-rendering on theme change
             })
             .catch(error => {
@@ -695,11 +832,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
     // Function to fetch and populate all comparison plots from all reports
     function fetchAndPopulateAllComparisonPlots() {
-        fetch('/list_all_comparison_plots')
-            .then(response => {
-                if (!response.ok) throw new Error('Failed to fetch comparison plots');
-                return response.json();
-            })
+        fetchAllPages('/list_all_comparison_plots', 'comparison_plots')
             .then(data => {
                 if (data.success && data.comparison_plots && data.comparison_plots.length > 0) {
                     allComparisonPlotsContainer.innerHTML = ''; // Clear loading message
@@ -1033,11 +1166,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
     // Function to fetch and populate the report management dropdown
     function fetchAndPopulateManageReportList() {
-        fetch('/list_reports')
-            .then(response => {
-                if (!response.ok) throw new Error('Failed to fetch report list');
-                return response.json();
-            })
+        fetchAllPages('/list_reports', 'reports')
             .then(data => {
                 if (data.success && data.reports && data.reports.length > 0) {
                     manageReportSelect.innerHTML = '<option value="">Select a report...</option>'; // Clear loading message
@@ -1126,6 +1255,46 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
+    // Handler for "Refresh (New Data)" button click (live-run reports only)
+    function handleRefreshReportClick() {
+        const selectedReportName = manageReportSelect.value;
+        if (!selectedReportName) {
+            manageStatusMessage.textContent = 'Please select a report to refresh.';
+            manageStatusMessage.className = 'status-error';
+            return;
+        }
+
+        manageStatusMessage.textContent = `Refreshing report ${selectedReportName}...`;
+        manageStatusMessage.className = '';
+        loadingIndicator.style.display = 'block';
+
+        // Grown copies of the live run's files; the server's copies of uploaded files never grow
+        const formData = new FormData();
+        if (refreshLvFileInput && refreshLvFileInput.files.length > 0) formData.append('lv_file', refreshLvFileInput.files[0]);
+        if (refreshGcFileInput && refreshGcFileInput.files.length > 0) formData.append('gc_file', refreshGcFileInput.files[0]);
+
+        fetch(`/refresh_report/${selectedReportName}`, { method: 'POST', body: formData })
+        .then(response => response.json().then(data => {
+            if (!response.ok || !data.success) {
+                throw new Error(data.message || `Server error: ${response.status}`);
+            }
+            return data;
+        }))
+        .then(data => {
+            loadingIndicator.style.display = 'none';
+            manageStatusMessage.textContent = data.message || 'Report refreshed.';
+            manageStatusMessage.className = 'status-success';
+            resetResultsUI();
+            displayResults(data);
+        })
+        .catch(error => {
+            loadingIndicator.style.display = 'none';
+            manageStatusMessage.textContent = `Error: ${error.message}`;
+            manageStatusMessage.className = 'status-error';
+            console.error('Error refreshing report:', error);
+        });
+    }
+
     // Handler for "Delete" button click
     function handleDeleteReportClick() {
         const selectedReportName = manageReportSelect.value;
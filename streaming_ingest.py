@@ -0,0 +1,579 @@
+import os
+import json
+import itertools
+import threading
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+import main_web_processor as mwp
+from column_schemas import schema_usecols
+from data_parsers import iter_lv_chunks, iter_gc_chunks, sniff_lv_layout, sniff_gc_layout, DEFAULT_CHUNK_BYTES
+from stage_segmentation import segment_stages
+from report_index import collect_report_results, write_report_manifest, remove_report_manifest
+from report_catalog import catalog_report
+from report_store import open_report_frame_writer, append_report_frame, close_report_frame_writer, read_report_frame
+
+# --- Streaming (chunked) report generation ---
+# LV and GC files are read in fixed-size blocks instead of being loaded whole.
+# Carried between chunks:
+#   - stage detection state: last LV row (RelativeTime, setpoints, Date) and the current stage
+#   - a GC window covering the merge tolerance on both sides of the current LV chunk
+# The open stage's data file and the overall CSV are appended chunk by chunk; a stage is finished
+# (and reported) as soon as the next stage starts. Both files are expected in chronological order, as logged.
+#
+# Incremental mode (runs that are still being logged) saves this state in the report folder,
+# so refresh_report_incremental only parses the bytes appended since the last run.
+
+# Columns kept in memory for the overall figure
+OVERALL_PLOT_BASE_COLS = [mwp.LV_TEMP_COL, mwp.GC_NH3_COL, mwp.LV_H2_FLOW_COL, mwp.LV_N2_FLOW_COL,
+                          mwp.LV_N2_POISON_SP_COL, mwp.LV_PRESSURE_COL, 'Stage']
+# The overall figure would otherwise hold every row of the file; beyond this many rows it is
+# thinned to every n-th row (n doubles as needed). Smaller runs are plotted in full.
+OVERALL_PLOT_MAX_ROWS = 100000
+CSV_DATE_FORMAT = '%Y-%m-%d %H:%M:%S' # Fixed so that every appended block formats Date the same way
+
+# Incremental state files, stored in the report folder
+INGEST_STATE_FILE = 'ingest_state.json' # Byte offsets, file layouts and counters (readable)
+INGEST_FRAMES_FILE = 'ingest_state.pkl' # Rows that may still change: unsettled stages, GC window, plot sample
+
+_refresh_locks = {} # report folder -> lock, so a report is refreshed by one request at a time
+_refresh_locks_guard = threading.Lock()
+
+
+def new_stage_state():
+    """Stage detection state carried across LV chunks."""
+    return {'stage': 1, 'last_row': None, 'offset': None}
+
+
+def iter_staged_lv_chunks(lv_chunks, state, stage_rules=None, stage_options=None, schema=None):
+    """
+    Cleans each LV chunk and assigns stages, continuing from `state` (updated in place).
+    Yields (df, end_offset).
+    """
+    for raw_df, end_offset in lv_chunks:
+        state['offset'] = end_offset
+        df = mwp.prepare_lv_frame(raw_df, schema)
+        if df.empty:
+            continue
+        df = df.sort_values(by='Date', kind='stable').reset_index(drop=True)
+        stages, _ = segment_stages(df, rules=stage_rules, start_stage=state['stage'],
+                                   previous_row=state['last_row'], **(stage_options or {}))
+        df['Stage'] = stages
+        state['stage'] = int(stages[-1])
+        state['last_row'] = df.iloc[[-1]].drop(columns=['Stage'])
+        yield df, end_offset
+
+
+def new_gc_window(gc_chunks, columns=None, buffer=None, end_offset=None):
+    """
+    Sliding window of GC rows around the LV chunk being merged.
+    Rows at or after window['hold_from'] (if set) are never trimmed. If window['stream'] is set,
+    only GC rows of that 'Sample name' stream are kept. window['schema'] is the column schema
+    used to clean each chunk.
+    """
+    if buffer is None:
+        buffer = pd.DataFrame(columns=columns or ['Date'])
+    return {'chunks': gc_chunks, 'buffer': buffer, 'exhausted': False, 'end_offset': end_offset, 'hold_from': None,
+            'stream': None, 'schema': None}
+
+
+def extend_gc_window(window, until):
+    """Reads GC chunks until the window holds every GC row up to `until` (or the GC file ends)."""
+    buffer = window['buffer']
+    parts = [buffer] if not buffer.empty else []
+    last_date = buffer['Date'].iloc[-1] if not buffer.empty else None
+    while not window['exhausted'] and (last_date is None or last_date <= until):
+        raw_df, end_offset = next(window['chunks'], (None, None))
+        if raw_df is None:
+            window['exhausted'] = True
+            break
+        window['end_offset'] = end_offset
+        chunk = mwp.prepare_gc_frame(raw_df, window['schema'])
+        if window['stream'] is not None:
+            chunk = _select_stream_rows(chunk, window['stream'])
+        if chunk.empty:
+            continue
+        parts.append(chunk)
+        last_date = chunk['Date'].max()
+    if parts:
+        buffer = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+        if not buffer['Date'].is_monotonic_increasing:
+            buffer = buffer.sort_values('Date', kind='stable').reset_index(drop=True)
+        window['buffer'] = buffer
+
+
+def _select_stream_rows(chunk, stream):
+    if mwp.GC_STREAM_COL not in chunk.columns:
+        return chunk
+    names = chunk[mwp.GC_STREAM_COL].fillna('').astype(str).str.strip().str.lower()
+    return chunk[names == stream.strip().lower()]
+
+
+def trim_gc_window(window, keep_from):
+    """Drops GC rows that can no longer be matched by later LV rows."""
+    if window['hold_from'] is not None:
+        keep_from = min(keep_from, window['hold_from'])
+    buffer = window['buffer']
+    if not buffer.empty:
+        window['buffer'] = buffer[buffer['Date'] >= keep_from].reset_index(drop=True)
+
+
+def merge_lv_chunk(lv_chunk, window, tolerance=None):
+    """Merges one Date-sorted LV chunk against the GC window, like merge_overall_data."""
+    tolerance = tolerance if tolerance is not None else mwp.MERGE_TOLERANCE
+    extend_gc_window(window, lv_chunk['Date'].iloc[-1] + tolerance)
+    gc_buffer = window['buffer']
+    if list(gc_buffer.columns) == ['Date']:
+        # No GC rows at all; a trimmed (empty) window keeps its columns and is still merged
+        merged = lv_chunk.copy()
+    else:
+        merged = pd.merge_asof(lv_chunk, gc_buffer, on='Date', direction='nearest',
+                               tolerance=tolerance, suffixes=['_LV', '_GC'])
+    # Later LV rows are not earlier than this chunk's last row
+    trim_gc_window(window, lv_chunk['Date'].iloc[-1] - tolerance)
+    return merged
+
+
+def _overall_plot_columns(columns):
+    return [col for col in columns
+            if col == 'Date' or col in OVERALL_PLOT_BASE_COLS
+            or col[:-3] in OVERALL_PLOT_BASE_COLS and col[-3:] in ('_LV', '_GC')]
+
+
+def new_overall_plot_sample():
+    return {'stride': 1, 'parts': [], 'rows': 0}
+
+
+def add_overall_plot_rows(sample, merged, first_row, max_rows=OVERALL_PLOT_MAX_ROWS):
+    """Keeps every sample['stride']-th row (by global row number) of the plotted columns."""
+    row_numbers = np.arange(first_row, first_row + len(merged))
+    keep = row_numbers % sample['stride'] == 0
+    part = merged.loc[keep, _overall_plot_columns(merged.columns)]
+    part.index = row_numbers[keep]
+    sample['parts'].append(part)
+    sample['rows'] += len(part)
+    while sample['rows'] > max_rows:
+        sample['stride'] *= 2
+        kept = pd.concat(sample['parts'])
+        kept = kept[kept.index % sample['stride'] == 0]
+        sample['parts'], sample['rows'] = [kept], len(kept)
+
+
+def _append_boundary(boundaries, stage, start_row, end_row, start_time, end_time):
+    if boundaries and boundaries[-1]['Stage'] == stage:
+        boundaries[-1].update(end_row=end_row, rows=end_row - boundaries[-1]['start_row'] + 1, end_time=end_time)
+    else:
+        boundaries.append({'Stage': stage, 'start_row': start_row, 'end_row': end_row,
+                           'rows': end_row - start_row + 1, 'start_time': start_time, 'end_time': end_time})
+
+
+def open_stage(step_num, output_folder):
+    """Starts a stage's data file; its merged rows are appended as they arrive."""
+    step_output_folder = os.path.join(output_folder, f"step_{step_num}")
+    mwp.remove_step_plot(step_output_folder, step_num)
+    return {'stage': step_num, 'folder': step_output_folder,
+            'writer': open_report_frame_writer(os.path.join(step_output_folder, f"step_{step_num}_data"), json_copy=True)}
+
+
+def write_closed_stage(stage, results, progress=None):
+    """
+    Finishes a stage's data file and records it in results['step_reports']. The stage plot is
+    generated when first requested (see mwp.LAZY_STAGE_PLOTS); with eager plots the stage is read
+    back from its file to be plotted. The stage is reported to progress (see mwp.report_progress);
+    the total number of stages is not known yet.
+    """
+    step_num, rows = stage['stage'], stage['writer']['rows']
+    data_path = close_report_frame_writer(stage['writer'])
+    print(f"Saved step {step_num} data to: {data_path}")
+    if data_path and not mwp.LAZY_STAGE_PLOTS:
+        plot_json_path, _ = mwp.plot_per_step_data(read_report_frame(data_path), step_num, stage['folder'], save_data=False)
+    else:
+        plot_json_path = mwp.step_plot_path(stage['folder'], step_num) if data_path else None
+    results['step_reports'].append(mwp.step_report_entry(step_num, plot_json_path, data_path))
+    mwp.report_progress(progress, 'stage', f"Saved stage {step_num} ({rows} rows).",
+                        stage=step_num, stages=None, rows=rows, step_report=results['step_reports'][-1])
+
+
+def new_stream_run(output_folder):
+    """Output-side state of a streaming run (overall CSV position, open stage, boundaries)."""
+    return {
+        'output_folder': output_folder,
+        'overall_csv_path': os.path.join(output_folder, "overall_merged_data.csv"),
+        'rows_written': 0,
+        'boundaries': [],
+        'open_stage': None,
+        'open_stage_file': None, # Data file of the open stage (open_stage), appended chunk by chunk
+        'overall_plot_sample': new_overall_plot_sample(),
+        'progress': None, # Progress callback of the run (see mwp.report_progress)
+        # Incremental mode only: stages whose merged rows may still change when GC rows are appended,
+        # {stage: {'start_row', 'csv_offset', 'start_time', 'end_time', 'lv_parts'}} in stage order
+        'unsettled': None,
+    }
+
+
+def _settle_stages(run, window, tolerance):
+    """
+    Forgets unsettled stages whose rows can no longer get a different GC match. A stage is settled
+    once it is closed and the GC data reaches past its last row by more than the merge tolerance.
+    """
+    unsettled = run['unsettled']
+    gc_buffer = window['buffer']
+    gc_last = gc_buffer['Date'].iloc[-1] if not gc_buffer.empty else None
+    for step_num in list(unsettled):
+        if step_num == run['open_stage'] or gc_last is None or unsettled[step_num]['end_time'] >= gc_last - tolerance:
+            break
+        del unsettled[step_num]
+    window['hold_from'] = unsettled[next(iter(unsettled))]['start_time'] - tolerance if unsettled else None
+
+
+def stream_merge_chunks(lv_chunks, gc_window, run, results):
+    """
+    Merges staged LV chunks against the GC window and appends them to the overall CSV and to the
+    open stage's data file, finishing every stage that closes. The last stage stays open in
+    run['open_stage_file'].
+    Returns False (with results['message'] set) if required LV columns are missing.
+    """
+    tolerance = mwp.MERGE_TOLERANCE
+    for lv_chunk, _ in lv_chunks:
+        if run['rows_written'] == 0:
+            missing_lv_cols = [col for col in mwp.REQUIRED_LV_COLS if col not in lv_chunk.columns]
+            if missing_lv_cols:
+                results['message'] = f"Error: Required LV columns missing: {missing_lv_cols}"
+                return False
+
+        if run['unsettled'] is not None:
+            # Any row of this chunk may end up unsettled, so keep the GC rows it was merged with
+            chunk_hold_from = lv_chunk['Date'].iloc[0] - tolerance
+            if gc_window['hold_from'] is None or chunk_hold_from < gc_window['hold_from']:
+                gc_window['hold_from'] = chunk_hold_from
+        merged = merge_lv_chunk(lv_chunk, gc_window, tolerance)
+        add_overall_plot_rows(run['overall_plot_sample'], merged, run['rows_written'])
+
+        # Split the chunk by stage; every stage before the chunk's last one is now closed
+        stage_indices = merged.groupby('Stage', sort=True).indices
+        for step_num, idx in stage_indices.items():
+            step_num = int(step_num)
+            part = merged.iloc[idx]
+            start_row = run['rows_written'] + int(idx[0])
+            if step_num != run['open_stage']:
+                if run['open_stage'] is not None:
+                    print(f"\n--- Stage {run['open_stage']} closed, writing outputs ---")
+                    write_closed_stage(run['open_stage_file'], results, run['progress'])
+                run['open_stage'], run['open_stage_file'] = step_num, open_stage(step_num, run['output_folder'])
+                if run['unsettled'] is not None:
+                    csv_offset = os.path.getsize(run['overall_csv_path']) if start_row > 0 else 0
+                    run['unsettled'][step_num] = {'start_row': start_row, 'csv_offset': csv_offset,
+                                                  'start_time': part['Date'].iloc[0], 'lv_parts': []}
+            _append_boundary(run['boundaries'], step_num, start_row, run['rows_written'] + int(idx[-1]),
+                             part['Date'].iloc[0], part['Date'].iloc[-1])
+            part.to_csv(run['overall_csv_path'], mode='a' if start_row > 0 else 'w', header=(start_row == 0),
+                        index=False, date_format=CSV_DATE_FORMAT)
+            append_report_frame(run['open_stage_file']['writer'], part)
+            if run['unsettled'] is not None:
+                run['unsettled'][step_num]['lv_parts'].append(lv_chunk.iloc[idx])
+                run['unsettled'][step_num]['end_time'] = part['Date'].iloc[-1]
+        run['rows_written'] += len(merged)
+        mwp.report_progress(run['progress'], 'merge', f"Merged {run['rows_written']} rows.", rows=run['rows_written'])
+        if run['unsettled'] is not None:
+            _settle_stages(run, gc_window, tolerance)
+    return True
+
+
+def finish_stream_run(run, stage_state, results):
+    """Writes the last (open) stage, the stage boundaries and the overall plot."""
+    if run['open_stage_file'] is not None:
+        print(f"\n--- Stage {run['open_stage']} closed, writing outputs ---")
+        write_closed_stage(run['open_stage_file'], results, run['progress'])
+    print(f"Saved overall merged data to: {run['overall_csv_path']} ({run['rows_written']} rows)")
+    # The overall data stays a CSV in streaming mode: it is appended chunk by chunk, and a refresh
+    # truncates it at a byte offset
+    results['overall_data_path'] = results['overall_csv_path'] = run['overall_csv_path']
+    results['num_stages'] = stage_state['stage']
+
+    stage_boundaries_path = os.path.join(run['output_folder'], "stage_boundaries.csv")
+    pd.DataFrame(run['boundaries']).to_csv(stage_boundaries_path, index=False)
+    results['stage_boundaries_path'] = stage_boundaries_path
+
+    sample = run['overall_plot_sample']
+    overall_plot_df = pd.concat(sample['parts'], ignore_index=True)
+    if sample['stride'] > 1:
+        print(f"Overall plot thinned to every {sample['stride']}th row ({len(overall_plot_df)} rows).")
+    overall_plot_json_path, _ = mwp.plot_overall_merged_data(overall_plot_df, run['output_folder'], save_data=False)
+    results['overall_plot_path'] = overall_plot_json_path
+    mwp.report_progress(run['progress'], 'write', f"Saved overall data and plot ({run['rows_written']} rows).",
+                        rows=run['rows_written'], overall_plot_path=results['overall_plot_path'],
+                        overall_data_path=results['overall_data_path'], overall_csv_path=results['overall_csv_path'])
+
+
+def generate_reports_streaming(lv_file_path, gc_file_path, base_output_folder, report_prefix_text=None,
+                               stage_rules=None, stage_options=None, chunk_bytes=DEFAULT_CHUNK_BYTES,
+                               incremental=False, reuse_existing=True, gc_stream=None, schema=None, progress=None):
+    """
+    Streaming variant of main_web_processor.generate_reports with the same outputs and results structure.
+    LV and GC files are read in blocks of about chunk_bytes, so memory use follows the chunk size
+    rather than the file or stage size: each merged chunk is appended to the overall CSV and to its
+    stage's data file (one Parquet row group per chunk) at once, and only a bounded sample of the
+    plotted overall columns (see OVERALL_PLOT_MAX_ROWS) is held until the end. In incremental mode
+    the LV rows of stages that may still change (normally the open one) are kept for the next refresh.
+    With incremental=True the files may still be growing: a trailing partial line is left for
+    later, and the ingest state is saved so refresh_report_incremental can continue the report.
+    With reuse_existing=True (not incremental), an identical earlier streaming report is returned as is.
+    gc_stream keeps only that 'Sample name' stream of a multi-stream GC file. Unlike generate_reports,
+    the stream is not chosen automatically, since the GC file is never seen whole.
+    schema names the column schema (column_schemas.py); a projecting schema reads only its columns.
+    progress receives the merged row count after every chunk and each stage as it is written
+    (see mwp.report_progress).
+    """
+    fingerprint = None
+    if reuse_existing and not incremental:
+        config = dict(mwp.processing_config(stage_rules, stage_options, mode='streaming', gc_stream=gc_stream,
+                                                schema=schema),
+                      overall_plot_max_rows=OVERALL_PLOT_MAX_ROWS)
+        fingerprint = mwp.fingerprint_inputs(lv_file_path, gc_file_path, config)
+        existing_results = mwp.reuse_existing_report(base_output_folder, fingerprint)
+        if existing_results:
+            return existing_results
+
+    current_run_output_folder = mwp.create_report_folder(base_output_folder, report_prefix_text)
+
+    results = {
+        'overall_plot_path': None,
+        'overall_data_path': None,
+        'overall_csv_path': None,
+        'stage_boundaries_path': None,
+        'step_reports': [],
+        'success': False,
+        'message': '',
+        'num_stages': 0,
+        'parse_timings': {}
+    }
+
+    try:
+        print(f"Streaming LV file {lv_file_path} and GC file {gc_file_path} in {chunk_bytes} byte chunks")
+        stage_state = new_stage_state()
+        lv_chunks = iter_staged_lv_chunks(iter_lv_chunks(lv_file_path, chunk_bytes=chunk_bytes, complete_lines_only=incremental,
+                                                         usecols=schema_usecols(schema, 'lv')),
+                                          stage_state, stage_rules, stage_options, schema)
+        gc_layout = sniff_gc_layout(gc_file_path)
+        gc_window = new_gc_window(iter_gc_chunks(gc_file_path, layout=gc_layout, chunk_bytes=chunk_bytes, complete_lines_only=incremental,
+                                                 usecols=schema_usecols(schema, 'gc')),
+                                  end_offset=gc_layout['data_offset'] if gc_layout else None)
+        gc_window['stream'] = gc_stream or None
+        gc_window['schema'] = schema
+        results['gc_stream'] = gc_window['stream']
+
+        run = new_stream_run(current_run_output_folder)
+        run['progress'] = progress
+        if incremental:
+            run['unsettled'] = {}
+        if not stream_merge_chunks(lv_chunks, gc_window, run, results):
+            return results
+        if run['rows_written'] == 0:
+            results['message'] = "LV DataFrame is empty after processing."
+            return results
+        finish_stream_run(run, stage_state, results)
+        if incremental:
+            save_ingest_state(current_run_output_folder, lv_file_path, gc_file_path, stage_state, gc_window, run,
+                              stage_rules, stage_options)
+
+        results['success'] = True
+        results['message'] = "Processing complete."
+        write_report_manifest(current_run_output_folder, results)
+        if fingerprint:
+            mwp.write_report_fingerprint(current_run_output_folder, fingerprint, lv_file_path, gc_file_path, config)
+        catalog_report(current_run_output_folder) # After the fingerprint, which the catalog records
+
+    except Exception as e:
+        print(f"Error during streaming processing: {e}")
+        import traceback
+        traceback.print_exc()
+        results['message'] = f"An error occurred: {e}"
+        results['success'] = False
+
+    return results
+
+
+# --- Incremental (tail) mode ---
+def save_ingest_state(report_folder, lv_file_path, gc_file_path, stage_state, gc_window, run, stage_rules, stage_options):
+    """Saves what refresh_report_incremental needs to continue this report from the current file ends."""
+    unsettled = run['unsettled']
+    first_unsettled = unsettled[next(iter(unsettled))] if unsettled else None
+    state = {
+        'lv_file': os.path.abspath(lv_file_path),
+        'gc_file': os.path.abspath(gc_file_path),
+        'lv_offset': stage_state['offset'],
+        'gc_offset': gc_window['end_offset'],
+        'lv_columns': sniff_lv_layout(lv_file_path)['columns'],
+        'gc_columns': sniff_gc_layout(gc_file_path)['columns'],
+        'stage': stage_state['stage'],
+        'stage_rules': stage_rules,
+        'gc_stream': gc_window['stream'],
+        'rows_written': run['rows_written'],
+        # Everything from this row (and CSV byte offset) on is rewritten by the next refresh
+        'reprocess_from_row': first_unsettled['start_row'] if first_unsettled else run['rows_written'],
+        'reprocess_from_csv_offset': first_unsettled['csv_offset'] if first_unsettled else os.path.getsize(run['overall_csv_path']),
+        'unsettled_stages': list(unsettled),
+        'updated': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    unsettled_lv = [part for info in unsettled.values() for part in info['lv_parts']]
+    frames = {
+        'stage_options': stage_options,
+        'schema': gc_window['schema'],
+        'last_row': stage_state['last_row'],
+        'unsettled_lv': pd.concat(unsettled_lv, ignore_index=True) if unsettled_lv else None,
+        'gc_buffer': gc_window['buffer'],
+        'boundaries': [b for b in run['boundaries'] if b['Stage'] not in unsettled],
+        'overall_plot_sample': run['overall_plot_sample'],
+    }
+    with open(os.path.join(report_folder, INGEST_STATE_FILE), 'w') as f:
+        json.dump(state, f, indent=2)
+    pd.to_pickle(frames, os.path.join(report_folder, INGEST_FRAMES_FILE))
+    print(f"Saved ingest state: LV offset {state['lv_offset']}, GC offset {state['gc_offset']}, "
+          f"{len(unsettled)} stage(s) to revisit on refresh")
+
+
+def load_ingest_state(report_folder):
+    """Returns (state, frames) saved by an incremental run, or (None, None) if the report has none."""
+    state_path = os.path.join(report_folder, INGEST_STATE_FILE)
+    frames_path = os.path.join(report_folder, INGEST_FRAMES_FILE)
+    if not os.path.exists(state_path) or not os.path.exists(frames_path):
+        return None, None
+    with open(state_path) as f:
+        state = json.load(f)
+    return state, pd.read_pickle(frames_path)
+
+
+def refresh_lock(report_folder):
+    """
+    Lock held while a live-run report is refreshed. Re-entrant, so a caller can hold it around
+    refresh_report_incremental (e.g. while saving grown copies of the source files).
+    """
+    with _refresh_locks_guard:
+        return _refresh_locks.setdefault(os.path.abspath(report_folder), threading.RLock())
+
+
+def ingest_source_files(report_folder):
+    """(LV path, GC path) the last run of a live-run report read, or None if the report has no ingest state."""
+    state_path = os.path.join(report_folder, INGEST_STATE_FILE)
+    if not os.path.exists(state_path):
+        return None
+    with open(state_path) as f:
+        state = json.load(f)
+    return state['lv_file'], state['gc_file']
+
+
+def _check_source_file(path, offset, columns, sniff, label):
+    """Returns an error message if the file is not the same (grown) file the report was built from."""
+    if not os.path.exists(path):
+        return f"{label} file not found: {path}"
+    if os.path.getsize(path) < offset:
+        return f"{label} file is shorter than the part already processed; it was replaced or truncated. Process it as a new report."
+    layout = sniff(path)
+    if layout is None or layout['columns'] != columns:
+        return f"{label} file columns changed since the last run. Process it as a new report."
+    return None
+
+
+def refresh_report_incremental(report_folder, lv_file_path=None, gc_file_path=None, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    Continues an incremental report with the rows appended to its LV and GC files since the last run.
+    Only the new bytes are parsed. Stages whose rows could still change (the open stage, plus any
+    closed stage whose GC data had not caught up) are re-merged and rewritten; all other stage
+    folders are left untouched. Returns the same results structure as generate_reports.
+    Args:
+        report_folder (str): Report folder created by generate_reports_streaming(..., incremental=True).
+        lv_file_path, gc_file_path (str, optional): Grown copies of the source files, if they are no
+                                longer at the paths recorded in the report.
+    Only one refresh of a report runs at a time (refresh_lock); a second one returns at once with 'busy'.
+    """
+    results = {
+        'overall_plot_path': None,
+        'overall_data_path': None,
+        'overall_csv_path': None,
+        'stage_boundaries_path': None,
+        'step_reports': [],
+        'success': False,
+        'message': '',
+        'num_stages': 0,
+        'parse_timings': {}
+    }
+
+    lock = refresh_lock(report_folder)
+    if not lock.acquire(blocking=False):
+        results['message'] = "This report is already being refreshed. Try again when that refresh is done."
+        results['busy'] = True
+        return results
+
+    try:
+        state, frames = load_ingest_state(report_folder)
+        if state is None:
+            results['message'] = "This report was not created in incremental mode and cannot be refreshed."
+            return results
+        lv_file_path = lv_file_path or state['lv_file']
+        gc_file_path = gc_file_path or state['gc_file']
+        for error in (_check_source_file(lv_file_path, state['lv_offset'], state['lv_columns'], sniff_lv_layout, 'LV'),
+                      _check_source_file(gc_file_path, state['gc_offset'], state['gc_columns'], sniff_gc_layout, 'GC')):
+            if error:
+                results['message'] = error
+                return results
+        print(f"Refreshing {report_folder}: LV from byte {state['lv_offset']}, GC from byte {state['gc_offset']}")
+
+        # Stage folders before the first unsettled stage stay as they are
+        first_rewritten_stage = min(state['unsettled_stages'] or [state['stage'] + 1])
+        results['step_reports'] = [report for report in collect_report_results(report_folder)['step_reports']
+                                   if report['step_number'] < first_rewritten_stage]
+        remove_report_manifest(report_folder) # Readers scan the folder until the refresh is done
+
+        # Rewind the outputs to the first stage that may still change
+        run = new_stream_run(report_folder)
+        run['unsettled'] = {}
+        run['rows_written'] = state['reprocess_from_row']
+        run['boundaries'] = frames['boundaries']
+        with open(run['overall_csv_path'], 'r+b') as f:
+            f.truncate(state['reprocess_from_csv_offset'])
+        sample = frames['overall_plot_sample']
+        kept = pd.concat(sample['parts']) if sample['parts'] else None
+        if kept is not None:
+            kept = kept[kept.index < run['rows_written']]
+        sample['parts'], sample['rows'] = ([kept] if kept is not None else []), (len(kept) if kept is not None else 0)
+        run['overall_plot_sample'] = sample
+
+        # Unsettled LV rows (already staged) first, then the new LV rows
+        schema = frames.get('schema')
+        stage_state = {'stage': state['stage'], 'last_row': frames['last_row'], 'offset': state['lv_offset']}
+        new_lv_chunks = iter_staged_lv_chunks(
+            iter_lv_chunks(lv_file_path, start_offset=state['lv_offset'], chunk_bytes=chunk_bytes, complete_lines_only=True,
+                           usecols=schema_usecols(schema, 'lv')),
+            stage_state, state['stage_rules'], frames['stage_options'], schema)
+        replay = [(frames['unsettled_lv'], state['lv_offset'])] if frames['unsettled_lv'] is not None else []
+        gc_window = new_gc_window(
+            iter_gc_chunks(gc_file_path, start_offset=state['gc_offset'], chunk_bytes=chunk_bytes, complete_lines_only=True,
+                           usecols=schema_usecols(schema, 'gc')),
+            buffer=frames['gc_buffer'], end_offset=state['gc_offset'])
+        gc_window['stream'] = state.get('gc_stream')
+        gc_window['schema'] = schema
+        if replay:
+            gc_window['hold_from'] = frames['unsettled_lv']['Date'].iloc[0] - mwp.MERGE_TOLERANCE
+
+        if not stream_merge_chunks(itertools.chain(replay, new_lv_chunks), gc_window, run, results):
+            return results
+        finish_stream_run(run, stage_state, results)
+        save_ingest_state(report_folder, lv_file_path, gc_file_path, stage_state, gc_window, run,
+                          state['stage_rules'], frames['stage_options'])
+
+        results['success'] = True
+        results['message'] = f"Report refreshed: {run['rows_written'] - state['rows_written']} new rows."
+        write_report_manifest(report_folder, results)
+        catalog_report(report_folder)
+
+    except Exception as e:
+        print(f"Error during incremental refresh: {e}")
+        import traceback
+        traceback.print_exc()
+        results['message'] = f"An error occurred: {e}"
+        results['success'] = False
+    finally:
+        lock.release()
+
+    return results
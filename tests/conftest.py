@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_LV = os.path.join(ROOT, 'uploads', 'LVOriginalFile_-_2025-05-02T101602.806.txt')
+SAMPLE_GC = os.path.join(ROOT, 'uploads', 'GCOriginalFile_-_2025-05-02T101602.806.txt')
+LV_HEADER_LINES = 4 # 'Data' and 'Experiment' lines, header, units
+GC_HEADER_LINES = 1
+
+
+@pytest.fixture(autouse=True)
+def run_in_tmp_path(tmp_path, monkeypatch):
+    """Runtime folders (parsed_cache/, report_catalog/) are created in the test's own folder."""
+    monkeypatch.chdir(tmp_path)
+
+
+def copy_head(source, target, header_lines, rows):
+    """Copies the header lines and the first `rows` data rows of a file (all rows if rows is None)."""
+    with open(source, 'rb') as f:
+        lines = f.readlines()
+    with open(target, 'wb') as f:
+        f.writelines(lines[:header_lines + rows] if rows is not None else lines)
+    return str(target)
+
+
+@pytest.fixture
+def sample_files(tmp_path):
+    """Copies of the sample LV and GC files, cut to their first rows (about 10 hours, 2 stages)."""
+    os.makedirs(tmp_path / 'inputs', exist_ok=True)
+    lv = copy_head(SAMPLE_LV, tmp_path / 'inputs' / 'lv.txt', LV_HEADER_LINES, 120)
+    gc = copy_head(SAMPLE_GC, tmp_path / 'inputs' / 'gc.txt', GC_HEADER_LINES, 150)
+    return lv, gc
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Flask test client of the web app, with its upload and report folders under tmp_path."""
+    import app as web_app
+    os.makedirs(tmp_path / 'static' / 'reports', exist_ok=True)
+    os.makedirs(tmp_path / 'uploads', exist_ok=True)
+    monkeypatch.setattr(web_app.app, 'static_folder', str(tmp_path / 'static'))
+    monkeypatch.setitem(web_app.app.config, 'REPORTS_FOLDER', str(tmp_path / 'static' / 'reports'))
+    monkeypatch.setattr(web_app, 'REPORTS_FOLDER', str(tmp_path / 'static' / 'reports')) # Used by the processing jobs
+    monkeypatch.setitem(web_app.app.config, 'UPLOAD_FOLDER', str(tmp_path / 'uploads'))
+    web_app.app.config['TESTING'] = True
+    return web_app.app.test_client()
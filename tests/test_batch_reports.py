@@ -0,0 +1,36 @@
+import os
+import shutil
+
+import main_web_processor as mwp
+from report_store import export_report_frame
+
+
+def test_batch_processes_every_lv_file_against_one_gc_parse(tmp_path, sample_files):
+    lv, gc = sample_files
+    second_lv = str(tmp_path / 'inputs' / 'lv_copy.txt')
+    shutil.copyfile(lv, second_lv)
+    batch = mwp.generate_reports_batch([lv, second_lv], gc, str(tmp_path / 'reports'), report_prefix_text='run',
+                                       reuse_existing=False)
+    assert batch['success'], batch['message']
+    assert batch['gc_streams'] == ['Stream 2 - R150']
+    assert [report['lv_file'] for report in batch['reports']] == ['lv.txt', 'lv_copy.txt']
+    folders = [os.path.basename(os.path.dirname(report['overall_data_path'])) for report in batch['reports']]
+    assert folders[0].startswith('run_R150_') and folders[1].startswith('run_R150_2_')
+
+    single = mwp.generate_reports(lv, gc, str(tmp_path / 'single'), reuse_existing=False)
+    for report in batch['reports']:
+        assert export_report_frame(report['overall_data_path'], 'csv') == export_report_frame(single['overall_data_path'], 'csv')
+
+
+def test_batch_without_lv_files_fails(tmp_path, sample_files):
+    batch = mwp.generate_reports_batch([], sample_files[1], str(tmp_path / 'reports'))
+    assert not batch['success'] and batch['reports'] == []
+
+
+def test_batch_report_prefix_falls_back_to_the_file_name(tmp_path):
+    other = tmp_path / 'reactor7.txt' # No LV 'Experiment' line to take the reactor id from
+    other.write_text('DateTime\tRelativeTime\n')
+    used = set()
+    assert mwp.batch_report_prefix(' run ', str(other), used) == 'run_reactor7'
+    assert mwp.batch_report_prefix(None, str(other), used) == 'reactor7'
+    assert mwp.batch_report_prefix(' run ', str(other), used) == 'run_reactor7_2'
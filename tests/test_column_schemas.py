@@ -0,0 +1,40 @@
+import pytest
+
+import column_schemas
+import data_parsers
+import main_web_processor as mwp
+from report_store import report_data_columns
+
+
+def test_schema_usecols_projects_only_compact_schemas():
+    assert column_schemas.schema_usecols('skid_nh3', 'lv') is None
+    usecols = column_schemas.schema_usecols('skid_nh3_compact', 'lv')
+    assert usecols[0] == 'DateTime'
+    assert {'T Heater 1', 'T Heater UP', 'H2 Set-Point'} <= set(usecols)
+    assert column_schemas.schema_usecols('skid_nh3_compact', 'gc') == ['Date', 'NH3', 'Sample name']
+    with pytest.raises(ValueError):
+        column_schemas.get_schema('unknown')
+
+
+def test_canonical_renames_prefers_existing_canonical_names():
+    assert column_schemas.canonical_renames(None, 'lv', ['DateTime', 'T Heater UP']) == {'T Heater UP': 'T Heater 1'}
+    assert column_schemas.canonical_renames(None, 'lv', ['T Heater 1', 'T Heater UP']) == {}
+
+
+def test_projected_read_keeps_only_schema_columns(sample_files):
+    lv, gc = sample_files
+    usecols = column_schemas.schema_usecols('skid_nh3_compact', 'lv')
+    projected = data_parsers.read_lv_table(lv, usecols=usecols)
+    full = data_parsers.read_lv_table(lv)
+    assert set(projected.columns) == (set(usecols) - {'DateTime'}) & set(full.columns) | {'Date'}
+    assert projected['T Heater 1'].tolist() == full['T Heater 1'].tolist()
+    assert list(data_parsers.read_gc_table(gc, usecols=column_schemas.schema_usecols('skid_nh3_compact', 'gc')).columns) == \
+        ['Date', 'NH3', 'Sample name']
+
+
+def test_compact_schema_report_holds_only_mapped_columns(tmp_path, sample_files):
+    results = mwp.generate_reports(*sample_files, str(tmp_path / 'reports'), schema='skid_nh3_compact')
+    assert results['success'], results['message']
+    columns = report_data_columns(results['step_reports'][0]['data_path'])
+    assert 'NH3' in columns and 'T Heater 1' in columns
+    assert 'RT (sec)' not in columns
@@ -0,0 +1,108 @@
+import gzip
+import os
+import shutil
+import zipfile
+
+import pandas as pd
+import pytest
+
+import data_parsers
+
+
+def test_sniff_lv_layout_reads_metadata_and_columns(sample_files):
+    lv, _ = sample_files
+    layout = data_parsers.sniff_lv_layout(lv)
+    assert layout['metadata']['Experiment'] == '003_R150'
+    assert layout['columns'][:2] == ['DateTime', 'RelativeTime']
+    assert layout['skiprows'] == 4
+
+
+def test_fast_gc_parse_matches_legacy_parser(sample_files):
+    _, gc = sample_files
+    timings = {}
+    fast = data_parsers.read_gc_table(gc, timings=timings, engines=['c'])
+    legacy = data_parsers.read_gc_legacy(gc)
+    assert timings['gc']['parser'] == 'c'
+    assert fast['Date'].tolist() == legacy['Date'].tolist()
+    assert fast['NH3'].tolist() == legacy['NH3'].tolist()
+    # Whole-number peak areas stay integers, as the legacy parser infers them
+    assert fast['Area'].dtype == 'Int64'
+    assert fast['Area'].tolist() == legacy['Area'].tolist()
+
+
+def test_gc_parse_falls_back_to_legacy_parser_on_unexpected_values(tmp_path, sample_files):
+    _, gc = sample_files
+    with open(gc) as f:
+        lines = f.readlines()
+    fields = lines[1].split('\t')
+    fields[10] = 'offline' # NH3 is read as float64 by the fast engines
+    lines[1] = '\t'.join(fields)
+    broken = tmp_path / 'gc_broken.txt'
+    broken.write_text(''.join(lines))
+
+    timings = {}
+    df = data_parsers.read_gc_table(str(broken), timings=timings, engines=['c'])
+    assert timings['gc']['parser'] == 'legacy'
+    assert len(df) == len(lines) - 1
+
+
+def test_unknown_layout_is_not_sniffed(tmp_path):
+    path = tmp_path / 'other.txt'
+    path.write_text("Time\tValue\n1\t2\n")
+    assert data_parsers.sniff_gc_layout(str(path)) is None
+    assert data_parsers.sniff_lv_layout(str(path)) is None
+
+
+def test_parse_datetimes_uses_the_explicit_format():
+    dates = data_parsers.parse_datetimes(pd.Series(['05/02/25 17:40:26', 'not a date']), data_parsers.LV_DATETIME_FORMAT)
+    assert dates[0] == pd.Timestamp('2025-02-05 17:40:26')
+    assert pd.isna(dates[1])
+
+
+def test_restore_integer_columns_only_converts_whole_numbers():
+    df = pd.DataFrame({'Area': [9.0, None, 12.0], 'H2': [1.5, 2.0, 3.0]})
+    data_parsers.restore_integer_columns(df, ['Area', 'H2'])
+    assert df['Area'].dtype == 'Int64'
+    assert df['H2'].dtype == 'float64'
+    assert df.to_csv(index=False).splitlines()[1] == '9,1.5'
+
+
+# --- Compressed uploads ---
+def _gzip_copy(path):
+    with open(path, 'rb') as source, gzip.open(path + '.gz', 'wb') as target:
+        shutil.copyfileobj(source, target)
+    return path + '.gz'
+
+
+def test_compressed_files_read_like_plain_files(sample_files):
+    lv, gc = sample_files
+    pd.testing.assert_frame_equal(data_parsers.read_lv_table(_gzip_copy(lv)), data_parsers.read_lv_table(lv))
+    with zipfile.ZipFile(gc + '.zip', 'w') as archive:
+        archive.write(gc, 'gc.txt')
+    pd.testing.assert_frame_equal(data_parsers.read_gc_table(gc + '.zip'), data_parsers.read_gc_table(gc))
+
+
+def test_zstandard_files_read_like_plain_files(sample_files):
+    zstandard = pytest.importorskip('zstandard')
+    lv, _ = sample_files
+    with open(lv, 'rb') as f:
+        data = f.read()
+    with open(lv + '.zst', 'wb') as f:
+        f.write(zstandard.ZstdCompressor().compress(data))
+    pd.testing.assert_frame_equal(data_parsers.read_lv_table(lv + '.zst'), data_parsers.read_lv_table(lv))
+
+
+def test_chunked_reader_streams_compressed_files(sample_files):
+    lv, _ = sample_files
+    plain = pd.concat([chunk for chunk, _ in data_parsers.iter_lv_chunks(lv, chunk_bytes=4096)], ignore_index=True)
+    chunks = list(data_parsers.iter_lv_chunks(_gzip_copy(lv), chunk_bytes=4096))
+    assert len(chunks) > 1
+    pd.testing.assert_frame_equal(pd.concat([chunk for chunk, _ in chunks], ignore_index=True), plain)
+
+
+def test_zip_upload_must_hold_one_file(tmp_path, sample_files):
+    with zipfile.ZipFile(tmp_path / 'both.zip', 'w') as archive:
+        for path in sample_files:
+            archive.write(path, os.path.basename(path))
+    with pytest.raises(ValueError):
+        data_parsers.open_source(str(tmp_path / 'both.zip'))
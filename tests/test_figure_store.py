@@ -0,0 +1,53 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+import figure_store
+
+
+def _figure():
+    dates = pd.Series(pd.date_range('2025-02-05 17:40:26', periods=4, freq='90s'))
+    dates[2] = pd.NaT
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=dates, y=[1, 2, 3, 4], name='Stage'))
+    fig.add_trace(go.Scatter(x=dates, y=[-300, 0, 300, 5], name='Setpoint'))
+    fig.add_trace(go.Scatter(x=dates, y=[70000, 0, 1, 2], name='Area'))
+    fig.add_trace(go.Scatter(x=dates, y=[1.035, np.nan, 0.5, 2.0], name='NH3', yaxis='y2'))
+    fig.update_layout(yaxis2={'overlaying': 'y', 'side': 'right'})
+    return fig, dates
+
+
+def test_binary_trace_arrays_round_trip(tmp_path):
+    fig, dates = _figure()
+    path = figure_store.write_figure(fig, str(tmp_path / 'step_1_plot.json'))
+    with open(path) as f:
+        stored = json.load(f)
+    arrays = stored['trace_arrays']['arrays']
+    assert [array['dtype'] for array in arrays if array['key'] == 'y'] == ['int8', 'int16', 'int32', 'float64']
+    assert len({array['offset'] for array in arrays if array['key'] == 'x'}) == 1 # The shared Date axis is stored once
+    assert all(array['offset'] % 8 == 0 for array in arrays)
+    assert stored['layout']['xaxis']['type'] == 'date'
+    assert os.path.exists(figure_store.sidecar_path(path))
+
+    figure = figure_store.read_figure(path)
+    assert figure['data'][0]['y'].tolist() == [1, 2, 3, 4]
+    assert figure['data'][1]['y'].tolist() == [-300, 0, 300, 5]
+    assert figure['data'][2]['y'].tolist() == [70000, 0, 1, 2]
+    np.testing.assert_array_equal(figure['data'][3]['y'], [1.035, np.nan, 0.5, 2.0])
+    np.testing.assert_array_equal(figure['data'][0]['x'], dates.to_numpy().astype('datetime64[ms]'))
+
+
+def test_dates_are_epoch_milliseconds():
+    dates = np.array(['1970-01-01T00:00:01.5', 'NaT'], dtype='datetime64[ns]')
+    values, is_date = figure_store._pack_array(dates)
+    assert is_date and values[0] == 1500.0 and np.isnan(values[1])
+
+
+def test_json_trace_format_keeps_plain_plotly_json(tmp_path):
+    fig, _ = _figure()
+    path = figure_store.write_figure(fig, str(tmp_path / 'plot.json'), trace_format='json')
+    assert 'trace_arrays' not in figure_store.read_figure(path)
+    assert not os.path.exists(figure_store.sidecar_path(path))
@@ -0,0 +1,44 @@
+import pandas as pd
+
+from frame_compaction import compact_frame
+
+
+def _parsed_frame():
+    return pd.DataFrame({'Date': pd.date_range('2025-02-05', periods=4, freq='min'),
+                         'Area': [9, 10297, 12, 40000],
+                         'Count': pd.array([1, None, 3, 4], dtype='Int64'),
+                         'NH3': [1.035, 0.003, 0.5, 0.25],
+                         'Flow': ['1.5', '2', '2.5', '3'], # Text, as left by the python-engine parser
+                         'Sample name': ['Stream 2 - R150'] * 4,
+                         'File': ['a', 'b', 'c', 'd'],
+                         'Valid': [True, False, True, True]})
+
+
+def test_compact_frame_downcasts_without_losing_values():
+    df = _parsed_frame()
+    memory = {}
+    compacted = compact_frame(df, memory=memory, label='gc')
+    assert compacted['Area'].dtype == 'int32'
+    assert compacted['Count'].dtype == 'Int8'
+    assert compacted['NH3'].dtype == 'float64'
+    assert compacted['Flow'].dtype == 'float64' and compacted['Flow'].tolist() == [1.5, 2.0, 2.5, 3.0]
+    assert isinstance(compacted['Sample name'].dtype, pd.CategoricalDtype)
+    assert not isinstance(compacted['File'].dtype, pd.CategoricalDtype) # Every value is different
+    assert compacted['Valid'].dtype == 'bool'
+    assert compacted['Area'].tolist() == df['Area'].tolist()
+    assert df['Area'].dtype == 'int64' # The input frame is left as it was
+    assert memory['gc']['rows'] == 4
+
+
+def test_compact_frame_reports_memory_saved():
+    df = pd.concat([_parsed_frame()] * 5000, ignore_index=True)
+    memory = {}
+    compact_frame(df, memory=memory, label='gc')
+    assert memory['gc']['rows'] == 20000 and memory['gc']['after_mb'] < memory['gc']['before_mb'] / 2
+
+
+def test_float32_policy_is_opt_in():
+    df = _parsed_frame()
+    compacted = compact_frame(df, policy='float32')
+    assert compacted['NH3'].dtype == 'float32'
+    assert compacted['Date'].dtype == df['Date'].dtype
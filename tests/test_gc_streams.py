@@ -0,0 +1,51 @@
+import os
+
+import pandas as pd
+import pytest
+
+import main_web_processor as mwp
+import parsed_cache
+
+
+def _two_stream_frame():
+    return pd.DataFrame({'Date': pd.date_range('2025-02-05 17:00', periods=6, freq='3min'),
+                         'NH3': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+                         'Sample name': ['Stream 1 - R149', 'Stream 2 - R150 ', 'Stream 1 - R149',
+                                         'Stream 2 - R150', None, 'Stream 1 - R149']})
+
+
+def test_split_gc_streams_keeps_rows_in_order():
+    streams = mwp.split_gc_streams(_two_stream_frame())
+    assert list(streams) == ['Stream 1 - R149', 'Stream 2 - R150', '']
+    assert streams['Stream 1 - R149'].index.tolist() == [0, 2, 5]
+    assert streams['Stream 2 - R150']['NH3'].tolist() == [2.0, 4.0]
+    assert list(mwp.split_gc_streams(_two_stream_frame().drop(columns=['Sample name']))) == ['']
+
+
+def test_select_gc_stream_by_name_reactor_or_all():
+    streams = mwp.split_gc_streams(_two_stream_frame())
+    df, name = mwp.select_gc_stream(streams, gc_stream='stream 2 - r150')
+    assert name == 'Stream 2 - R150' and len(df) == 2
+    df, name = mwp.select_gc_stream(streams, reactor_id='R149')
+    assert name == 'Stream 1 - R149' and len(df) == 3
+    df, name = mwp.select_gc_stream(streams, reactor_id='R151')
+    assert name is None and df.index.tolist() == list(range(6))
+    with pytest.raises(ValueError):
+        mwp.select_gc_stream(streams, gc_stream='Stream 3')
+
+
+def test_reactor_id_from_lv_metadata(sample_files):
+    assert mwp.reactor_id_from_lv(sample_files[0]) == 'R150'
+
+
+def test_process_gc_streams_caches_each_stream_only(sample_files):
+    _, gc = sample_files
+    streams = mwp.process_gc_streams(gc)
+    assert list(streams) == ['Stream 2 - R150']
+    # One entry per stream plus the list of names, not the whole frame as well
+    assert len(os.listdir(parsed_cache.PARSED_CACHE_FOLDER)) == 2
+
+    timings = {}
+    cached = mwp.process_gc_streams(gc, timings=timings)
+    assert timings['gc']['parser'] == 'cache'
+    pd.testing.assert_frame_equal(cached['Stream 2 - R150'], streams['Stream 2 - R150'])
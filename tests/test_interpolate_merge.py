@@ -0,0 +1,48 @@
+import pandas as pd
+
+import main_web_processor as mwp
+
+
+def times(*minutes):
+    return pd.to_datetime('2025-05-02') + pd.to_timedelta(list(minutes), unit='min')
+
+
+def test_interpolate_gc_exact_timestamp_takes_matching_sample():
+    df_lv = pd.DataFrame({'Date': times(7, 15), 'Stage': [1, 1]})
+    df_gc = pd.DataFrame({'Date': times(0, 10, 15, 20), 'cnt': [3, 4, 5, 6], 'NH3': [0.0, 1.0, 2.0, 3.0]})
+    merged = mwp.merge_frames(df_lv, df_gc, 'interpolate_gc')
+    assert merged['cnt'].tolist() == [4, 5]
+    assert merged['NH3'].tolist() == [0.7, 2.0]
+
+
+def test_interpolate_lv_exact_timestamp_keeps_stage_of_matching_row():
+    # Stage 2 starts at 00:20; the injection logged at exactly that time belongs to it
+    df_lv = pd.DataFrame({'Date': times(0, 10, 20, 30), 'Stage': [1, 1, 2, 2], 'T': [10.0, 20.0, 30.0, 40.0]})
+    df_gc = pd.DataFrame({'Date': times(12, 20, 29), 'NH3': [1.0, 2.0, 3.0]})
+    merged = mwp.merge_frames(df_lv, df_gc, 'interpolate_lv')
+    assert merged['Stage'].tolist() == [1, 2, 2]
+    assert merged['T'].tolist() == [22.0, 30.0, 39.0]
+
+
+def test_gc_window_aggregates_lv_rows_since_the_previous_injection():
+    df_lv = pd.DataFrame({'Date': times(1, 4, 8, 10, 12, 14, 40), 'Stage': [1, 1, 1, 2, 2, 2, 2],
+                          'T Heater 1': [10.0, 20.0, 30.0, 40.0, 50.0, 60.0, 70.0],
+                          'H2 Set-Point': [1.0, 1.0, 1.0, 2.0, 2.0, 3.0, 3.0]})
+    df_gc = pd.DataFrame({'Date': times(0, 10, 15, 30, 45), 'NH3': [0.5, 1.0, 2.0, 3.0, 4.0]})
+    merged = mwp.merge_frames(df_lv, df_gc, 'gc_window')
+    # The injections at 00:00 and 00:30 have no LV rows in their window and are dropped
+    assert merged['Date'].tolist() == list(times(10, 15, 45))
+    assert merged['NH3'].tolist() == [1.0, 2.0, 4.0]
+    assert merged['Stage'].tolist() == [2, 2, 2] # The stage of the last row in the window
+    assert merged['T Heater 1'].tolist() == [25.0, 55.0, 70.0]
+    assert merged['T Heater 1_min'].tolist() == [10.0, 50.0, 70.0]
+    assert merged['T Heater 1_max'].tolist() == [40.0, 60.0, 70.0]
+    assert merged['H2 Set-Point'].tolist() == [2.0, 3.0, 3.0]
+    assert merged['LV samples'].tolist() == [4, 2, 1]
+
+
+def test_gc_window_max_gap_limits_the_window():
+    df_lv = pd.DataFrame({'Date': times(1, 8), 'Stage': [1, 1], 'T Heater 1': [10.0, 30.0]})
+    df_gc = pd.DataFrame({'Date': times(10), 'NH3': [1.0]})
+    merged = mwp.merge_frames(df_lv, df_gc, 'gc_window', max_gap=pd.Timedelta('5min'))
+    assert merged['T Heater 1'].tolist() == [30.0] and merged['LV samples'].tolist() == [1]
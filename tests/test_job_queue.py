@@ -0,0 +1,116 @@
+import threading
+import time
+
+import pytest
+
+import job_queue
+
+
+def _wait_until_finished(job_id, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = job_queue.job_status(job_id)
+        if status['state'] in ('done', 'failed'):
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+@pytest.fixture
+def blocked_job():
+    """A queued job that runs until the test releases it."""
+    release = threading.Event()
+    job = job_queue.submit_job('test', lambda: (release.wait(30), ({'success': True, 'message': 'Released.'}, 200))[1])
+    yield job
+    release.set()
+    _wait_until_finished(job['id'])
+
+
+def test_job_runs_in_the_background_and_keeps_its_results():
+    job = job_queue.submit_job('test', lambda: ({'success': True, 'message': 'Done.', 'rows': 3}, 200))
+    assert job['state'] in ('queued', 'running', 'done')
+    status = _wait_until_finished(job['id'])
+    assert status['state'] == 'done' and status['results']['rows'] == 3 and status['status_code'] == 200
+    assert job_queue.job_status('unknown') is None
+
+
+def test_failing_job_is_reported_as_failed():
+    def work():
+        raise RuntimeError('broken input')
+    status = _wait_until_finished(job_queue.submit_job('test', work)['id'])
+    assert status['state'] == 'failed' and status['status_code'] == 500
+    assert 'broken input' in status['message']
+
+
+def test_submit_refuses_work_when_the_queue_is_full(monkeypatch, blocked_job):
+    monkeypatch.setattr(job_queue, 'JOB_MAX_PENDING', job_queue.pending_job_count())
+    assert job_queue.submit_job('test', lambda: ({'success': True}, 200)) is None
+
+
+def test_process_route_answers_503_when_the_queue_is_full(monkeypatch, client, sample_files):
+    monkeypatch.setattr(job_queue, 'JOB_MAX_PENDING', 0)
+    lv, gc = sample_files
+    with open(lv, 'rb') as lv_file, open(gc, 'rb') as gc_file:
+        response = client.post('/process', data={'lv_file': (lv_file, 'lv.txt'), 'gc_file': (gc_file, 'gc.txt')})
+    assert response.status_code == 503 and response.headers['Retry-After'] == '60'
+    assert response.get_json()['busy'] is True
+
+
+def test_process_route_queues_a_job_and_serves_its_results(client, sample_files):
+    lv, gc = sample_files
+    with open(lv, 'rb') as lv_file, open(gc, 'rb') as gc_file:
+        response = client.post('/process', data={'lv_file': (lv_file, 'lv.txt'), 'gc_file': (gc_file, 'gc.txt')})
+    assert response.status_code == 202
+    job_id = response.get_json()['job']['id']
+    assert response.get_json()['status_url'] == f"/jobs/{job_id}"
+
+    _wait_until_finished(job_id, timeout=60)
+    body = client.get(f"/jobs/{job_id}").get_json()
+    assert body['job']['state'] == 'done', body
+    assert body['results']['success'] and body['results']['overall_data_path'].startswith('static/reports/')
+    assert client.get('/jobs/unknown').status_code == 404
+
+
+# --- Progress events ---
+def test_job_events_are_followed_until_the_end():
+    release = threading.Event()
+    job_id = job_queue.new_job_id()
+
+    def work():
+        job_queue.add_job_event(job_id, 'parse_lv', 'Parsed LV file.', rows=120)
+        release.wait(30)
+        job_queue.add_job_event(job_id, 'write', 'Saved overall data.', rows=120)
+        return {'success': True, 'message': 'Processing complete.'}, 200
+
+    job = job_queue.submit_job('test', work, job_id=job_id)
+    events = job_queue.iter_job_events(job['id'], heartbeat_seconds=0.05)
+    seen = []
+    for event in events:
+        if event is None: # Heartbeat while the job waits
+            release.set()
+            continue
+        seen.append(event)
+        if event['phase'] == 'end':
+            break
+    phases = [event['phase'] for event in seen]
+    assert phases == ['queued', 'running', 'parse_lv', 'write', 'end']
+    assert [event['id'] for event in seen[:-1]] == [1, 2, 3, 4]
+    assert seen[2]['rows'] == 120 and seen[-1] == {'phase': 'end', 'state': 'done', 'message': 'Processing complete.'}
+
+    # A reconnecting reader continues after the last event it saw
+    assert [event['phase'] for event in job_queue.iter_job_events(job['id'], after=3)] == ['write', 'end']
+    assert list(job_queue.iter_job_events('unknown')) == []
+
+
+def test_events_route_streams_server_sent_events(client):
+    job = job_queue.submit_job('test', lambda: ({'success': True, 'message': 'Processing complete.'}, 200))
+    _wait_until_finished(job['id'])
+    response = client.get(f"/jobs/{job['id']}/events")
+    assert response.mimetype == 'text/event-stream'
+    text = response.get_data(as_text=True)
+    assert text.startswith('id: 1\nevent: progress\ndata: ')
+    assert text.endswith('event: end\ndata: {"phase": "end", "state": "done", "message": "Processing complete."}\n\n')
+
+    resumed = client.get(f"/jobs/{job['id']}/events", headers={'Last-Event-ID': '1'}).get_data(as_text=True)
+    assert resumed.startswith('id: 2\nevent: progress\n')
+    assert client.get('/jobs/unknown/events').status_code == 404
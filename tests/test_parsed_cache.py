@@ -0,0 +1,51 @@
+import os
+
+import pandas as pd
+
+import parsed_cache
+
+
+def test_cache_key_depends_on_kind_config_and_parser_version(monkeypatch):
+    key = parsed_cache.cache_key('abc', 'lv', {'rules': ['setpoint_change']})
+    assert key == parsed_cache.cache_key('abc', 'lv', {'rules': ['setpoint_change']})
+    assert key.startswith('lv_')
+    assert key != parsed_cache.cache_key('abc', 'gc', {'rules': ['setpoint_change']})
+    assert key != parsed_cache.cache_key('abd', 'lv', {'rules': ['setpoint_change']})
+    assert key != parsed_cache.cache_key('abc', 'lv', {'rules': ['time_gap']})
+    monkeypatch.setattr(parsed_cache, 'PARSER_VERSION', parsed_cache.PARSER_VERSION + 1)
+    assert key != parsed_cache.cache_key('abc', 'lv', {'rules': ['setpoint_change']})
+
+
+def test_cached_parse_parses_each_content_once(tmp_path):
+    source = tmp_path / 'input.txt'
+    source.write_text('1\n2\n3\n')
+    calls = []
+
+    def parse(filename):
+        calls.append(filename)
+        return pd.DataFrame({'value': [1, 2, 3]})
+
+    first = parsed_cache.cached_parse(str(source), 'lv', parse)
+    timings = {}
+    second = parsed_cache.cached_parse(str(source), 'lv', parse, timings=timings)
+    assert len(calls) == 1
+    assert timings['lv']['parser'] == 'cache'
+    pd.testing.assert_frame_equal(first, second)
+
+    source.write_text('1\n2\n3\n4\n') # New content, new key
+    parsed_cache.cached_parse(str(source), 'lv', parse)
+    assert len(calls) == 2
+
+
+def test_evict_cache_removes_least_recently_used_entries(tmp_path):
+    folder = str(tmp_path / 'cache')
+    df = pd.DataFrame({'value': range(1000)})
+    for age, key in enumerate(['newest', 'middle', 'oldest']):
+        path = parsed_cache.store_cached_frame(key, df, cache_folder=folder)
+        os.utime(path, (1000000 - age * 100, 1000000 - age * 100))
+    entry_bytes = os.path.getsize(path)
+
+    assert parsed_cache.load_cached_frame('oldest', cache_folder=folder) is not None # A hit makes it the newest
+    parsed_cache.evict_cache(folder, max_bytes=2 * entry_bytes)
+    assert sorted(os.listdir(folder)) == sorted(os.path.basename(parsed_cache._cache_path(key, folder))
+                                                for key in ('newest', 'oldest'))
@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import plot_pyramid
+from report_store import write_report_frame
+
+
+def _long_run(tmp_path, rows=20000):
+    values = np.sin(np.arange(rows) / 500.0)
+    values[12345] = 50.0 # A single spike must survive every level
+    df = pd.DataFrame({'Date': pd.date_range('2025-02-05', periods=rows, freq='s'),
+                       'T Heater 1': values, 'NH3': np.cos(np.arange(rows) / 700.0)})
+    data_filename = write_report_frame(df, str(tmp_path / 'step_1_data'))
+    coarse, zoom = plot_pyramid.build_plot_pyramid(df, ['T Heater 1', 'NH3'], str(tmp_path / 'step_1_plot.json'),
+                                                   data_filename)
+    return df, coarse, zoom
+
+
+def test_pyramid_levels_keep_extremes(tmp_path):
+    df, coarse, zoom = _long_run(tmp_path)
+    assert [level['buckets'] for level in zoom['levels']] == [500, 2000]
+    assert len(coarse) == zoom['levels'][0]['rows'] < len(df) // 2
+    assert coarse['T Heater 1'].max() == 50.0
+    assert coarse['Date'].iloc[0] == df['Date'].iloc[0] and coarse['Date'].iloc[-1] == df['Date'].iloc[-1]
+    assert os.path.exists(tmp_path / zoom['pyramid'])
+
+
+def test_short_frames_have_no_pyramid(tmp_path):
+    df = pd.DataFrame({'Date': pd.date_range('2025-02-05', periods=100, freq='s'), 'NH3': np.arange(100.0)})
+    drawn, zoom = plot_pyramid.build_plot_pyramid(df, ['NH3'], str(tmp_path / 'plot.json'), 'data.parquet')
+    assert zoom is None and drawn is df
+
+
+def test_read_plot_window_serves_full_rows_or_the_finest_fitting_level(tmp_path):
+    df, _, zoom = _long_run(tmp_path)
+    start, end = df['Date'].iloc[12000], df['Date'].iloc[13000]
+    window, level = plot_pyramid.read_plot_window(str(tmp_path), zoom, start, end)
+    assert level == 'full'
+    pd.testing.assert_frame_equal(window, df.iloc[12000:13001].reset_index(drop=True))
+
+    window, level = plot_pyramid.read_plot_window(str(tmp_path), zoom, df['Date'].iloc[0], df['Date'].iloc[-1],
+                                                  max_points=9000)
+    assert level == 1 and len(window) <= 9000
+    window, level = plot_pyramid.read_plot_window(str(tmp_path), zoom, start, df['Date'].iloc[-1], max_points=1000)
+    assert level == 0 and window['Date'].min() >= start and window['T Heater 1'].max() == 50.0
+
+
+def test_read_plot_window_without_pyramid_file_downsamples(tmp_path):
+    df, _, zoom = _long_run(tmp_path)
+    os.remove(tmp_path / zoom['pyramid'])
+    window, level = plot_pyramid.read_plot_window(str(tmp_path), zoom, df['Date'].iloc[0], df['Date'].iloc[-1],
+                                                  max_points=2000)
+    assert level == 'downsampled' and len(window) <= 2000 + 2 and window['T Heater 1'].max() == 50.0
+
+
+def test_window_to_traces_sends_gaps_as_null():
+    window = pd.DataFrame({'Date': pd.to_datetime(['2025-02-05 17:40:26', '2025-02-05 17:40:27']), 'NH3': [1.5, np.nan]})
+    traces = plot_pyramid.window_to_traces(window, {'x': 'Date', 'columns': ['NH3', 'Missing']})
+    assert traces == {'x': ['2025-02-05T17:40:26', '2025-02-05T17:40:27'], 'y': [[1.5, None], [None, None]]}
@@ -0,0 +1,88 @@
+import os
+import time
+
+import pytest
+
+import report_catalog
+
+
+def _reports_folder(tmp_path):
+    """Empty report folders, created one minute apart (A_1 first), plus a non-report folder."""
+    reports = tmp_path / 'reports'
+    names = ['A_1', 'A_2', 'B_1', 'B_2', 'C_1']
+    start = time.mktime((2025, 5, 2, 10, 0, 0, 0, 0, -1))
+    for i, name in enumerate(names):
+        os.makedirs(reports / name / 'comparison_plots')
+        os.utime(reports / name, (start + 60 * i, start + 60 * i))
+    for plot_name in ('stages_comparison_plot_1.json', 'x_stages_comparison_plot_2.json', 'notes.txt'):
+        (reports / 'B_1' / 'comparison_plots' / plot_name).write_text('{}')
+    os.makedirs(reports / 'cross_comparisons')
+    return str(reports)
+
+
+def _all_pages(list_page, **filters):
+    names, cursor, pages = [], None, 0
+    while True:
+        page, cursor = list_page(limit=2, cursor=cursor, **filters)
+        names += [entry['name'] for entry in page]
+        pages += 1
+        if cursor is None:
+            return names, pages
+
+
+def test_keyset_pages_cover_every_report_once(tmp_path):
+    reports = _reports_folder(tmp_path)
+    list_page = lambda **kwargs: report_catalog.list_catalog_reports(reports, **kwargs)
+    assert _all_pages(list_page) == (['C_1', 'B_2', 'B_1', 'A_2', 'A_1'], 3)
+    assert _all_pages(list_page, descending=False) == (['A_1', 'A_2', 'B_1', 'B_2', 'C_1'], 3)
+    assert _all_pages(list_page, sort='created')[0] == ['C_1', 'B_2', 'B_1', 'A_2', 'A_1']
+
+
+def test_listing_filters_by_prefix_and_creation_time(tmp_path):
+    reports = _reports_folder(tmp_path)
+    page, cursor = report_catalog.list_catalog_reports(reports, prefix='B')
+    assert [report['name'] for report in page] == ['B_2', 'B_1'] and cursor is None
+    page, _ = report_catalog.list_catalog_reports(reports, created_from=report_catalog.parse_catalog_date('2025-05-02 10:01'),
+                                                  created_to=report_catalog.parse_catalog_date('2025-05-02T10:03:00'))
+    assert [report['name'] for report in page] == ['B_2', 'B_1', 'A_2']
+    page, _ = report_catalog.list_catalog_reports(reports, created_to=report_catalog.parse_catalog_date('2025-05-02', end=True))
+    assert len(page) == 5
+    assert page[0]['created'] == '2025-05-02 10:04:00'
+
+
+def test_invalid_listing_requests_are_rejected(tmp_path):
+    reports = _reports_folder(tmp_path)
+    with pytest.raises(ValueError):
+        report_catalog.list_catalog_reports(reports, cursor='not a cursor')
+    with pytest.raises(ValueError):
+        report_catalog.list_catalog_reports(reports, sort='size')
+    with pytest.raises(ValueError):
+        report_catalog.parse_catalog_date('02/05/2025')
+
+
+def test_catalog_follows_added_and_removed_reports(tmp_path):
+    reports = _reports_folder(tmp_path)
+    report_catalog.list_catalog_reports(reports)
+    os.rmdir(os.path.join(reports, 'A_1', 'comparison_plots'))
+    os.rmdir(os.path.join(reports, 'A_1'))
+    os.makedirs(os.path.join(reports, 'D_1'))
+    page, _ = report_catalog.list_catalog_reports(reports, descending=False)
+    assert [report['name'] for report in page] == ['A_2', 'B_1', 'B_2', 'C_1', 'D_1']
+
+
+def test_comparison_plots_are_listed_in_pages(tmp_path):
+    reports = _reports_folder(tmp_path)
+    list_page = lambda **kwargs: report_catalog.list_catalog_comparison_plots(reports, **kwargs)
+    assert _all_pages(list_page) == (['stages_comparison_plot_1.json', 'x_stages_comparison_plot_2.json'], 1)
+    assert list_page(report_prefix='A')[0] == []
+
+
+def test_list_reports_route_pages_with_cursors(client):
+    reports = client.application.config['REPORTS_FOLDER']
+    for name in ('run_1', 'run_2', 'other_1'):
+        os.makedirs(os.path.join(reports, name))
+    first = client.get('/list_reports?prefix=run&limit=1').get_json()
+    assert first['reports'] == ['run_2'] and first['next_cursor']
+    second = client.get(f"/list_reports?prefix=run&limit=1&cursor={first['next_cursor']}").get_json()
+    assert second['reports'] == ['run_1'] and second['next_cursor'] is None
+    assert client.get('/list_reports?from=yesterday').status_code == 400
@@ -0,0 +1,53 @@
+import os
+
+import main_web_processor as mwp
+import report_index
+from report_store import read_report_frame
+
+
+def _report(tmp_path, sample_files):
+    results = mwp.generate_reports(*sample_files, str(tmp_path / 'reports'), reuse_existing=False)
+    return results, os.path.dirname(results['overall_data_path'])
+
+
+def _paths(results):
+    keys = ('overall_plot_path', 'overall_data_path', 'overall_csv_path', 'stage_boundaries_path', 'num_stages')
+    return ({key: results[key] for key in keys},
+            [{key: report[key] for key in ('step_number', 'plot_path', 'data_path', 'csv_path', 'json_path')}
+             for report in results['step_reports']])
+
+
+def test_manifest_records_the_report_outputs(tmp_path, sample_files):
+    results, folder = _report(tmp_path, sample_files)
+    manifest = report_index.read_report_manifest(folder)
+    assert [stage['step_number'] for stage in manifest['stages']] == [1, 2]
+    for stage, report in zip(manifest['stages'], results['step_reports']):
+        assert stage['rows'] == len(read_report_frame(report['data_path']))
+    assert manifest['overall']['rows'] == sum(stage['rows'] for stage in manifest['stages'])
+    assert _paths(report_index.collect_report_results(folder)) == _paths(results)
+
+
+def test_reports_without_manifest_are_scanned(tmp_path, sample_files):
+    results, folder = _report(tmp_path, sample_files)
+    report_index.remove_report_manifest(folder)
+    assert report_index.read_report_manifest(folder) is None
+    assert _paths(report_index.collect_report_results(folder)) == _paths(report_index.scan_report_results(folder))
+    assert _paths(report_index.scan_report_results(folder)) == _paths(results)
+
+
+def test_unreadable_or_older_manifest_falls_back_to_the_scan(tmp_path, sample_files):
+    results, folder = _report(tmp_path, sample_files)
+    with open(os.path.join(folder, report_index.REPORT_MANIFEST_FILE), 'w') as f:
+        f.write('{"version": 1, "stag')
+    assert report_index.read_report_manifest(folder) is None
+    assert _paths(report_index.collect_report_results(folder)) == _paths(results)
+    with open(os.path.join(folder, report_index.REPORT_MANIFEST_FILE), 'w') as f:
+        f.write('{"version": 0}')
+    assert report_index.read_report_manifest(folder) is None
+
+
+def test_scan_orders_stages_by_number(tmp_path, sample_files):
+    _, folder = _report(tmp_path, sample_files)
+    os.rename(os.path.join(folder, 'step_2'), os.path.join(folder, 'step_10'))
+    os.makedirs(os.path.join(folder, 'step_x'))
+    assert [report['step_number'] for report in report_index.scan_report_results(folder)['step_reports']] == [1, 10]
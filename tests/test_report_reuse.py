@@ -0,0 +1,44 @@
+import os
+import shutil
+
+import main_web_processor as mwp
+import streaming_ingest
+from report_catalog import find_catalog_report
+from report_index import read_report_fingerprint
+
+
+def test_identical_inputs_and_settings_reuse_the_report(tmp_path, sample_files):
+    reports = str(tmp_path / 'reports')
+    first = mwp.generate_reports(*sample_files, reports)
+    folder = os.path.dirname(first['overall_data_path'])
+    assert 'reused_report' not in first
+
+    second = mwp.generate_reports(*sample_files, reports)
+    assert second['reused_report'] == os.path.basename(folder)
+    assert second['overall_data_path'] == first['overall_data_path']
+    assert len(second['step_reports']) == len(first['step_reports'])
+
+    other = mwp.generate_reports(*sample_files, reports, stage_rules=['data_gap'])
+    assert other['success']
+    assert 'reused_report' not in other
+
+
+def test_catalog_lookup_by_fingerprint(tmp_path, sample_files):
+    reports = str(tmp_path / 'reports')
+    results = mwp.generate_reports(*sample_files, reports)
+    folder = os.path.dirname(results['overall_data_path'])
+    fingerprint = read_report_fingerprint(folder)
+    assert os.path.samefile(find_catalog_report(reports, fingerprint), folder)
+    assert find_catalog_report(reports, 'unknown') is None
+    assert find_catalog_report(str(tmp_path / 'missing'), fingerprint) is None
+
+    shutil.rmtree(folder) # A deleted report is computed again
+    assert find_catalog_report(reports, fingerprint) is None
+    assert 'reused_report' not in mwp.generate_reports(*sample_files, reports)
+
+
+def test_streaming_reports_are_reused_too(tmp_path, sample_files):
+    reports = str(tmp_path / 'reports')
+    first = streaming_ingest.generate_reports_streaming(*sample_files, reports)
+    second = streaming_ingest.generate_reports_streaming(*sample_files, reports)
+    assert second['reused_report'] == os.path.basename(os.path.dirname(first['overall_data_path']))
@@ -0,0 +1,101 @@
+import json
+import os
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+import report_store
+
+
+def _stage_frame(rows=10):
+    return pd.DataFrame({'Date': pd.date_range('2025-02-05 17:40', periods=rows, freq='min'),
+                         'Stage': [1] * rows,
+                         'NH3': [i / 8 for i in range(rows)],
+                         'Area': pd.array(range(rows), dtype='Int64'),
+                         'Sample name': ['Stream 2 - R150'] * rows})
+
+
+def test_parquet_store_round_trip_and_exports(tmp_path, monkeypatch):
+    monkeypatch.setattr(report_store, 'REPORT_ROW_GROUP_ROWS', 4)
+    df = _stage_frame()
+    path = report_store.write_report_frame(df, str(tmp_path / 'step_1_data'))
+    assert path.endswith('step_1_data.parquet') and pq.ParquetFile(path).metadata.num_row_groups == 3
+    pd.testing.assert_frame_equal(report_store.read_report_frame(path), df)
+    # The download names resolve to the Parquet file and are produced from it
+    assert report_store.export_report_frame(str(tmp_path / 'step_1_data.csv'), 'csv') == df.to_csv(index=False)
+    assert json.loads(report_store.export_report_frame(path, 'json')) == json.loads(report_store.frame_to_json(df))
+
+
+def test_read_report_frame_projects_and_filters_by_date(tmp_path):
+    df = _stage_frame()
+    path = report_store.write_report_frame(df, str(tmp_path / 'overall_merged_data'))
+    window = report_store.read_report_frame(path, columns=['Date', 'NH3', 'Missing'],
+                                            start='2025-02-05 17:42', end='2025-02-05 17:44')
+    assert list(window.columns) == ['Date', 'NH3']
+    assert window['NH3'].tolist() == df['NH3'].iloc[2:5].tolist()
+    assert report_store.report_frame_summary(path) == {'rows': 10, 'start': '2025-02-05T17:40:00',
+                                                       'end': '2025-02-05T17:49:00', 'bytes': os.path.getsize(path)}
+
+
+def test_read_report_frame_head_reads_only_the_first_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(report_store, 'REPORT_ROW_GROUP_ROWS', 4)
+    df = _stage_frame()
+    path = report_store.write_report_frame(df, str(tmp_path / 'step_1_data'))
+    pd.testing.assert_frame_equal(report_store.read_report_frame_head(path, 6), df.head(6))
+    csv_path = str(tmp_path / 'older.csv')
+    df.to_csv(csv_path, index=False)
+    assert report_store.read_report_frame_head(csv_path, 3)['NH3'].tolist() == df['NH3'].head(3).tolist()
+
+
+def test_frame_writer_appends_parts_and_widens_the_schema(tmp_path):
+    writer = report_store.open_report_frame_writer(str(tmp_path / 'step_1_data'), json_copy=True)
+    first = pd.DataFrame({'Date': pd.date_range('2025-02-05', periods=2, freq='min'), 'Area': pd.array([1, 2], dtype='int8'),
+                          'Sample name': [None, None]})
+    second = pd.DataFrame({'Date': pd.date_range('2025-02-06', periods=2, freq='min'), 'Area': [300, 400],
+                           'Sample name': ['Stream 2 - R150', None], 'NH3': [0.5, 0.25]})
+    report_store.append_report_frame(writer, first)
+    report_store.append_report_frame(writer, second)
+    path = report_store.close_report_frame_writer(writer)
+
+    stored = report_store.read_report_frame(path)
+    assert pq.ParquetFile(path).metadata.num_row_groups == 2
+    assert stored['Area'].tolist() == [1, 2, 300, 400]
+    assert stored['Sample name'].tolist()[2] == 'Stream 2 - R150'
+    assert stored['NH3'].isna().tolist() == [True, True, False, False]
+    assert not os.path.exists(tmp_path / 'step_1_data.json') # Produced from the Parquet file on download
+
+
+def test_frame_writer_without_pyarrow_appends_csv_and_json(tmp_path, monkeypatch):
+    monkeypatch.setattr(report_store, 'REPORT_DATA_FORMAT', 'csv')
+    df = _stage_frame()
+    writer = report_store.open_report_frame_writer(str(tmp_path / 'step_1_data'), json_copy=True)
+    report_store.append_report_frame(writer, df.iloc[:6])
+    report_store.append_report_frame(writer, df.iloc[6:])
+    assert report_store.close_report_frame_writer(writer) == str(tmp_path / 'step_1_data.csv')
+    with open(tmp_path / 'step_1_data.csv') as f:
+        assert f.read() == df.to_csv(index=False)
+    with open(tmp_path / 'step_1_data.json') as f:
+        assert json.load(f) == json.loads(report_store.frame_to_json(df))
+
+
+def test_frame_writer_without_rows_writes_nothing(tmp_path):
+    writer = report_store.open_report_frame_writer(str(tmp_path / 'step_1_data'))
+    assert report_store.close_report_frame_writer(writer) is None
+    assert os.listdir(tmp_path) == []
+
+
+# --- JSON export ---
+def test_frame_to_json_writes_iso_date_text():
+    df = pd.DataFrame({'Date': pd.to_datetime(['2025-02-05 17:40:26.000', None, '2025-02-05 17:40:26.250']),
+                       'NH3': [1.035, None, 0.003], 'Area': pd.array([9, None, 12], dtype='Int64'),
+                       'Sample name': ['Stream 2 - R150', None, 'Stream 2 - R150']})
+    assert json.loads(report_store.frame_to_json(df)) == [
+        {'Date': '2025-02-05T17:40:26', 'NH3': 1.035, 'Area': 9, 'Sample name': 'Stream 2 - R150'},
+        {'Date': None, 'NH3': None, 'Area': None, 'Sample name': None},
+        {'Date': '2025-02-05T17:40:26.250000', 'NH3': 0.003, 'Area': 12, 'Sample name': 'Stream 2 - R150'},
+    ]
+
+
+def test_iso_date_strings_match_isoformat():
+    dates = pd.Series(pd.date_range('2025-02-05 17:40:26', periods=3, freq='1500ms'))
+    assert report_store.iso_date_strings(dates).tolist() == [date.isoformat() for date in dates]
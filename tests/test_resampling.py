@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+
+import main_web_processor as mwp
+from resampling import parse_interval, resample_frame
+
+
+def test_parse_interval_reads_bare_numbers_as_minutes():
+    assert parse_interval('10') == pd.Timedelta(minutes=10)
+    assert parse_interval(2.5) == pd.Timedelta(seconds=150)
+    assert parse_interval(' 30s ') == pd.Timedelta(seconds=30)
+    assert parse_interval(pd.Timedelta('1h')) == pd.Timedelta(hours=1)
+
+
+@pytest.mark.parametrize('interval', ['500ms', '0', '-5min', 'nan', 'inf', 'abc', '', True, None, 1e300])
+def test_parse_interval_rejects_invalid_or_too_fine_grids(interval):
+    with pytest.raises(ValueError):
+        parse_interval(interval)
+
+
+def test_resample_frame_aggregates_each_stage_separately():
+    df = pd.DataFrame({'Date': pd.to_datetime('2025-05-02 10:00') + pd.to_timedelta([0, 20, 40, 70, 80, 130], unit='s'),
+                       'Stage': [1, 1, 2, 2, 2, 2],
+                       'T Heater 1': [10.0, 20.0, 30.0, 40.0, 50.0, 60.0],
+                       'H2 Set-Point': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+                       'Sample name': ['a', 'b', 'c', 'd', 'e', 'f']})
+    resampled = resample_frame(df, '1min', aggregations={'T Heater 1': 'max'})
+    assert list(resampled.columns) == list(df.columns)
+    assert resampled['Stage'].tolist() == [1, 2, 2, 2]
+    assert resampled['Date'].dt.strftime('%H:%M').tolist() == ['10:00', '10:00', '10:01', '10:02']
+    assert resampled['T Heater 1'].tolist() == [20.0, 30.0, 50.0, 60.0]
+    assert resampled['H2 Set-Point'].tolist() == [2.0, 3.0, 5.0, 6.0] # Setpoints keep their last value
+    assert resampled['Sample name'].tolist() == ['b', 'c', 'e', 'f']
+
+
+def test_resampled_report_is_on_the_grid(tmp_path, sample_files):
+    results = mwp.generate_reports(*sample_files, str(tmp_path / 'reports'), resample_interval='10min',
+                                   reuse_existing=False)
+    assert results['success'], results['message']
+    overall = pd.read_parquet(results['overall_data_path'])
+    assert (overall['Date'].dt.floor('10min') == overall['Date']).all()
+    assert not overall.duplicated(['Stage', 'Date']).any()
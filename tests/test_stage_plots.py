@@ -0,0 +1,39 @@
+import os
+
+import main_web_processor as mwp
+from figure_store import read_figure
+from report_store import read_report_frame
+
+
+def test_stage_plots_are_generated_on_first_request(tmp_path, sample_files):
+    results = mwp.generate_reports(*sample_files, str(tmp_path / 'reports'), reuse_existing=False)
+    plot_path = results['step_reports'][0]['plot_path']
+    assert not os.path.exists(plot_path) and os.path.exists(results['step_reports'][0]['data_path'])
+
+    assert mwp.ensure_step_plot(plot_path) == plot_path
+    figure = read_figure(plot_path)
+    assert figure['data'] and len(figure['data'][0]['x']) == len(read_report_frame(results['step_reports'][0]['data_path']))
+    generated = os.stat(plot_path).st_mtime_ns
+    assert mwp.ensure_step_plot(plot_path) == plot_path and os.stat(plot_path).st_mtime_ns == generated
+
+
+def test_ensure_step_plot_needs_stored_stage_data(tmp_path):
+    os.makedirs(tmp_path / 'step_3')
+    assert mwp.ensure_step_plot(str(tmp_path / 'step_3' / 'step_3_plot.json')) is None
+    assert mwp.ensure_step_plot(str(tmp_path / 'step_3' / 'overall_plot.json')) is None
+
+
+def test_stage_plot_is_served_from_the_report_route(tmp_path, sample_files, client):
+    reports = client.application.config['REPORTS_FOLDER']
+    results = mwp.generate_reports(*sample_files, reports, reuse_existing=False)
+    plot_path = results['step_reports'][1]['plot_path']
+    response = client.get('/static/reports/' + os.path.relpath(plot_path, reports).replace(os.sep, '/'))
+    assert response.status_code == 200 and os.path.exists(plot_path)
+    assert client.get('/static/reports/missing/step_1/step_1_plot.json').status_code == 404
+
+
+def test_rewritten_stage_drops_its_old_plot(tmp_path, sample_files):
+    results = mwp.generate_reports(*sample_files, str(tmp_path / 'reports'), reuse_existing=False)
+    plot_path = mwp.ensure_step_plot(results['step_reports'][0]['plot_path'])
+    mwp.remove_step_plot(os.path.dirname(plot_path), 1)
+    assert not os.path.exists(plot_path)
@@ -0,0 +1,30 @@
+import pandas as pd
+
+import main_web_processor as mwp
+
+
+def test_stage_rows_uses_slices_for_contiguous_stages():
+    merged = pd.DataFrame({'Stage': [1, 1, 2, 2, 2, 3, 1], 'value': range(7)})
+    rows = mwp.stage_rows(merged)
+    assert rows[2] == (2, 5) and rows[3] == (5, 6)
+    assert rows[1].tolist() == [0, 1, 6] # Not contiguous: positions
+
+
+def test_take_stage_rows_returns_the_stage_with_a_fresh_index():
+    merged = pd.DataFrame({'Stage': [1, 1, 2, 2, 2, 3, 1], 'value': range(7)}, index=range(10, 17))
+    rows = mwp.stage_rows(merged)
+    stage = mwp.take_stage_rows(merged, rows[2])
+    assert stage['value'].tolist() == [2, 3, 4] and stage.index.tolist() == [0, 1, 2]
+    assert mwp.take_stage_rows(merged, rows[1])['value'].tolist() == [0, 1, 6]
+
+    stage.loc[0, 'value'] = -1 # Changing the stage frame leaves the merged frame as it was
+    assert merged['value'].tolist() == list(range(7))
+
+
+def test_stage_reports_follow_the_overall_merge(tmp_path, sample_files):
+    results = mwp.generate_reports(*sample_files, str(tmp_path / 'reports'), reuse_existing=False)
+    overall = pd.read_parquet(results['overall_data_path'])
+    for report in results['step_reports']:
+        stage = pd.read_parquet(report['data_path'])
+        expected = overall[overall['Stage'] == report['step_number']].reset_index(drop=True)
+        pd.testing.assert_frame_equal(stage, expected)
@@ -0,0 +1,13 @@
+import pandas as pd
+
+import stage_segmentation
+
+
+def test_setpoint_change_ignores_drift_below_tolerance():
+    df = pd.DataFrame({'Pressure setpoint': [90.00, 90.02, 89.97, 95.0, 95.03, 95.0]})
+    stages, boundaries = stage_segmentation.segment_stages(df, rules=['setpoint_change'],
+                                                           setpoint_columns=['Pressure setpoint'])
+    assert stages.tolist() == [1, 1, 1, 2, 2, 2]
+    stages, _ = stage_segmentation.segment_stages(df, rules=['setpoint_change'], setpoint_columns=['Pressure setpoint'],
+                                                  setpoint_tolerance=0)
+    assert stages.tolist() == [1, 2, 3, 4, 5, 6]
@@ -0,0 +1,35 @@
+import os
+
+import pandas as pd
+
+import main_web_processor as mwp
+from report_store import read_report_frame
+
+
+def _merged_frame(rows=3000):
+    stages = [1] * 1000 + [2] * 1500 + [3] * 500
+    return pd.DataFrame({'Date': pd.date_range('2025-02-05', periods=rows, freq='s'), 'Stage': stages,
+                         'T Heater 1': [i / 3 for i in range(rows)], 'NH3': [i % 7 / 10 for i in range(rows)]})
+
+
+def test_worker_processes_write_the_same_stages_as_in_process(tmp_path, monkeypatch, capsys):
+    merged = _merged_frame()
+    rows_by_stage = mwp.stage_rows(merged)
+    serial = mwp.write_stage_reports(merged, rows_by_stage, str(tmp_path / 'serial'), max_workers=1)
+
+    monkeypatch.setattr(mwp, 'STAGE_POOL_MIN_ROWS', 0)
+    os.makedirs(tmp_path / 'pooled') # The report folder exists before its stages are written
+    written = []
+    try:
+        pooled = mwp.write_stage_reports(merged, rows_by_stage, str(tmp_path / 'pooled'), max_workers=2,
+                                         on_stage_written=lambda stage, paths: written.append(stage))
+    finally:
+        pool = mwp._stage_pools.pop(2, None)
+        if pool is not None:
+            pool.shutdown()
+    assert 'Wrote 3 stages with 2 worker processes.' in capsys.readouterr().out
+    assert sorted(written) == [1, 2, 3]
+    assert not os.path.exists(tmp_path / 'pooled' / mwp.STAGE_FRAMES_FILE)
+    for (_, serial_data), (_, pooled_data) in zip(serial, pooled):
+        assert os.path.relpath(pooled_data, tmp_path / 'pooled') == os.path.relpath(serial_data, tmp_path / 'serial')
+        pd.testing.assert_frame_equal(read_report_frame(pooled_data), read_report_frame(serial_data))
@@ -0,0 +1,99 @@
+import os
+
+import pyarrow.parquet as pq
+
+import main_web_processor as mwp
+import streaming_ingest
+from conftest import GC_HEADER_LINES, LV_HEADER_LINES, SAMPLE_GC, SAMPLE_LV, copy_head
+from report_store import export_report_frame
+
+
+def _stage_exports(results):
+    return {report['step_number']: export_report_frame(report['data_path'], 'csv') for report in results['step_reports']}
+
+
+def test_streaming_run_matches_in_memory_run(tmp_path, sample_files):
+    lv, gc = sample_files
+    full = mwp.generate_reports(lv, gc, str(tmp_path / 'full'), reuse_existing=False)
+    streamed = streaming_ingest.generate_reports_streaming(lv, gc, str(tmp_path / 'streamed'), chunk_bytes=4096,
+                                                           reuse_existing=False)
+    assert full['success'] and streamed['success']
+    assert _stage_exports(streamed) == _stage_exports(full)
+    with open(streamed['overall_csv_path']) as f:
+        assert f.read() == export_report_frame(full['overall_data_path'], 'csv')
+
+
+def test_streamed_stage_is_written_one_row_group_per_chunk(tmp_path, sample_files):
+    lv, gc = sample_files
+    results = streaming_ingest.generate_reports_streaming(lv, gc, str(tmp_path / 'streamed'), chunk_bytes=4096,
+                                                          reuse_existing=False)
+    longest = max(results['step_reports'], key=lambda report: pq.ParquetFile(report['data_path']).metadata.num_rows)
+    metadata = pq.ParquetFile(longest['data_path']).metadata
+    assert metadata.num_row_groups > 1
+    assert metadata.num_rows == len(export_report_frame(longest['data_path'], 'csv').splitlines()) - 1
+
+
+# --- Incremental (tail) mode ---
+def _start_live_run(tmp_path, lv_rows, gc_rows):
+    lv = copy_head(SAMPLE_LV, tmp_path / 'live_lv.txt', LV_HEADER_LINES, lv_rows)
+    gc = copy_head(SAMPLE_GC, tmp_path / 'live_gc.txt', GC_HEADER_LINES, gc_rows)
+    results = streaming_ingest.generate_reports_streaming(lv, gc, str(tmp_path / 'live'), chunk_bytes=4096,
+                                                          incremental=True)
+    assert results['success']
+    return lv, gc, os.path.dirname(results['overall_csv_path'])
+
+
+def test_refresh_rewrites_only_unsettled_stages(tmp_path, sample_files):
+    lv, gc, folder = _start_live_run(tmp_path, 80, 100)
+    state, frames = streaming_ingest.load_ingest_state(folder)
+    assert state['stage'] == 2 and state['unsettled_stages'] == [2]
+    assert frames['unsettled_lv']['Stage'].unique().tolist() == [2]
+    settled_path = os.path.join(folder, 'step_1', 'step_1_data.parquet')
+    settled_mtime = os.stat(settled_path).st_mtime_ns
+
+    copy_head(SAMPLE_LV, lv, LV_HEADER_LINES, 120)
+    copy_head(SAMPLE_GC, gc, GC_HEADER_LINES, 150)
+    refreshed = streaming_ingest.refresh_report_incremental(folder)
+    assert refreshed['success'], refreshed['message']
+    assert os.stat(settled_path).st_mtime_ns == settled_mtime
+
+    full = mwp.generate_reports(*sample_files, str(tmp_path / 'full'), reuse_existing=False)
+    assert _stage_exports(refreshed) == _stage_exports(full)
+    with open(refreshed['overall_csv_path']) as f:
+        assert f.read() == export_report_frame(full['overall_data_path'], 'csv')
+
+
+def test_ingest_state_round_trip(tmp_path):
+    lv, gc, folder = _start_live_run(tmp_path, 80, 100)
+    state, _ = streaming_ingest.load_ingest_state(folder)
+    assert state['lv_file'] == os.path.abspath(lv) and state['gc_file'] == os.path.abspath(gc)
+    assert state['lv_offset'] == os.path.getsize(lv) and state['gc_offset'] == os.path.getsize(gc)
+    assert streaming_ingest.ingest_source_files(folder) == (state['lv_file'], state['gc_file'])
+
+    # A refresh without new rows saves the same offsets again
+    assert streaming_ingest.refresh_report_incremental(folder)['success']
+    again, _ = streaming_ingest.load_ingest_state(folder)
+    assert {key: again[key] for key in ('lv_offset', 'gc_offset', 'stage', 'rows_written', 'unsettled_stages')} == \
+        {key: state[key] for key in ('lv_offset', 'gc_offset', 'stage', 'rows_written', 'unsettled_stages')}
+
+
+def test_refresh_rejects_truncated_or_replaced_files(tmp_path):
+    lv, gc, folder = _start_live_run(tmp_path, 80, 100)
+    copy_head(SAMPLE_LV, lv, LV_HEADER_LINES, 40)
+    results = streaming_ingest.refresh_report_incremental(folder)
+    assert not results['success'] and 'replaced or truncated' in results['message']
+
+    copy_head(SAMPLE_LV, lv, LV_HEADER_LINES, 120)
+    with open(gc) as f:
+        lines = f.readlines()
+    lines[0] = lines[0].replace('NH3', 'NH3 (ppm)')
+    with open(gc, 'w') as f:
+        f.writelines(lines)
+    results = streaming_ingest.refresh_report_incremental(folder)
+    assert not results['success'] and 'columns changed' in results['message']
+
+
+def test_refresh_needs_an_incremental_report(tmp_path, sample_files):
+    results = streaming_ingest.generate_reports_streaming(*sample_files, str(tmp_path / 'streamed'), reuse_existing=False)
+    refreshed = streaming_ingest.refresh_report_incremental(os.path.dirname(results['overall_csv_path']))
+    assert not refreshed['success'] and 'not created in incremental mode' in refreshed['message']